@@ -1,23 +1,182 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket, WebSocketDisconnect, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from collections import deque
+import asyncio
+import base64
+import itertools
 import sys
 import os
-from typing import List
+from typing import List, Optional
 import shutil
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, date
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.enrollment import EnrollmentSystem
-from core.attendance import AttendanceSystem
-from models.face_recognizer import FaceRecognizer
-from database.db_manager import DatabaseManager
 from config.config import Config
 
-app = FastAPI(title="Face Recognition Attendance API")
+# Heavy modules (cv2, face_recognition, mysql.connector) are imported lazily
+# by _initialize_systems so importing this module never needs a live DB
+db = None
+face_recognizer = None
+enrollment_system = None
+attendance_system = None
+journal_replayer = None
+image_store = None
+
+startup_state = {
+    'models_ready': False,
+    'warmed_up': False,
+    'gallery_ready': False,
+    'database_ready': False,
+    'error': None,
+    'started_at': None,
+    'ready_at': None
+}
+
+_shutdown_event = threading.Event()
+
+def _initialize_systems():
+    """
+    Import heavy modules, connect to the database and load the gallery,
+    then keep watching for gallery changes made by other workers
+    A failed attempt is retried with exponential backoff, resuming at the
+    step that failed. With the journal enabled, check-ins are accepted from
+    the cached gallery while the database is still unreachable.
+    """
+    delay = Config.API_INIT_RETRY_SECONDS
+    while True:
+        try:
+            _initialize_once()
+            break
+        except Exception as e:
+            startup_state['error'] = str(e)
+            print(f"✗ API initialization failed, retrying in {delay:.0f}s: {e}")
+            if _shutdown_event.wait(delay):
+                return
+            delay = min(delay * 2, Config.API_INIT_RETRY_MAX_SECONDS)
+    
+    startup_state['error'] = None
+    elapsed = startup_state['ready_at'] - startup_state['started_at']
+    print(f"✓ API ready in {elapsed:.2f}s")
+    
+    _watch_gallery_version()
+
+def _initialize_once():
+    """One initialization attempt; steps that already succeeded are skipped"""
+    global db, face_recognizer, enrollment_system, attendance_system, journal_replayer, image_store
+    
+    from core.enrollment import EnrollmentSystem
+    from core.attendance import AttendanceSystem
+    from models.face_recognizer import FaceRecognizer
+    from models.shared_gallery import SharedGallery
+    from database.db_manager import DatabaseManager
+    from database.journal import AttendanceJournal, JournalReplayer
+    from utils.image_store import ImageStore
+    
+    # Evidence and enrollment images live under the /images mount
+    image_store = image_store or ImageStore(image_path)
+    if face_recognizer is None:
+        shared_gallery = SharedGallery() if Config.GALLERY_SHARED_MEMORY else None
+        face_recognizer = FaceRecognizer(db, shared_gallery)
+    if attendance_system is None:
+        journal = AttendanceJournal() if Config.JOURNAL_ENABLED else None
+        attendance_system = AttendanceSystem(db, face_recognizer, journal, image_store)
+    journal = attendance_system.journal
+    startup_state['models_ready'] = True
+    
+    if not face_recognizer.warmed_up:
+        face_recognizer.warm_up()
+    startup_state['warmed_up'] = True
+    
+    # Check-ins only need a gallery when they are journaled locally
+    if journal is not None and not startup_state['gallery_ready']:
+        cached = journal.load_gallery()
+        if cached is not None and face_recognizer.use_cached_gallery(*cached):
+            startup_state['gallery_ready'] = True
+    
+    if db is None:
+        db = DatabaseManager()
+        face_recognizer.db_manager = db
+        attendance_system.db_manager = db
+        enrollment_system = EnrollmentSystem(db, face_recognizer, image_store)
+        if journal is not None:
+            journal_replayer = JournalReplayer(journal, db)
+            journal_replayer.start()
+    
+    face_recognizer.load_encodings_from_db()
+    _cache_gallery()
+    startup_state['gallery_ready'] = True
+    startup_state['database_ready'] = True
+    startup_state['ready_at'] = time.time()
+
+def _cache_gallery():
+    """Keep the loaded gallery in the journal for startups without the database"""
+    journal = attendance_system.journal
+    if journal is None:
+        return
+    gallery = face_recognizer.gallery
+    try:
+        journal.save_gallery(gallery.version, gallery.encodings, gallery.employees)
+    except Exception as e:
+        print(f"Warning: Could not cache the gallery in the journal: {e}")
+
+def _watch_gallery_version():
+    """Poll the DB gallery version so enrollments in other workers show up here"""
+    while not _shutdown_event.wait(Config.GALLERY_POLL_SECONDS):
+        try:
+            if face_recognizer.refresh_if_stale():
+                print(f"✓ Gallery updated to v{face_recognizer.gallery_version}")
+                _cache_gallery()
+        except Exception as e:
+            print(f"Warning: Gallery version check failed: {e}")
+
+def _is_ready() -> bool:
+    return (startup_state['models_ready'] and startup_state['warmed_up']
+            and startup_state['gallery_ready'] and startup_state['database_ready'])
+
+def _require_ready():
+    """Reject requests until models and gallery are loaded"""
+    if not _is_ready():
+        raise HTTPException(status_code=503, detail="Service is starting up, please retry shortly")
+
+def _require_attendance_ready():
+    """
+    Like _require_ready, but journaled check-ins and check-outs only need
+    the models and a gallery (possibly the cached one), not the database
+    """
+    journaled = (attendance_system is not None and attendance_system.journal is not None
+                 and startup_state['warmed_up'] and startup_state['gallery_ready'])
+    if not (journaled or _is_ready()):
+        raise HTTPException(status_code=503, detail="Service is starting up, please retry shortly")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialize in the background so the worker starts accepting probes immediately
+    startup_state['started_at'] = time.time()
+    init_thread = threading.Thread(target=_initialize_systems, name="api-init", daemon=True)
+    init_thread.start()
+    
+    yield
+    
+    _shutdown_event.set()
+    if journal_replayer is not None:
+        journal_replayer.stop()
+    if attendance_system is not None and attendance_system.journal is not None:
+        attendance_system.journal.close()
+    if face_recognizer is not None and face_recognizer.shared_gallery is not None:
+        face_recognizer.shared_gallery.close()
+    if db is not None:
+        db.close()
+
+app = FastAPI(title="Face Recognition Attendance API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -35,17 +194,70 @@ if not os.path.exists(image_path):
     os.makedirs(image_path, exist_ok=True)
 app.mount("/images", StaticFiles(directory=image_path), name="images")
 
-# Initialize systems
-db = DatabaseManager()
-face_recognizer = FaceRecognizer(db)
-face_recognizer.load_encodings_from_db()  # Load encodings at startup
-enrollment_system = EnrollmentSystem(db, face_recognizer)
-attendance_system = AttendanceSystem(db, face_recognizer)
+def _get_image_store():
+    """The shared image store; usable before the rest of the API has finished starting"""
+    global image_store
+    if image_store is None:
+        from utils.image_store import ImageStore
+        image_store = ImageStore(image_path)
+    return image_store
+
+@app.get("/api/images/{relative_path:path}")
+def get_image(relative_path: str, request: Request, size: Optional[int] = None):
+    """
+    Serve a stored image, or its thumbnail when size is given
+    size must be one of IMAGE_VARIANT_SIZES (longest side in px); variants
+    are cached on disk. Responses carry an ETag and Cache-Control so browsers
+    revalidate with a 304 instead of downloading the image again.
+    """
+    store = _get_image_store()
+    
+    try:
+        if size is None:
+            path = store.absolute_path(relative_path)
+        else:
+            path = store.variant_path(relative_path, size)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    headers = {
+        "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        "Cache-Control": f"public, max-age={Config.IMAGE_CACHE_MAX_AGE}"
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    
+    return FileResponse(path, headers=headers, stat_result=stat)
 
 @app.get("/")
 def read_root():
     return {"message": "Face Recognition Attendance API", "status": "running"}
 
+@app.get("/api/ready")
+def readiness_check():
+    """
+    Readiness probe: 200 only once models are warm and the face gallery is loaded
+    """
+    content = {
+        "ready": _is_ready(),
+        "models_ready": startup_state['models_ready'],
+        "warmed_up": startup_state['warmed_up'],
+        "gallery_ready": startup_state['gallery_ready'],
+        "database_ready": startup_state['database_ready'],
+        "error": startup_state['error']
+    }
+    if startup_state['ready_at'] is not None:
+        content["startup_seconds"] = round(startup_state['ready_at'] - startup_state['started_at'], 2)
+    
+    return JSONResponse(content=content, status_code=200 if content["ready"] else 503)
+
 @app.post("/api/enroll")
 async def enroll_employee(
     employee_code: str = Form(...),
@@ -59,6 +271,8 @@ async def enroll_employee(
     """
     Enroll a new employee with face images
     """
+    _require_ready()
+    
     print(f"\n=== ENROLLMENT REQUEST ===")
     print(f"Employee: {full_name} ({employee_code})")
     print(f"Number of images received: {len(images)}")
@@ -113,11 +327,42 @@ async def enroll_employee(
             shutil.rmtree(temp_dir)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/employees")
+def list_employees(status: str = 'active', codes: Optional[str] = None):
+    """
+    List employees with their enrolled photo counts
+    Pass codes (comma-separated employee codes) to look up specific employees
+    """
+    _require_ready()
+    
+    try:
+        if codes:
+            code_list = [code.strip() for code in codes.split(',') if code.strip()]
+            found = db.get_employees_by_codes(code_list)
+            employees = [found[code] for code in code_list if code in found]
+        else:
+            employees = db.get_all_employees(status)
+        
+        # One GROUP BY for every count instead of a query per employee
+        counts = db.get_encoding_counts([employee['employee_id'] for employee in employees])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    for employee in employees:
+        employee['photo_count'] = counts.get(employee['employee_id'], 0)
+    
+    return JSONResponse(content=jsonable_encoder({
+        "success": True,
+        "employees": employees
+    }))
+
 @app.post("/api/recognize")
 async def recognize_face(image: UploadFile = File(...)):
     """
     Recognize a face from uploaded image
     """
+    _require_ready()
+    
     try:
         # Save uploaded file temporarily
         temp_path = f"./temp/recognize_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
@@ -139,11 +384,155 @@ async def recognize_face(image: UploadFile = File(...)):
             os.remove(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _recognize_encoded_frame(frame_bytes: bytes, tracker=None, motion_gate=None, last_faces=None):
+    """
+    Decode a compressed frame and run recognition on it
+    With a motion gate, a frame showing the same scene as the last processed
+    one gets last_faces back without running recognition
+    Returns: (faces, or None if the frame could not be decoded,
+              whether recognition ran, CPU seconds used by this thread)
+    """
+    import cv2
+    import numpy as np
+    
+    cpu_start = time.thread_time()
+    frame = cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return None, False, time.thread_time() - cpu_start
+    
+    changed = motion_gate is None or motion_gate.should_process(frame)
+    if not changed and last_faces is not None:
+        return last_faces, False, time.thread_time() - cpu_start
+    
+    results = face_recognizer.process_frame(frame, quality_gate=True, presence_check=True, tracker=tracker)
+    return face_recognizer.serialize_results(results), True, time.thread_time() - cpu_start
+
+@app.websocket("/ws/recognize")
+async def recognize_stream(websocket: WebSocket):
+    """
+    Streaming recognition
+    The client sends compressed frames (JPEG/PNG/WebP) as binary messages and
+    receives one JSON result per processed frame; text messages are ignored. When frames arrive faster
+    than they can be recognized, older pending frames are dropped so the
+    newest frame is always the next one processed.
+    """
+    await websocket.accept()
+    
+    if not _is_ready():
+        await websocket.close(code=1013, reason="Service is starting up")
+        return
+    
+    from models.roi_tracker import FaceRegionTracker
+    from models.motion_gate import MotionGate
+    
+    # Frames of one connection are processed in order, so the connection owns its tracker and gate
+    tracker = FaceRegionTracker()
+    motion_gate = MotionGate() if Config.MOTION_GATE_ENABLED else None
+    last = {'faces': None, 'at': time.perf_counter()}
+    
+    # Single-slot mailbox: a newer frame replaces an unprocessed older one
+    pending = {'frame': None, 'frame_id': 0, 'received_at': 0.0}
+    frame_ready = asyncio.Event()
+    stats = {'received': 0, 'processed': 0, 'dropped': 0, 'latency_ms_total': 0.0}
+    recent_done = deque(maxlen=30)
+    connected_at = time.perf_counter()
+    
+    async def receive_frames():
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                raise WebSocketDisconnect(message.get('code', 1000))
+            frame_bytes = message.get('bytes')
+            if frame_bytes is None:
+                # Text message (e.g. a client keepalive), not a frame
+                continue
+            stats['received'] += 1
+            
+            if len(frame_bytes) > Config.WS_MAX_FRAME_BYTES:
+                stats['dropped'] += 1
+                await websocket.send_json({"frame_id": stats['received'], "error": "Frame too large"})
+                continue
+            
+            if pending['frame'] is not None:
+                stats['dropped'] += 1
+            
+            pending['frame'] = frame_bytes
+            pending['frame_id'] = stats['received']
+            pending['received_at'] = time.perf_counter()
+            frame_ready.set()
+    
+    async def process_frames():
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            
+            frame_bytes, frame_id, received_at = pending['frame'], pending['frame_id'], pending['received_at']
+            pending['frame'] = None
+            if frame_bytes is None:
+                continue
+            
+            faces, recognized, cpu_seconds = await run_in_threadpool(
+                _recognize_encoded_frame, frame_bytes, tracker, motion_gate, last['faces']
+            )
+            
+            done_at = time.perf_counter()
+            if motion_gate is not None:
+                # Wall time runs from one processed frame to the next, so waiting on the client is idle time
+                motion_gate.record(recognized, cpu_seconds, done_at - last['at'])
+            last['at'] = done_at
+            if faces is not None:
+                last['faces'] = faces
+            latency_ms = (done_at - received_at) * 1000
+            stats['processed'] += 1
+            stats['latency_ms_total'] += latency_ms
+            recent_done.append(done_at)
+            
+            fps = 0.0
+            if len(recent_done) > 1 and recent_done[-1] > recent_done[0]:
+                fps = (len(recent_done) - 1) / (recent_done[-1] - recent_done[0])
+            
+            message = {
+                "frame_id": frame_id,
+                "latency_ms": round(latency_ms, 1),
+                "fps": round(fps, 2),
+                "dropped": stats['dropped']
+            }
+            if faces is None:
+                message["error"] = "Could not decode frame"
+            else:
+                message["faces"] = faces
+                message["reused"] = not recognized
+            if motion_gate is not None:
+                motion = motion_gate.get_stats()
+                message["motion"] = {key: motion[key] for key in
+                                     ('frames_skipped', 'idle_cpu_percent', 'busy_cpu_percent')}
+            
+            await websocket.send_json(message)
+    
+    tasks = [asyncio.create_task(receive_frames()), asyncio.create_task(process_frames())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                print(f"✗ Recognition stream error: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        
+        duration = time.perf_counter() - connected_at
+        avg_latency = stats['latency_ms_total'] / stats['processed'] if stats['processed'] else 0.0
+        print(f"Recognition stream closed: {stats['processed']}/{stats['received']} frames processed, "
+              f"{stats['dropped']} dropped, {stats['processed'] / max(duration, 1e-6):.1f} fps, "
+              f"avg latency {avg_latency:.0f} ms")
+
 @app.post("/api/attendance/checkin")
 async def check_in(image: UploadFile = File(...)):
     """
     Check-in attendance with face recognition
     """
+    _require_attendance_ready()
+    
     try:
         # Save uploaded file temporarily
         temp_path = f"./temp/checkin_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
@@ -172,11 +561,41 @@ async def check_in(image: UploadFile = File(...)):
             os.remove(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/attendance/checkin/group")
+async def group_check_in(image: UploadFile = File(...)):
+    """
+    Check-in every recognized person in a multi-face frame
+    """
+    _require_attendance_ready()
+    
+    try:
+        # Save uploaded file temporarily
+        temp_path = f"./temp/group_checkin_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
+        os.makedirs("./temp", exist_ok=True)
+        
+        with open(temp_path, "wb") as buffer:
+            shutil.copyfileobj(image.file, buffer)
+        
+        # Process group check-in
+        result = attendance_system.group_check_in_from_image(temp_path)
+        
+        # Clean up
+        os.remove(temp_path)
+        
+        return JSONResponse(content=result, status_code=200 if result['success'] else 400)
+            
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/attendance/checkout")
 async def check_out(image: UploadFile = File(...)):
     """
     Check-out attendance with face recognition
     """
+    _require_attendance_ready()
+    
     try:
         # Save uploaded file temporarily
         temp_path = f"./temp/checkout_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
@@ -205,24 +624,195 @@ async def check_out(image: UploadFile = File(...)):
             os.remove(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
+def _encode_cursor(after) -> str:
+    """Opaque keyset cursor: base64 of '<attendance_date>|<attendance_id>'"""
+    after_date, after_id = after
+    return base64.urlsafe_b64encode(f"{after_date.isoformat()}|{after_id}".encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        after_date, after_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return date.fromisoformat(after_date), int(after_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/api/attendance/records")
+def attendance_records(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    employee_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """
+    Page through attendance history, newest first
+    Pass next_cursor back as cursor to get the following page
+    """
+    _require_ready()
+    
+    field_list = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+    after = _decode_cursor(cursor) if cursor else None
+    
+    try:
+        records, next_after = db.get_attendance_page(
+            fields=field_list, employee_id=employee_id, start_date=start_date,
+            end_date=end_date, after=after, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return JSONResponse(content=jsonable_encoder({
+        "success": True,
+        "records": records,
+        "next_cursor": _encode_cursor(next_after) if next_after else None
+    }))
+
+@app.get("/api/attendance/export")
+def export_attendance(
+    start_date: date,
+    end_date: date,
+    format: str = Query('csv', pattern='^(csv|parquet|arrow)$'),
+    gzip: bool = False,
+    fields: Optional[str] = None
+):
+    """
+    Stream an attendance export for a date range as CSV, Parquet or Arrow
+    """
+    _require_ready()
+    from database.export import AttendanceExporter
+    
+    field_list = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+    exporter = AttendanceExporter(db)
+    
+    try:
+        stream = exporter.stream(format, start_date, end_date, field_list, gzip)
+        # Pull the first chunk here so bad fields or a DB error become a proper error response
+        first = next(stream, b'')
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    file_name = AttendanceExporter.file_name(format, start_date, end_date, gzip)
+    return StreamingResponse(
+        itertools.chain([first], stream),
+        media_type=AttendanceExporter.media_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
+
+_health_cache = {'expires_at': 0.0, 'content': None}
+
+def _journal_status():
+    if journal_replayer is None:
+        return None
+    return {
+        "events": journal_replayer.journal.get_stats(),
+        "replayed": journal_replayer.replayed,
+        "failed": journal_replayer.journal.get_failed(),
+        "last_error": journal_replayer.last_error
+    }
+
 @app.get("/api/health")
 def health_check():
     """
     Health check endpoint
+    Built from in-memory state only and cached briefly, so probes never
+    open a database connection or touch the gallery
     """
-    try:
-        # Test database connection
-        db.connect()
-        db_status = "connected"
-        db.close()
-    except:
-        db_status = "disconnected"
+    now = time.time()
+    if _health_cache['content'] is not None and now < _health_cache['expires_at']:
+        return _health_cache['content']
     
-    return {
-        "status": "healthy",
-        "database": db_status,
-        "face_recognizer": "loaded" if face_recognizer.known_face_encodings else "no data"
+    if db is not None:
+        pool_status = db.get_pool_status()
+        db_healthy = (pool_status['last_error_at'] is None or
+                      (pool_status['last_success_at'] or 0) > pool_status['last_error_at'])
+    else:
+        pool_status = None
+        db_healthy = False
+    
+    if face_recognizer is not None:
+        gallery = {
+            "version": face_recognizer.gallery_version,
+            "size": len(face_recognizer.known_encodings),
+            "employees": len({emp['employee_id'] for emp in face_recognizer.known_employees}),
+            "loaded_at": face_recognizer.gallery_loaded_at,
+            "quantization": face_recognizer.gallery.quantized.mode if face_recognizer.gallery.quantized else None,
+            "centroid_prefilter": face_recognizer.gallery.centroid_index is not None,
+            "last_swap_us": face_recognizer.last_swap_us
+        }
+        warmup_ms = face_recognizer.warmup_ms
+        presence = face_recognizer.presence_filter.get_stats() if face_recognizer.presence_filter.enabled else None
+    else:
+        gallery = None
+        warmup_ms = None
+        presence = None
+    
+    content = {
+        "status": "healthy" if _is_ready() and db_healthy else "degraded",
+        "ready": _is_ready(),
+        "warmed_up": startup_state['warmed_up'],
+        "warmup_ms": round(warmup_ms, 1) if warmup_ms is not None else None,
+        "gallery": gallery,
+        "presence_filter": presence,
+        "database": pool_status,
+        "journal": _journal_status(),
+        "error": startup_state['error'],
+        "checked_at": now
     }
+    
+    _health_cache['content'] = content
+    _health_cache['expires_at'] = now + Config.HEALTH_CACHE_SECONDS
+    return content
+
+def _require_profiling():
+    if not Config.PROFILE_ENDPOINT_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/api/admin/profile")
+def capture_profile(
+    seconds: float = Query(10, gt=0),
+    format: str = Query('collapsed', pattern='^(collapsed|prof)$'),
+    interval_ms: Optional[float] = Query(None, gt=0),
+    include_idle: bool = False
+):
+    """
+    Sample every thread's stack for a few seconds of live traffic
+    Returns collapsed stacks (flamegraph.pl / speedscope input) or a .prof
+    file for pstats / snakeviz. Only available with PROFILE_ENDPOINT_ENABLED
+    """
+    _require_profiling()
+    from utils.profiling import SamplingProfiler
+    
+    profiler = SamplingProfiler(interval_ms, include_idle)
+    try:
+        # Plain def: the wait happens on a threadpool thread, not the event loop
+        profiler.run(min(seconds, Config.PROFILE_MAX_SECONDS))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    headers = {"X-Profile-Samples": str(profiler.sample_count)}
+    if format == 'prof':
+        headers["Content-Disposition"] = f'attachment; filename="profile_{stamp}.prof"'
+        return Response(profiler.pstats_bytes(), media_type="application/octet-stream", headers=headers)
+    
+    headers["Content-Disposition"] = f'attachment; filename="profile_{stamp}.folded"'
+    return Response(profiler.collapsed(), media_type="text/plain; charset=utf-8", headers=headers)
+
+@app.get("/api/admin/timings")
+def get_timings(reset: bool = False):
+    """Per-method call counts and times from the PROFILE_TIMINGS decorators"""
+    _require_profiling()
+    from utils.profiling import timings
+    
+    content = {"enabled": Config.PROFILE_TIMINGS, "timings": timings.get_stats()}
+    if reset:
+        timings.reset()
+    return content
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-employee centroid prefilter
+Matches probes against a synthetic gallery (MAX_FACES_PER_EMPLOYEE
+encodings per employee) exhaustively and through the centroid index, per
+probe and batched, for known employees, strangers and near-duplicates
+between employees. Also times building the index from the encodings alone
+and from stored centroids. Exactness is covered by tests/test_centroid_index.py:
+    python benchmarks/bench_centroid_prefilter.py --employees 20000 --k 10
+"""
+
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from models.face_recognizer import FaceRecognizer
+from models.gallery_snapshot import GallerySnapshot
+from models.centroid_index import CentroidIndex
+
+def synthetic_gallery(employees_count: int, per_employee: int, rng):
+    centers = rng.normal(0, 0.09, size=(employees_count, 128))
+    # Some employees get fewer photos, like partially enrolled ones
+    counts = rng.integers(1, per_employee + 1, size=employees_count)
+    owners = np.repeat(np.arange(employees_count), counts)
+    rng.shuffle(owners)
+    encodings = centers[owners] + rng.normal(0, 0.025, size=(len(owners), 128))
+    employees = [{'employee_id': int(owner), 'employee_code': f"EMP{owner:06d}",
+                  'full_name': f"Employee {owner}", 'encoding_id': i} for i, owner in enumerate(owners)]
+    return encodings, employees, centers
+
+def synthetic_probes(centers: np.ndarray, count: int, rng):
+    """Returns: (probes, {kind: slice of probes})"""
+    known = centers[rng.integers(0, len(centers), size=count)] + rng.normal(0, 0.025, size=(count, 128))
+    strangers = rng.normal(0, 0.09, size=(count // 4, 128))
+    # Halfway between two employees, where a top-k shortlist is most likely to miss
+    pairs = rng.integers(0, len(centers), size=(count // 4, 2))
+    between = (centers[pairs[:, 0]] + centers[pairs[:, 1]]) / 2
+    kinds = {'known': slice(0, count), 'stranger': slice(count, count + count // 4),
+             'between': slice(count + count // 4, count + count // 2)}
+    return np.vstack([known, strangers, between]), kinds
+
+def build(encodings, employees, prefilter: bool) -> FaceRecognizer:
+    recognizer = FaceRecognizer(None)
+    recognizer.gallery = GallerySnapshot(1, encodings, employees, centroid_prefilter=prefilter)
+    return recognizer
+
+def run(recognizer: FaceRecognizer, probes: np.ndarray):
+    start = time.perf_counter()
+    results = [recognizer.recognize_face(probe) for probe in probes]
+    return results, (time.perf_counter() - start) / len(probes) * 1000
+
+def build_ms(encodings, employees, centroids=None) -> float:
+    start = time.perf_counter()
+    CentroidIndex(encodings, employees, centroids)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    employees_count = 20000
+    k = Config.GALLERY_CENTROID_TOP_K
+    count = 400
+    if '--employees' in sys.argv:
+        employees_count = int(sys.argv[sys.argv.index('--employees') + 1])
+    if '--k' in sys.argv:
+        k = int(sys.argv[sys.argv.index('--k') + 1])
+    if '--probes' in sys.argv:
+        count = int(sys.argv[sys.argv.index('--probes') + 1])
+
+    rng = np.random.default_rng(42)
+    encodings, employees, centers = synthetic_gallery(employees_count, Config.MAX_FACES_PER_EMPLOYEE, rng)
+    probes, kinds = synthetic_probes(centers, count, rng)
+
+    print("\n=== CENTROID PREFILTER BENCHMARK ===\n")
+    print(f"{employees_count} employees, {len(encodings)} encodings, {len(probes)} probes, k = {k}\n")
+
+    exhaustive_recognizer = build(encodings, employees, False)
+    prefiltered_recognizer = build(encodings, employees, True)
+    prefiltered_recognizer.centroid_top_k = k
+    index = prefiltered_recognizer.gallery.centroid_index
+
+    print(f"{'Probes':<10} {'Exhaustive ms':>14} {'Centroid ms':>12} {'Comparisons':>12} {'Reduction':>10}")
+    for kind, rows in kinds.items():
+        _, exhaustive_ms = run(exhaustive_recognizer, probes[rows])
+        _, prefiltered_ms = run(prefiltered_recognizer, probes[rows])
+        comparisons = np.mean([index.nearest(encodings, probe, k)[2] for probe in probes[rows]])
+        print(f"{kind:<10} {exhaustive_ms:>14.2f} {prefiltered_ms:>12.2f} {comparisons:>12.0f} "
+              f"{len(encodings) / comparisons:>9.1f}x")
+    print(f"(exhaustive compares all {len(encodings)} encodings)\n")
+
+    start = time.perf_counter()
+    prefiltered_recognizer.recognize_faces(list(probes))
+    print(f"Batched recognize_faces: {(time.perf_counter() - start) / len(probes) * 1000:.2f} ms per probe")
+
+    stored = {int(employee_id): (index.centroids[i], int(index.offsets[i + 1] - index.offsets[i]),
+                                 float(index.radii[i]))
+              for i, employee_id in enumerate(index.employee_ids)}
+    print(f"Index build: {build_ms(encodings, employees):.0f} ms from encodings, "
+          f"{build_ms(encodings, employees, stored):.0f} ms from stored centroids")
+
+if __name__ == "__main__":
+    main()
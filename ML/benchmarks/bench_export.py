@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk attendance export time and memory
+By default encodes one million synthetic rows per format with no database,
+comparing chunked streaming against materializing every row first. Each run
+happens in a child process so peak RSS is measured per format.
+
+Against MySQL (point DB_NAME at a scratch database):
+    python benchmarks/bench_export.py --db --seed 1000000
+    python benchmarks/bench_export.py --db
+"""
+
+import sys
+import os
+import time
+import tempfile
+import multiprocessing
+from datetime import date, datetime, timedelta
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.export import AttendanceExporter, EXPORT_FIELDS
+
+START_DATE = date(2020, 1, 1)
+EMPLOYEES = 2000
+
+def synthetic_chunks(rows: int, chunk_size: int):
+    """Rows shaped like iter_attendance_export output, ordered like EXPORT_FIELDS"""
+    produced = 0
+    while produced < rows:
+        count = min(chunk_size, rows - produced)
+        chunk = []
+        for i in range(produced, produced + count):
+            day = START_DATE + timedelta(days=i // EMPLOYEES)
+            employee = i % EMPLOYEES
+            check_in = datetime.combine(day, datetime.min.time()) + timedelta(hours=8, seconds=employee)
+            chunk.append((day, f"EMP{employee:05d}", f"Employee {employee}", f"Dept {employee % 20}",
+                          'Staff', check_in, check_in + timedelta(hours=9), 'present',
+                          0.91, 0.88, None, None))
+        produced += count
+        yield chunk
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return float('nan')
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def run_synthetic(fmt: str, compress: bool, rows: int, chunk_size: int, materialize: bool, results):
+    exporter = AttendanceExporter(chunk_size=chunk_size)
+    baseline = peak_rss_mb()
+
+    # Timings include producing the synthetic rows, standing in for the fetch
+    start = time.perf_counter()
+    chunks = synthetic_chunks(rows, chunk_size)
+    if materialize:
+        # What a fetchall() based export would hold
+        chunks = [[row for chunk in chunks for row in chunk]]
+
+    written = 0
+    with tempfile.TemporaryFile() as output:
+        for data in exporter.encode(chunks, EXPORT_FIELDS, fmt, compress):
+            output.write(data)
+            written += len(data)
+    elapsed = time.perf_counter() - start
+
+    results.put((elapsed, written, peak_rss_mb() - baseline))
+
+def run_db(fmt: str, compress: bool, chunk_size: int, results):
+    from database.db_manager import DatabaseManager
+
+    db_manager = DatabaseManager()
+    exporter = AttendanceExporter(db_manager, chunk_size)
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    written = 0
+    with tempfile.TemporaryFile() as output:
+        for data in exporter.stream(fmt, date(1970, 1, 1), date(2100, 1, 1), compress=compress):
+            output.write(data)
+            written += len(data)
+    elapsed = time.perf_counter() - start
+    db_manager.close()
+
+    results.put((elapsed, written, peak_rss_mb() - baseline))
+
+def in_child(target, *args):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=target, args=(*args, results))
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+def seed_database(rows: int):
+    """Insert synthetic employees and attendance rows in batches"""
+    from database.db_manager import DatabaseManager
+
+    db_manager = DatabaseManager()
+    connection = db_manager.get_connection()
+    cursor = connection.cursor()
+
+    cursor.executemany(
+        "INSERT IGNORE INTO employees (employee_code, full_name, department, position) VALUES (%s, %s, %s, %s)",
+        [(f"BENCH{i:05d}", f"Bench Employee {i}", f"Dept {i % 20}", 'Staff') for i in range(EMPLOYEES)]
+    )
+    cursor.execute("SELECT employee_id FROM employees WHERE employee_code LIKE 'BENCH%' ORDER BY employee_code")
+    employee_ids = [row[0] for row in cursor.fetchall()]
+    connection.commit()
+
+    start = time.perf_counter()
+    for chunk in synthetic_chunks(rows, 5000):
+        batch = []
+        for row in chunk:
+            employee = int(row[1][3:])
+            batch.append((employee_ids[employee], row[0], row[5], row[6], row[7], row[8], row[9]))
+        cursor.executemany("""
+            INSERT IGNORE INTO attendance_records
+            (employee_id, attendance_date, check_in_time, check_out_time, status,
+             check_in_confidence, check_out_confidence)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, batch)
+        connection.commit()
+
+    cursor.close()
+    connection.close()
+    db_manager.close()
+    print(f"✓ Seeded {rows} attendance rows in {time.perf_counter() - start:.1f}s\n")
+
+def main():
+    rows = 1_000_000
+    chunk_size = 10000
+    if '--rows' in sys.argv:
+        rows = int(sys.argv[sys.argv.index('--rows') + 1])
+    if '--chunk-size' in sys.argv:
+        chunk_size = int(sys.argv[sys.argv.index('--chunk-size') + 1])
+
+    print("\n=== ATTENDANCE EXPORT BENCHMARK ===\n")
+
+    formats = [('csv', False), ('csv', True), ('parquet', False), ('arrow', False)]
+
+    if '--db' in sys.argv:
+        if '--seed' in sys.argv:
+            seed_database(int(sys.argv[sys.argv.index('--seed') + 1]))
+
+        print(f"{'Format':<12} {'Time (s)':>9} {'Size (MB)':>10} {'Peak RSS +MB':>13}")
+        for fmt, compress in formats:
+            elapsed, written, rss = in_child(run_db, fmt, compress, chunk_size)
+            label = fmt + ('.gz' if compress else '')
+            print(f"{label:<12} {elapsed:>9.2f} {written / 1024 / 1024:>10.1f} {rss:>13.1f}")
+        return
+
+    print(f"{rows} synthetic rows, chunk size {chunk_size}\n")
+    print(f"{'Format':<12} {'Mode':<12} {'Time (s)':>9} {'Rows/s':>10} {'Size (MB)':>10} {'Peak RSS +MB':>13}")
+    for fmt, compress in formats:
+        for materialize in (False, True):
+            elapsed, written, rss = in_child(run_synthetic, fmt, compress, rows, chunk_size, materialize)
+            label = fmt + ('.gz' if compress else '')
+            mode = 'materialized' if materialize else 'streamed'
+            print(f"{label:<12} {mode:<12} {elapsed:>9.2f} {rows / elapsed:>10.0f} "
+                  f"{written / 1024 / 1024:>10.1f} {rss:>13.1f}")
+
+if __name__ == "__main__":
+    main()
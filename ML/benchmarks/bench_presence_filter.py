@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cascade face-presence filter on the live path
+Runs process_frame over the same frames with and without the presence
+filter and reports end-to-end FPS, frames skipped before dlib and faces
+found by each run (a drop means the cascade missed faces dlib would find).
+
+Frames come from a recording of the kiosk camera:
+    python benchmarks/bench_presence_filter.py --video kiosk.mp4 --cascade haar
+or, without --video, from synthetic frames: mostly empty textured scenes,
+with the warm-up face (or --face IMAGE) pasted into every fifth frame.
+"""
+
+import sys
+import os
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.face_recognizer import FaceRecognizer
+from models.presence_filter import FacePresenceFilter
+
+def video_frames(path: str, limit: int):
+    capture = cv2.VideoCapture(int(path) if path.isdigit() else path)
+    frames = []
+    while len(frames) < limit:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+def synthetic_frames(count: int, face_path: str = None):
+    rng = np.random.default_rng(3)
+    background = cv2.GaussianBlur(rng.integers(60, 200, size=(480, 640, 3), dtype=np.uint8), (0, 0), 3)
+    face = cv2.imread(face_path) if face_path else FaceRecognizer._synthetic_face_image()
+
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        frame = cv2.add(frame, rng.integers(0, 6, size=frame.shape, dtype=np.uint8))
+        if i % 5 == 0:
+            height, width = min(face.shape[0], 400), min(face.shape[1], 400)
+            top, left = 40 + i % 40, 160 + i % 60
+            frame[top:top + height, left:left + width] = face[:height, :width]
+        frames.append(frame)
+    return frames
+
+def run(recognizer: FaceRecognizer, frames, presence_check: bool):
+    faces = 0
+    start = time.perf_counter()
+    for frame in frames:
+        faces += len(recognizer.process_frame(frame, quality_gate=True, presence_check=presence_check))
+    return len(frames) / (time.perf_counter() - start), faces
+
+def main():
+    count = 200
+    cascade = 'haar'
+    if '--frames' in sys.argv:
+        count = int(sys.argv[sys.argv.index('--frames') + 1])
+    if '--cascade' in sys.argv:
+        cascade = sys.argv[sys.argv.index('--cascade') + 1]
+    cascade_path = sys.argv[sys.argv.index('--cascade-path') + 1] if '--cascade-path' in sys.argv else None
+
+    print("\n=== FACE PRESENCE FILTER BENCHMARK ===\n")
+
+    recognizer = FaceRecognizer(None)
+    recognizer.warm_up()
+    recognizer.presence_filter = FacePresenceFilter(cascade, cascade_path)
+    if not recognizer.presence_filter.enabled:
+        print("✗ Presence filter could not be enabled (needs opencv-python with cascade support)")
+        sys.exit(1)
+
+    if '--video' in sys.argv:
+        frames = video_frames(sys.argv[sys.argv.index('--video') + 1], count)
+    else:
+        face_path = sys.argv[sys.argv.index('--face') + 1] if '--face' in sys.argv else None
+        frames = synthetic_frames(count, face_path)
+    print(f"{len(frames)} frames, {frames[0].shape[1]}x{frames[0].shape[0]}\n")
+
+    print(f"{'Mode':<20} {'FPS':>8} {'Faces':>7}")
+    fps, faces = run(recognizer, frames, False)
+    print(f"{'dlib every frame':<20} {fps:>8.1f} {faces:>7}")
+
+    for restrict in (False, True):
+        recognizer.presence_filter.restrict_to_roi = restrict
+        recognizer.presence_filter.reset_stats()
+        filtered_fps, filtered_faces = run(recognizer, frames, True)
+        label = f"{cascade} + " + ('ROI' if restrict else 'full frame')
+        print(f"{label:<20} {filtered_fps:>8.1f} {filtered_faces:>7}  ({filtered_fps / fps:.1f}x)")
+
+    stats = recognizer.presence_filter.get_stats()
+    print(f"\nSkipped {stats['frames_skipped']}/{stats['frames_checked']} frames before detection, "
+          f"{stats['false_candidates']} false candidates, {stats['avg_check_ms']} ms per check")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark quantized gallery matching
+Builds a synthetic gallery (default 200k encodings, 5 per employee) and
+matches probes against it with the current float64 path and with float16 /
+int8 shortlisting plus exact re-rank, and with the path the current
+settings select (GALLERY_QUANTIZATION, GALLERY_CENTROID_PREFILTER), reporting
+memory scanned per match, latency and agreement with the exact result.
+Probes go through recognize_faces, the call process_frame makes:
+    python benchmarks/bench_quantized_gallery.py --size 200000 --k 20
+"""
+
+import sys
+import os
+import time
+import statistics
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from models.face_recognizer import FaceRecognizer
+from models.gallery_snapshot import GallerySnapshot
+
+FACES_PER_EMPLOYEE = 5
+
+def synthetic_gallery(size: int, rng):
+    """Clusters of FACES_PER_EMPLOYEE encodings around per-employee centers, like dlib output"""
+    employees_count = max(1, size // FACES_PER_EMPLOYEE)
+    centers = rng.normal(0, 0.09, size=(employees_count, 128))
+    owners = np.arange(size) % employees_count
+    encodings = centers[owners] + rng.normal(0, 0.025, size=(size, 128))
+    employees = [{'employee_id': int(owner), 'employee_code': f"EMP{owner:06d}",
+                  'full_name': f"Employee {owner}", 'encoding_id': i} for i, owner in enumerate(owners)]
+    return encodings, employees, centers
+
+def probes_for(centers: np.ndarray, count: int, rng):
+    """New photos of known employees (distance ~0.35-0.45 from their encodings)"""
+    owners = rng.integers(0, len(centers), size=count)
+    return centers[owners] + rng.normal(0, 0.025, size=(count, 128))
+
+def build_recognizer(encodings, employees, quantization: str, centroid_prefilter: bool = False) -> FaceRecognizer:
+    recognizer = FaceRecognizer(None)
+    recognizer.gallery = GallerySnapshot(1, encodings, employees, quantization, centroid_prefilter)
+    return recognizer
+
+def scanned_bytes(gallery: GallerySnapshot) -> int:
+    if gallery.centroid_index is not None:
+        return gallery.centroid_index.centroids.nbytes
+    if gallery.quantized is not None:
+        return gallery.quantized.nbytes
+    return gallery.encodings.nbytes
+
+def time_matches(recognizer: FaceRecognizer, probes: np.ndarray):
+    samples = []
+    results = []
+    for probe in probes:
+        start = time.perf_counter()
+        results.extend(recognizer.recognize_faces([probe]))
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return results, statistics.median(samples) * 1000, samples[int(len(samples) * 0.95) - 1] * 1000
+
+def main():
+    size = 200_000
+    k = None
+    count = 200
+    if '--size' in sys.argv:
+        size = int(sys.argv[sys.argv.index('--size') + 1])
+    if '--k' in sys.argv:
+        k = int(sys.argv[sys.argv.index('--k') + 1])
+    if '--probes' in sys.argv:
+        count = int(sys.argv[sys.argv.index('--probes') + 1])
+
+    rng = np.random.default_rng(42)
+    encodings, employees, centers = synthetic_gallery(size, rng)
+    probes = probes_for(centers, count, rng)
+
+    print("\n=== QUANTIZED GALLERY BENCHMARK ===\n")
+    print(f"{size} encodings, {count} probes\n")
+    print(f"{'Mode':<10} {'Scanned (MB)':>13} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+          f"{'Same match':>11} {'Max |dconf|':>12}")
+
+    baseline = None
+    configured = ('configured', Config.GALLERY_QUANTIZATION, Config.GALLERY_CENTROID_PREFILTER)
+    for label, mode, prefilter in [(mode, mode, False) for mode in ('none', 'float16', 'int8')] + [configured]:
+        recognizer = build_recognizer(encodings, employees, mode, prefilter)
+        if k is not None:
+            recognizer.rerank_k = k
+        gallery = recognizer.gallery
+
+        results, p50, p95 = time_matches(recognizer, probes)
+        scanned = scanned_bytes(gallery)
+
+        if baseline is None:
+            baseline = results
+        same = sum((a[0] or {}).get('encoding_id') == (b[0] or {}).get('encoding_id')
+                   for a, b in zip(results, baseline))
+        drift = max(abs(a[1] - b[1]) for a, b in zip(results, baseline))
+
+        if label == 'none':
+            label = 'float64'
+        print(f"{label:<10} {scanned / 1024 / 1024:>13.1f} {p50:>9.2f} {p95:>9.2f} "
+              f"{same / count:>10.1%} {drift:>12.2e}")
+
+    print(f"\nRe-rank k = {recognizer.rerank_k}; 'Same match' is agreement with the float64 result")
+    print(f"configured = GALLERY_QUANTIZATION={Config.GALLERY_QUANTIZATION}, "
+          f"GALLERY_CENTROID_PREFILTER={str(Config.GALLERY_CENTROID_PREFILTER).lower()}"
+          + (" (centroid scan only, members compared per probe)" if Config.GALLERY_CENTROID_PREFILTER else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark recognition_logs insert/query latency and retention
+With --db (point DB_NAME at a scratch database), seeds recognition_logs up
+to --rows rows (default 10M) spread over the last year, measures
+log_recognition() and get_recognition_logs() latency, runs the archiver
+with the configured retention and measures again:
+    python benchmarks/bench_recognition_logs.py --db --rows 10000000
+
+Without --db, measures archive encoding throughput on synthetic rows.
+"""
+
+import sys
+import os
+import time
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from database.log_retention import RecognitionLogArchiver
+
+SPAN_DAYS = 365
+
+def synthetic_logs(rows: int, chunk_size: int, start_id: int = 1):
+    """Chunks of log rows ordered like LOG_FIELDS, oldest first"""
+    start = datetime.now() - timedelta(days=SPAN_DAYS)
+    step = SPAN_DAYS * 86400 / max(rows, 1)
+    for offset in range(0, rows, chunk_size):
+        chunk = []
+        for i in range(offset, min(offset + chunk_size, rows)):
+            employee = i % 500
+            chunk.append((start_id + i, employee or None, f"Employee {employee}", 0.82, None,
+                          'success' if employee else 'unknown_face', 45 + i % 30,
+                          start + timedelta(seconds=i * step)))
+        yield chunk
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (statistics.median(samples) * 1000,
+            samples[int(len(samples) * 0.95) - 1] * 1000)
+
+def measure(db_manager, label: str):
+    insert_times = []
+    for i in range(1000):
+        start = time.perf_counter()
+        db_manager.log_recognition(None, "Bench", 0.5, None, 'unknown_face', 40)
+        insert_times.append(time.perf_counter() - start)
+
+    query_times = []
+    for _ in range(200):
+        start = time.perf_counter()
+        db_manager.get_recognition_logs(100)
+        query_times.append(time.perf_counter() - start)
+
+    count = db_manager.execute_query("SELECT COUNT(*) AS count FROM recognition_logs", fetch=True)[0]['count']
+    insert_p50, insert_p95 = percentiles(insert_times)
+    query_p50, query_p95 = percentiles(query_times)
+    print(f"{label:<16} {count:>11} {insert_p50:>10.2f} {insert_p95:>10.2f} {query_p50:>10.2f} {query_p95:>10.2f}")
+
+def seed(db_manager, rows: int):
+    existing = db_manager.execute_query("SELECT COUNT(*) AS count FROM recognition_logs", fetch=True)[0]['count']
+    missing = rows - existing
+    if missing <= 0:
+        return
+
+    start = time.perf_counter()
+    for chunk in synthetic_logs(missing, 10000):
+        # log_id is left to AUTO_INCREMENT
+        db_manager.execute_query("""
+            INSERT INTO recognition_logs
+            (employee_id, recognized_name, confidence_score, image_path,
+             recognition_status, processing_time_ms, timestamp)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, [(None, row[2], row[3], row[4], row[5], row[6], row[7]) for row in chunk], many=True)
+    print(f"✓ Seeded {missing} recognition logs in {time.perf_counter() - start:.1f}s\n")
+
+def bench_db(rows: int):
+    from database.db_manager import DatabaseManager
+
+    db_manager = DatabaseManager()
+    seed(db_manager, rows)
+
+    print(f"{'':<16} {'Rows':>11} {'Ins p50':>10} {'Ins p95':>10} {'Qry p50':>10} {'Qry p95':>10}  (ms)")
+    measure(db_manager, 'before retention')
+
+    archiver = RecognitionLogArchiver(db_manager, archive_path=tempfile.mkdtemp())
+    result = archiver.run()
+    print(f"{'archived':<16} {result['rows']:>11} rows into {result['files']} files "
+          f"({result['bytes'] / 1024 / 1024:.1f} MB) in {result['seconds']:.1f}s")
+
+    measure(db_manager, 'after retention')
+    db_manager.close()
+
+def bench_encoding(rows: int):
+    archiver = RecognitionLogArchiver(None, archive_path=tempfile.mkdtemp())
+    print(f"Archive encoding, {rows} synthetic rows, batch {archiver.batch_size}\n")
+
+    for fmt in ('parquet', 'csv'):
+        archiver.archive_format = fmt
+        written = 0
+        start = time.perf_counter()
+        for chunk in synthetic_logs(rows, archiver.batch_size):
+            written += archiver._write_batch(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"{fmt:<8} {elapsed:>7.2f}s {rows / elapsed:>10.0f} rows/s "
+              f"{written / rows:>6.1f} bytes/row")
+
+def main():
+    rows = 10_000_000 if '--db' in sys.argv else 1_000_000
+    if '--rows' in sys.argv:
+        rows = int(sys.argv[sys.argv.index('--rows') + 1])
+
+    print("\n=== RECOGNITION LOG RETENTION BENCHMARK ===\n")
+    print(f"Retention: {Config.LOG_RETENTION_DAYS} days\n")
+
+    if '--db' in sys.argv:
+        bench_db(rows)
+    else:
+        bench_encoding(rows)
+
+if __name__ == "__main__":
+    main()
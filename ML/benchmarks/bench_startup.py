@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark API startup cost
+Measures `import api.main` with `python -X importtime` and, optionally,
+the time until /api/ready reports the models and gallery as warm
+"""
+
+import sys
+import os
+import subprocess
+import time
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ML_DIR)
+
+def measure_import_time(module: str = 'api.main', top: int = 10):
+    """
+    Run a fresh interpreter with -X importtime and parse its report
+    Returns: (total_ms, [(cumulative_ms, self_ms, module_name), ...])
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ML_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports are indented below their parent; depth 0 is one leading space
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((int(cumulative_us) / 1000, int(self_us) / 1000, name.strip(), depth))
+    
+    # Children are reported before their parent, so collect depth-1 entries
+    # until the depth-0 line for the requested module closes the group
+    total_ms = 0.0
+    direct = []
+    pending = []
+    for cumulative_ms, self_ms, name, depth in entries:
+        if depth == 1:
+            pending.append((cumulative_ms, self_ms, name))
+        elif depth == 0:
+            if name == module:
+                total_ms = cumulative_ms
+                direct = pending
+            pending = []
+    direct.sort(reverse=True)
+    
+    return total_ms, direct[:top]
+
+def measure_time_to_ready(timeout: float = 120.0) -> float:
+    """Start the app in-process and poll /api/ready until it flips"""
+    from fastapi.testclient import TestClient
+    from api.main import app
+    
+    start = time.time()
+    with TestClient(app) as client:
+        while time.time() - start < timeout:
+            response = client.get('/api/ready')
+            if response.status_code == 200:
+                return time.time() - start
+            if response.json().get('error'):
+                raise RuntimeError(response.json()['error'])
+            time.sleep(0.1)
+    
+    raise TimeoutError(f"API not ready after {timeout}s")
+
+def main():
+    print("\n=== API STARTUP BENCHMARK ===\n")
+    
+    total_ms, top = measure_import_time()
+    print(f"import api.main: {total_ms:.1f} ms (-X importtime cumulative)")
+    print("\nSlowest imports made directly by api.main:")
+    for cumulative_ms, self_ms, name in top:
+        print(f"  {cumulative_ms:>9.1f} ms  (self {self_ms:>7.1f} ms)  {name}")
+    
+    print("\nDeferred to startup (not paid at import):")
+    for heavy in ('face_recognition', 'cv2', 'mysql.connector'):
+        heavy_ms, _ = measure_import_time(heavy)
+        print(f"  {heavy_ms:>9.1f} ms  {heavy}")
+    
+    if '--ready' in sys.argv:
+        print("\nMeasuring time to readiness (requires database)...")
+        try:
+            print(f"✓ Ready after {measure_time_to_ready():.2f}s")
+        except Exception as e:
+            print(f"✗ Readiness check failed: {e}")
+    
+    print("\n=== BENCHMARK COMPLETED ===\n")
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'root')
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     DB_NAME = os.getenv('DB_NAME', 'absen_wajah')
+    EMPLOYEE_CACHE_SIZE = int(os.getenv('EMPLOYEE_CACHE_SIZE', 1024))
+    EMPLOYEE_CACHE_TTL = float(os.getenv('EMPLOYEE_CACHE_TTL', 60))
     
     # System Configuration
     RECOGNITION_THRESHOLD = float(os.getenv('RECOGNITION_THRESHOLD', 0.6))
@@ -19,10 +21,114 @@ class Config:
     WORK_END_TIME = os.getenv('WORK_END_TIME', '17:00:00')
     LATE_THRESHOLD_MINUTES = int(os.getenv('LATE_THRESHOLD_MINUTES', 15))
     
+    # Frame Quality Gate (checked before face encoding)
+    QUALITY_MIN_SHARPNESS = float(os.getenv('QUALITY_MIN_SHARPNESS', 40))
+    QUALITY_MIN_BRIGHTNESS = float(os.getenv('QUALITY_MIN_BRIGHTNESS', 40))
+    QUALITY_MAX_BRIGHTNESS = float(os.getenv('QUALITY_MAX_BRIGHTNESS', 220))
+    QUALITY_MIN_FACE_SIZE = int(os.getenv('QUALITY_MIN_FACE_SIZE', 60))
+    QUALITY_DOWNSCALE_WIDTH = int(os.getenv('QUALITY_DOWNSCALE_WIDTH', 320))
+    
+    # Face presence filter for live streams (OpenCV cascade before dlib HOG): none, haar or lbp
+    FACE_PRESENCE_CASCADE = os.getenv('FACE_PRESENCE_CASCADE', 'none')
+    FACE_PRESENCE_CASCADE_PATH = os.getenv('FACE_PRESENCE_CASCADE_PATH', '')  # default: bundled Haar file
+    FACE_PRESENCE_DOWNSCALE_WIDTH = int(os.getenv('FACE_PRESENCE_DOWNSCALE_WIDTH', 320))
+    FACE_PRESENCE_ROI = os.getenv('FACE_PRESENCE_ROI', 'true').lower() == 'true'
+    FACE_PRESENCE_ROI_MARGIN = float(os.getenv('FACE_PRESENCE_ROI_MARGIN', 0.5))
+    
+    # Live streams: detect around last frame's faces, with a full-frame scan every N frames
+    ROI_TRACK_MARGIN = float(os.getenv('ROI_TRACK_MARGIN', 0.5))
+    ROI_FULL_SCAN_INTERVAL = int(os.getenv('ROI_FULL_SCAN_INTERVAL', 10))
+    
+    # Live streams: skip recognition while the scene is static
+    MOTION_GATE_ENABLED = os.getenv('MOTION_GATE_ENABLED', 'true').lower() == 'true'
+    MOTION_THRESHOLD = float(os.getenv('MOTION_THRESHOLD', 0.01))  # fraction of pixels that changed
+    MOTION_PIXEL_DELTA = int(os.getenv('MOTION_PIXEL_DELTA', 20))  # gray-level change that counts
+    MOTION_DOWNSCALE_WIDTH = int(os.getenv('MOTION_DOWNSCALE_WIDTH', 160))
+    MOTION_MAX_SKIP = int(os.getenv('MOTION_MAX_SKIP', 30))  # frames before a forced refresh
+    
+    # Offline processing of recorded video (process-video)
+    VIDEO_FRAME_STRIDE = int(os.getenv('VIDEO_FRAME_STRIDE', 5))  # recognize every Nth frame
+    VIDEO_WORKERS = int(os.getenv('VIDEO_WORKERS', 0))  # 0 = one per CPU core
+    VIDEO_QUEUE_SIZE = int(os.getenv('VIDEO_QUEUE_SIZE', 32))  # decoded frames waiting for a worker
+    VIDEO_MAX_WIDTH = int(os.getenv('VIDEO_MAX_WIDTH', 0))  # downscale wider frames, 0 = keep size
+    VIDEO_DEDUP_SECONDS = float(os.getenv('VIDEO_DEDUP_SECONDS', 60))  # gap that starts a new visit
+    VIDEO_MIN_SIGHTINGS = int(os.getenv('VIDEO_MIN_SIGHTINGS', 2))  # frames needed to confirm a visit
+    
+    # Several cameras sharing one recognizer (multi-camera)
+    MULTI_CAMERA_SOURCES = os.getenv('MULTI_CAMERA_SOURCES', '')  # comma-separated, name=source allowed
+    MULTI_CAMERA_WORKERS = int(os.getenv('MULTI_CAMERA_WORKERS', 0))  # 0 = min(cameras, CPU cores)
+    MULTI_CAMERA_RECONNECT_SECONDS = float(os.getenv('MULTI_CAMERA_RECONNECT_SECONDS', 5))
+    MULTI_CAMERA_STATS_SECONDS = float(os.getenv('MULTI_CAMERA_STATS_SECONDS', 30))
+    MULTI_CAMERA_DEDUP_SECONDS = float(os.getenv('MULTI_CAMERA_DEDUP_SECONDS', 60))  # per employee and camera
+    
+    # Local attendance journal (offline-tolerant check-ins)
+    JOURNAL_ENABLED = os.getenv('JOURNAL_ENABLED', 'false').lower() == 'true'
+    JOURNAL_PATH = os.getenv('JOURNAL_PATH', './data/journal/attendance_journal.db')
+    JOURNAL_REPLAY_INTERVAL = float(os.getenv('JOURNAL_REPLAY_INTERVAL', 2))
+    JOURNAL_REPLAY_BATCH_SIZE = int(os.getenv('JOURNAL_REPLAY_BATCH_SIZE', 200))
+    JOURNAL_RETENTION_DAYS = int(os.getenv('JOURNAL_RETENTION_DAYS', 30))
+    # Failed replays of a single event before it is set aside as 'failed'
+    JOURNAL_MAX_ATTEMPTS = int(os.getenv('JOURNAL_MAX_ATTEMPTS', 10))
+    
+    # Bulk exports
+    EXPORT_PATH = os.getenv('EXPORT_PATH', './data/exports')
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 10000))
+    
+    # Recognition log retention
+    LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', 90))
+    LOG_ARCHIVE_PATH = os.getenv('LOG_ARCHIVE_PATH', './data/archive/recognition_logs')
+    LOG_ARCHIVE_FORMAT = os.getenv('LOG_ARCHIVE_FORMAT', 'parquet')  # parquet or csv
+    LOG_ARCHIVE_BATCH_SIZE = int(os.getenv('LOG_ARCHIVE_BATCH_SIZE', 50000))
+    
+    # Gallery sync across workers
+    GALLERY_SHARED_MEMORY = os.getenv('GALLERY_SHARED_MEMORY', 'true').lower() == 'true'
+    GALLERY_SHM_NAME = os.getenv('GALLERY_SHM_NAME', 'absen_gallery')
+    # Private directory (0700) for the lock serializing gallery loads across workers
+    GALLERY_LOCK_DIR = os.getenv('GALLERY_LOCK_DIR', './data/locks')
+    GALLERY_POLL_SECONDS = float(os.getenv('GALLERY_POLL_SECONDS', 5))
+    # Compact gallery copy for shortlisting: none, float16 or int8
+    GALLERY_QUANTIZATION = os.getenv('GALLERY_QUANTIZATION', 'none')
+    # Shortlist size re-ranked with exact distances when quantization is on
+    GALLERY_RERANK_K = int(os.getenv('GALLERY_RERANK_K', 20))
+    # Match against per-employee centroids first, then the members of the closest
+    # employees (exact; for very large galleries; replaces GALLERY_QUANTIZATION)
+    GALLERY_CENTROID_PREFILTER = os.getenv('GALLERY_CENTROID_PREFILTER', 'false').lower() == 'true'
+    GALLERY_CENTROID_TOP_K = int(os.getenv('GALLERY_CENTROID_TOP_K', 10))
+    
+    # API
+    HEALTH_CACHE_SECONDS = float(os.getenv('HEALTH_CACHE_SECONDS', 5))
+    # Startup retries (database down, model load failure), doubling up to the max
+    API_INIT_RETRY_SECONDS = float(os.getenv('API_INIT_RETRY_SECONDS', 2))
+    API_INIT_RETRY_MAX_SECONDS = float(os.getenv('API_INIT_RETRY_MAX_SECONDS', 60))
+    WS_MAX_FRAME_BYTES = int(os.getenv('WS_MAX_FRAME_BYTES', 2 * 1024 * 1024))
+    
+    # Profiling (opt-in)
+    PROFILE_TIMINGS = os.getenv('PROFILE_TIMINGS', 'false').lower() == 'true'  # read at startup
+    PROFILE_ENDPOINT_ENABLED = os.getenv('PROFILE_ENDPOINT_ENABLED', 'false').lower() == 'true'
+    PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 60))
+    PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+    PROFILE_PATH = os.getenv('PROFILE_PATH', './data/profiles')
+    
     # Image Storage
     IMAGE_BASE_PATH = os.getenv('IMAGE_BASE_PATH', './data/images')
     EMPLOYEE_IMAGES_PATH = os.path.join(IMAGE_BASE_PATH, 'employees')
     ATTENDANCE_IMAGES_PATH = os.path.join(IMAGE_BASE_PATH, 'attendance')
+    IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', 95))
+    # Thumbnail sizes (longest side, px) served by /api/images
+    IMAGE_VARIANT_SIZES = [int(size) for size in os.getenv('IMAGE_VARIANT_SIZES', '128,320,640').split(',')]
+    IMAGE_VARIANT_JPEG_QUALITY = int(os.getenv('IMAGE_VARIANT_JPEG_QUALITY', 80))
+    IMAGE_EAGER_VARIANTS = os.getenv('IMAGE_EAGER_VARIANTS', 'true').lower() == 'true'
+    IMAGE_CACHE_MAX_AGE = int(os.getenv('IMAGE_CACHE_MAX_AGE', 7 * 24 * 3600))
+    
+    # Evidence image archival (recompression of old check-in/out photos)
+    EVIDENCE_ARCHIVE_DAYS = int(os.getenv('EVIDENCE_ARCHIVE_DAYS', 30))
+    EVIDENCE_ARCHIVE_FORMAT = os.getenv('EVIDENCE_ARCHIVE_FORMAT', 'webp')  # webp or jpg
+    EVIDENCE_ARCHIVE_QUALITY = int(os.getenv('EVIDENCE_ARCHIVE_QUALITY', 60))
+    EVIDENCE_ARCHIVE_MAX_DIMENSION = int(os.getenv('EVIDENCE_ARCHIVE_MAX_DIMENSION', 960))
+    EVIDENCE_ARCHIVE_WORKERS = int(os.getenv('EVIDENCE_ARCHIVE_WORKERS', 2))
+    EVIDENCE_ARCHIVE_BATCH_SIZE = int(os.getenv('EVIDENCE_ARCHIVE_BATCH_SIZE', 200))
+    EVIDENCE_ARCHIVE_RATE = float(os.getenv('EVIDENCE_ARCHIVE_RATE', 20))  # images/s, 0 = unlimited
+    EVIDENCE_ARCHIVE_HOURS = os.getenv('EVIDENCE_ARCHIVE_HOURS', '')  # e.g. 20-6; empty = any time
     
     @classmethod
     def get_db_config(cls):
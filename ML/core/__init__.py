@@ -1,5 +1,8 @@
 from .camera import CameraInterface
 from .enrollment import FaceEnrollment
 from .attendance import AttendanceManager
+from .video_batch import VideoBatchProcessor
+from .multi_camera import CameraStream, MultiCameraOrchestrator
 
-__all__ = ['CameraInterface', 'FaceEnrollment', 'AttendanceManager']
+__all__ = ['CameraInterface', 'FaceEnrollment', 'AttendanceManager', 'VideoBatchProcessor',
+           'CameraStream', 'MultiCameraOrchestrator']
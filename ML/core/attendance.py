@@ -1,7 +1,8 @@
 import cv2
 import os
 from datetime import datetime, date
-from typing import Optional
+from typing import Optional, Dict
+import itertools
 import time
 import sys
 
@@ -9,18 +10,22 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import Config
 from database.db_manager import DatabaseManager
+from database.journal import AttendanceJournal
 from models.face_recognizer import FaceRecognizer
+from models.roi_tracker import FaceRegionTracker
+from models.motion_gate import MotionGate
 from core.camera import CameraInterface
+from utils.image_store import ImageStore
+from utils.profiling import timed
 
 class AttendanceManager:
-    def __init__(self, db_manager: DatabaseManager, face_recognizer: FaceRecognizer):
+    def __init__(self, db_manager: DatabaseManager, face_recognizer: FaceRecognizer,
+                 image_store: ImageStore = None):
         self.db_manager = db_manager
         self.face_recognizer = face_recognizer
+        self.image_store = image_store or ImageStore()
         self.camera = CameraInterface()
         
-        # Ensure directories exist
-        os.makedirs(Config.ATTENDANCE_IMAGES_PATH, exist_ok=True)
-        
         print("✓ Attendance Manager initialized")
     
     def check_in_employee(self) -> bool:
@@ -68,16 +73,9 @@ class AttendanceManager:
         print(f"\n✓ Recognized: {employee_info['full_name']}")
         print(f"  Confidence: {confidence:.2f}")
         
-        # Save attendance image
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        image_filename = f"checkin_{employee_info['employee_code']}_{timestamp}.jpg"
-        image_path = os.path.join(Config.ATTENDANCE_IMAGES_PATH, image_filename)
-        
         # Draw result on frame before saving
         annotated_frame = self.face_recognizer.draw_results(frame, results)
-        cv2.imwrite(image_path, annotated_frame)
-        
-        relative_path = os.path.join('attendance', image_filename)
+        relative_path = self.image_store.save_image(annotated_frame, 'attendance')
         
         # Record check-in
         try:
@@ -143,14 +141,8 @@ class AttendanceManager:
         print(f"  Confidence: {confidence:.2f}")
         
         # Save attendance image
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        image_filename = f"checkout_{employee_info['employee_code']}_{timestamp}.jpg"
-        image_path = os.path.join(Config.ATTENDANCE_IMAGES_PATH, image_filename)
-        
         annotated_frame = self.face_recognizer.draw_results(frame, results)
-        cv2.imwrite(image_path, annotated_frame)
-        
-        relative_path = os.path.join('attendance', image_filename)
+        relative_path = self.image_store.save_image(annotated_frame, 'attendance')
         
         # Record check-out
         try:
@@ -184,14 +176,24 @@ class AttendanceManager:
         if not self.camera.start():
             return
         
+        # Detection follows the faces from frame to frame instead of scanning every frame in full
+        tracker = FaceRegionTracker()
+        # A static scene reuses the last results instead of running recognition again
+        motion_gate = MotionGate() if Config.MOTION_GATE_ENABLED else None
+        results = []
+        cpu_mark, wall_mark = time.process_time(), time.perf_counter()
+        
         try:
             while True:
                 frame = self.camera.read_frame()
                 if frame is None:
                     break
                 
-                # Process frame
-                results = self.face_recognizer.process_frame(frame)
+                processed = motion_gate is None or motion_gate.should_process(frame)
+                if processed:
+                    # Process frame (frames without a face skip detection, low quality faces skip encoding)
+                    results = self.face_recognizer.process_frame(frame, quality_gate=True, presence_check=True,
+                                                                 tracker=tracker)
                 
                 # Draw results
                 display_frame = self.face_recognizer.draw_results(frame, results)
@@ -204,6 +206,12 @@ class AttendanceManager:
                 
                 key = cv2.waitKey(1) & 0xFF
                 
+                if motion_gate is not None:
+                    # One iteration runs from frame read to frame read, so camera waits count as idle time
+                    cpu_now, wall_now = time.process_time(), time.perf_counter()
+                    motion_gate.record(processed, cpu_now - cpu_mark, wall_now - wall_mark)
+                    cpu_mark, wall_mark = cpu_now, wall_now
+                
                 if key == ord('q'):
                     break
                 elif key == ord('i'):
@@ -213,12 +221,7 @@ class AttendanceManager:
                         confidence = results[0]['confidence']
                         
                         # Save image and check-in
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        image_filename = f"checkin_{employee_info['employee_code']}_{timestamp}.jpg"
-                        image_path = os.path.join(Config.ATTENDANCE_IMAGES_PATH, image_filename)
-                        cv2.imwrite(image_path, display_frame)
-                        
-                        relative_path = os.path.join('attendance', image_filename)
+                        relative_path = self.image_store.save_image(display_frame, 'attendance')
                         success, message = self.db_manager.check_in(
                             employee_info['employee_id'], confidence, relative_path
                         )
@@ -233,12 +236,7 @@ class AttendanceManager:
                         confidence = results[0]['confidence']
                         
                         # Save image and check-out
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        image_filename = f"checkout_{employee_info['employee_code']}_{timestamp}.jpg"
-                        image_path = os.path.join(Config.ATTENDANCE_IMAGES_PATH, image_filename)
-                        cv2.imwrite(image_path, display_frame)
-                        
-                        relative_path = os.path.join('attendance', image_filename)
+                        relative_path = self.image_store.save_image(display_frame, 'attendance')
                         success, message = self.db_manager.check_out(
                             employee_info['employee_id'], confidence, relative_path
                         )
@@ -249,13 +247,21 @@ class AttendanceManager:
         finally:
             self.camera.stop()
             print("\nLive recognition stopped")
+            self._print_quality_stats()
+            self._print_presence_stats()
+            self._print_tracker_stats(tracker)
+            self._print_motion_stats(motion_gate)
     
     def view_attendance_today(self):
         """View today's attendance records"""
         today = date.today()
-        records = self.db_manager.get_attendance_records(start_date=today, end_date=today)
+        records = self.db_manager.iter_attendance_records(
+            fields=['employee_code', 'full_name', 'check_in_time', 'check_out_time', 'status'],
+            start_date=today, end_date=today
+        )
         
-        if not records:
+        first = next(records, None)
+        if first is None:
             print(f"\nNo attendance records for {today}")
             return
         
@@ -265,7 +271,7 @@ class AttendanceManager:
         print(f"{'Code':<15} {'Name':<25} {'Check-in':<20} {'Check-out':<20} {'Status':<10}")
         print(f"{'='*100}")
         
-        for record in records:
+        for record in itertools.chain([first], records):
             check_in = record['check_in_time'].strftime('%H:%M:%S') if record['check_in_time'] else '-'
             check_out = record['check_out_time'].strftime('%H:%M:%S') if record['check_out_time'] else '-'
             
@@ -274,6 +280,48 @@ class AttendanceManager:
         
         print(f"{'='*100}\n")
     
+    def _print_quality_stats(self):
+        """Print how much encoding work the quality gate saved"""
+        stats = self.face_recognizer.quality_gate.get_stats()
+        if stats['faces_checked'] == 0:
+            return
+        
+        print(f"Quality gate: {stats['faces_rejected']}/{stats['faces_checked']} faces rejected "
+              f"before encoding (~{stats['encode_ms_saved']:.0f} ms saved)")
+        for reason, count in stats['rejections_by_reason'].items():
+            print(f"  {reason}: {count}")
+    
+    def _print_motion_stats(self, motion_gate: Optional[MotionGate]):
+        """Print how many frames the motion gate skipped and the CPU cost of idle and busy frames"""
+        if motion_gate is None:
+            return
+        stats = motion_gate.get_stats()
+        if stats['frames'] == 0:
+            return
+        
+        print(f"Motion gate: {stats['frames_skipped']}/{stats['frames']} static frames skipped, "
+              f"CPU idle {stats['idle_cpu_percent']}% / busy {stats['busy_cpu_percent']}% "
+              f"/ overall {stats['overall_cpu_percent']}% of one core")
+    
+    def _print_tracker_stats(self, tracker: FaceRegionTracker):
+        """Print how often detection could stay inside the tracked regions"""
+        stats = tracker.get_stats()
+        if stats['frames'] == 0:
+            return
+        
+        print(f"ROI tracking: {stats['roi_frames']}/{stats['frames']} frames detected around previous faces, "
+              f"{stats['full_scans']} full scans ({stats['misses']} after a miss)")
+    
+    def _print_presence_stats(self):
+        """Print how many frames the presence filter kept away from dlib"""
+        stats = self.face_recognizer.presence_filter.get_stats()
+        if stats['frames_checked'] == 0:
+            return
+        
+        print(f"Presence filter ({stats['cascade']}): {stats['frames_skipped']}/{stats['frames_checked']} "
+              f"frames skipped before detection, {stats['false_candidates']} false candidates, "
+              f"{stats['avg_check_ms']} ms per check")
+    
     def _log_recognition(self, employee_id: Optional[int], name: str, confidence: float,
                         image_path: Optional[str], status: str, processing_time: int):
         """Log recognition attempt"""
@@ -293,12 +341,27 @@ class AttendanceSystem:
     """
     Simplified attendance system for API use
     Processes images from file paths instead of camera
+    With a journal, events are committed locally first and replayed to MySQL
+    in the background instead of being written to MySQL synchronously
     """
-    def __init__(self, db_manager: DatabaseManager, face_recognizer: FaceRecognizer):
+    def __init__(self, db_manager: DatabaseManager, face_recognizer: FaceRecognizer,
+                 journal: AttendanceJournal = None, image_store: ImageStore = None):
         self.db_manager = db_manager
         self.face_recognizer = face_recognizer
-        os.makedirs(Config.ATTENDANCE_IMAGES_PATH, exist_ok=True)
+        self.journal = journal
+        self.image_store = image_store or ImageStore()
+    
+    def _record_check_in(self, employee_id: int, confidence: float, image_path: str):
+        if self.journal is not None:
+            return self.journal.record_check_in(employee_id, confidence, image_path)
+        return self.db_manager.check_in(employee_id, confidence, image_path)
     
+    def _record_check_out(self, employee_id: int, confidence: float, image_path: str):
+        if self.journal is not None:
+            return self.journal.record_check_out(employee_id, confidence, image_path)
+        return self.db_manager.check_out(employee_id, confidence, image_path)
+    
+    @timed
     def check_in_from_image(self, image_path: str):
         """
         Check-in from uploaded image file
@@ -311,7 +374,7 @@ class AttendanceSystem:
                 return False, None, "Failed to load image"
             
             # Process and recognize
-            results = self.face_recognizer.process_frame(frame)
+            results = self.face_recognizer.process_frame(frame, quality_gate=True)
             
             if len(results) == 0:
                 return False, None, "No face detected in image"
@@ -321,6 +384,9 @@ class AttendanceSystem:
             
             result = results[0]
             
+            if result.get('quality_issue'):
+                return False, None, f"Image quality too low ({result['quality_issue']}). Please retake the photo"
+            
             if not result['recognized']:
                 return False, None, f"Face not recognized (confidence: {result['confidence']:.2f})"
             
@@ -328,17 +394,11 @@ class AttendanceSystem:
             confidence = result['confidence']
             
             # Save attendance image
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            image_filename = f"checkin_{employee_info['employee_code']}_{timestamp}.jpg"
-            save_path = os.path.join(Config.ATTENDANCE_IMAGES_PATH, image_filename)
-            
             annotated_frame = self.face_recognizer.draw_results(frame, results)
-            cv2.imwrite(save_path, annotated_frame)
-            
-            relative_path = os.path.join('attendance', image_filename)
+            relative_path = self.image_store.save_image(annotated_frame, 'attendance')
             
             # Record check-in
-            success, message = self.db_manager.check_in(
+            success, message = self._record_check_in(
                 employee_info['employee_id'], confidence, relative_path
             )
             
@@ -350,6 +410,7 @@ class AttendanceSystem:
         except Exception as e:
             return False, None, f"Error processing check-in: {str(e)}"
     
+    @timed
     def check_out_from_image(self, image_path: str):
         """
         Check-out from uploaded image file
@@ -362,7 +423,7 @@ class AttendanceSystem:
                 return False, None, "Failed to load image"
             
             # Process and recognize
-            results = self.face_recognizer.process_frame(frame)
+            results = self.face_recognizer.process_frame(frame, quality_gate=True)
             
             if len(results) == 0:
                 return False, None, "No face detected in image"
@@ -372,6 +433,9 @@ class AttendanceSystem:
             
             result = results[0]
             
+            if result.get('quality_issue'):
+                return False, None, f"Image quality too low ({result['quality_issue']}). Please retake the photo"
+            
             if not result['recognized']:
                 return False, None, f"Face not recognized (confidence: {result['confidence']:.2f})"
             
@@ -379,24 +443,94 @@ class AttendanceSystem:
             confidence = result['confidence']
             
             # Save attendance image
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            image_filename = f"checkout_{employee_info['employee_code']}_{timestamp}.jpg"
-            save_path = os.path.join(Config.ATTENDANCE_IMAGES_PATH, image_filename)
-            
             annotated_frame = self.face_recognizer.draw_results(frame, results)
-            cv2.imwrite(save_path, annotated_frame)
-            
-            relative_path = os.path.join('attendance', image_filename)
+            relative_path = self.image_store.save_image(annotated_frame, 'attendance')
             
             # Record check-out
-            success, message = self.db_manager.check_out(
+            success, message = self._record_check_out(
                 employee_info['employee_id'], confidence, relative_path
             )
             
             if success:
+                if self.journal is not None:
+                    # Journaled check-outs may still be pending verification
+                    return True, employee_info, f"{message}: {employee_info['full_name']}"
                 return True, employee_info, f"Check-out successful: {employee_info['full_name']}"
             else:
                 return False, employee_info, message
                 
         except Exception as e:
             return False, None, f"Error processing check-out: {str(e)}"
+    
+    @timed
+    def group_check_in_from_image(self, image_path: str) -> Dict:
+        """
+        Check in every recognized face in a multi-face frame
+        All check-ins are committed in one DB transaction and one annotated
+        evidence image is saved for the whole frame
+        Returns: dict with overall success, per-face outcomes and throughput
+        """
+        start_time = time.time()
+        
+        try:
+            frame = cv2.imread(image_path)
+            if frame is None:
+                return {'success': False, 'message': "Failed to load image", 'faces': []}
+            
+            results = self.face_recognizer.process_frame(frame, quality_gate=True)
+            
+            if len(results) == 0:
+                return {'success': False, 'message': "No face detected in image", 'faces': []}
+            
+            faces = self.face_recognizer.serialize_results(results)
+            
+            # Keep the most confident face per employee; extra sightings are duplicates
+            best_face = {}
+            for idx, result in enumerate(results):
+                if not result['recognized']:
+                    continue
+                employee_id = result['employee_info']['employee_id']
+                current = best_face.get(employee_id)
+                if current is None or result['confidence'] > results[current]['confidence']:
+                    best_face[employee_id] = idx
+            
+            for idx, face in enumerate(faces):
+                if face['quality_issue']:
+                    face['outcome'], face['message'] = 'low_quality', f"Image quality too low ({face['quality_issue']})"
+                elif not face['recognized']:
+                    face['outcome'], face['message'] = 'unknown', "Face not recognized"
+                elif best_face[face['employee']['employee_id']] != idx:
+                    face['outcome'], face['message'] = 'duplicate', "Same employee detected more than once"
+            
+            outcomes = {}
+            if best_face:
+                # One evidence image for the whole frame
+                annotated_frame = self.face_recognizer.draw_results(frame, results)
+                relative_path = self.image_store.save_image(annotated_frame, 'attendance')
+                
+                check_ins = [(employee_id, float(results[idx]['confidence']))
+                             for employee_id, idx in best_face.items()]
+                if self.journal is not None:
+                    outcomes = self.journal.record_check_ins(check_ins, relative_path)
+                else:
+                    outcomes = self.db_manager.check_in_many(check_ins, relative_path)
+            
+            for employee_id, idx in best_face.items():
+                success, message = outcomes[employee_id]
+                faces[idx]['outcome'] = 'checked_in' if success else 'rejected'
+                faces[idx]['message'] = message
+            
+            checked_in = sum(1 for face in faces if face['outcome'] == 'checked_in')
+            elapsed = time.time() - start_time
+            
+            return {
+                'success': checked_in > 0,
+                'message': f"{checked_in} of {len(faces)} detected face(s) checked in",
+                'faces': faces,
+                'checked_in': checked_in,
+                'elapsed_ms': round(elapsed * 1000, 1),
+                'people_per_second': round(checked_in / elapsed, 2) if elapsed > 0 else 0.0
+            }
+            
+        except Exception as e:
+            return {'success': False, 'message': f"Error processing group check-in: {str(e)}", 'faces': []}
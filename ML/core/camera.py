@@ -1,13 +1,28 @@
 import cv2
 import numpy as np
-from typing import Optional
+from typing import Optional, Union
 import time
+import os
 
 class CameraInterface:
-    def __init__(self, camera_index: int = 0):
+    def __init__(self, camera_index: Union[int, str] = 0):
+        """
+        camera_index: local device index, or a stream URL (rtsp://, http://)
+        or video file path; numeric strings are treated as device indexes
+        """
+        if isinstance(camera_index, str) and camera_index.isdigit():
+            camera_index = int(camera_index)
         self.camera_index = camera_index
         self.capture = None
-        print(f"✓ Camera Interface initialized (index: {camera_index})")
+        print(f"✓ Camera Interface initialized (source: {camera_index})")
+    
+    @property
+    def is_device(self) -> bool:
+        return isinstance(self.camera_index, int)
+    
+    @property
+    def is_file(self) -> bool:
+        return not self.is_device and os.path.isfile(self.camera_index)
     
     def start(self) -> bool:
         """Start camera capture"""
@@ -15,12 +30,16 @@ class CameraInterface:
         
         if not self.capture.isOpened():
             print(f"✗ Cannot open camera {self.camera_index}")
+            # Leave no half-open capture behind, so callers see the camera as not started
+            self.capture.release()
+            self.capture = None
             return False
         
-        # Set camera properties for better performance
-        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.capture.set(cv2.CAP_PROP_FPS, 30)
+        if self.is_device:
+            # Set camera properties for better performance
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            self.capture.set(cv2.CAP_PROP_FPS, 30)
         
         print("✓ Camera started")
         return True
@@ -133,10 +152,16 @@ class CameraInterface:
                 cv2.destroyWindow(window_name)
                 return frame
     
+    def release(self):
+        """Release the capture without touching preview windows (safe from capture threads)"""
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+    
     def stop(self):
         """Stop camera capture and release resources"""
         if self.capture is not None:
-            self.capture.release()
+            self.release()
             cv2.destroyAllWindows()
             print("✓ Camera stopped")
     
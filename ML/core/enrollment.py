@@ -1,6 +1,5 @@
 import cv2
 import os
-from datetime import datetime
 from typing import Optional, List
 import sys
 
@@ -10,16 +9,23 @@ from config.config import Config
 from database.db_manager import DatabaseManager
 from models.face_recognizer import FaceRecognizer
 from core.camera import CameraInterface
+from utils.image_store import ImageStore
+
+def _reload_gallery(face_recognizer: FaceRecognizer):
+    """Reload the gallery after a committed change; a failure only delays recognizing it"""
+    try:
+        face_recognizer.load_encodings_from_db()
+    except Exception as e:
+        print(f"Warning: Gallery reload failed, it will be picked up on the next refresh: {e}")
 
 class FaceEnrollment:
-    def __init__(self, db_manager: DatabaseManager, face_recognizer: FaceRecognizer):
+    def __init__(self, db_manager: DatabaseManager, face_recognizer: FaceRecognizer,
+                 image_store: ImageStore = None):
         self.db_manager = db_manager
         self.face_recognizer = face_recognizer
+        self.image_store = image_store or ImageStore()
         self.camera = CameraInterface()
         
-        # Ensure directories exist
-        os.makedirs(Config.EMPLOYEE_IMAGES_PATH, exist_ok=True)
-        
         print("✓ Face Enrollment module initialized")
     
     def enroll_employee(self, employee_code: str, full_name: str, 
@@ -40,22 +46,9 @@ class FaceEnrollment:
             print(f"✗ Employee with code {employee_code} already exists!")
             return False
         
-        # Add employee to database
-        try:
-            employee_id = self.db_manager.add_employee(
-                employee_code, full_name, email, phone, department, position
-            )
-            print(f"✓ Employee added to database (ID: {employee_id})")
-        except Exception as e:
-            print(f"✗ Failed to add employee: {e}")
-            return False
-        
-        # Create employee image directory
-        employee_dir = os.path.join(Config.EMPLOYEE_IMAGES_PATH, employee_code)
-        os.makedirs(employee_dir, exist_ok=True)
-        
-        # Capture and process photos
-        encodings_saved = 0
+        # Capture and process photos; nothing is written to the database until all are taken
+        encodings = []
+        saved_paths = []
         
         for i in range(num_photos):
             print(f"\n--- Capturing photo {i+1}/{num_photos} ---")
@@ -87,46 +80,44 @@ class FaceEnrollment:
                 quality_score = 0.5
             
             # Save image
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            image_filename = f"{employee_code}_{timestamp}_{i+1}.jpg"
-            image_path = os.path.join(employee_dir, image_filename)
-            cv2.imwrite(image_path, frame)
-            print(f"✓ Image saved: {image_filename}")
+            relative_path, created = self.image_store.add_image(frame, 'employees')
+            if created:
+                saved_paths.append(relative_path)
+            print(f"✓ Image saved: {relative_path}")
             
-            # Save encoding to database
-            try:
-                relative_path = os.path.join('employees', employee_code, image_filename)
-                encoding_id = self.db_manager.save_face_encoding(
-                    employee_id, face_encoding, relative_path, quality_score, 
-                    is_primary=(i == 0)  # First photo is primary
-                )
-                print(f"✓ Face encoding saved (ID: {encoding_id})")
-                encodings_saved += 1
-            except Exception as e:
-                print(f"✗ Failed to save encoding: {e}")
+            # First photo is primary
+            encodings.append((face_encoding, relative_path, quality_score, not encodings))
         
         # Check if enrollment successful
-        if encodings_saved > 0:
-            print(f"\n{'='*50}")
-            print(f"✓ ENROLLMENT SUCCESSFUL!")
-            print(f"  Employee: {full_name}")
-            print(f"  Photos captured: {encodings_saved}/{num_photos}")
-            print(f"{'='*50}\n")
-            
-            # Reload encodings
-            self.face_recognizer.load_encodings_from_db()
-            
-            return True
-        else:
+        if not encodings:
             print(f"\n{'='*50}")
             print(f"✗ ENROLLMENT FAILED!")
             print(f"  No valid face encodings captured")
             print(f"{'='*50}\n")
-            
-            # Remove employee from database
-            self.db_manager.update_employee_status(employee_id, 'inactive')
-            
             return False
+        
+        # Employee and encodings are stored in one transaction
+        try:
+            employee_id = self.db_manager.enroll_employee(
+                employee_code, full_name, encodings, email, phone, department, position
+            )
+            print(f"✓ Employee added to database (ID: {employee_id})")
+        except Exception as e:
+            print(f"✗ Failed to add employee: {e}")
+            for path in saved_paths:
+                self.image_store.remove(path)
+            return False
+        
+        print(f"\n{'='*50}")
+        print(f"✓ ENROLLMENT SUCCESSFUL!")
+        print(f"  Employee: {full_name}")
+        print(f"  Photos captured: {len(encodings)}/{num_photos}")
+        print(f"{'='*50}\n")
+        
+        # Reload encodings
+        _reload_gallery(self.face_recognizer)
+        
+        return True
     
     def add_face_photo(self, employee_code: str) -> bool:
         """
@@ -171,29 +162,22 @@ class FaceEnrollment:
             quality_score = self.face_recognizer.calculate_image_quality(frame, face_location)
         
         # Save image
-        employee_dir = os.path.join(Config.EMPLOYEE_IMAGES_PATH, employee_code)
-        os.makedirs(employee_dir, exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        image_filename = f"{employee_code}_{timestamp}_add.jpg"
-        image_path = os.path.join(employee_dir, image_filename)
-        cv2.imwrite(image_path, frame)
+        relative_path = self.image_store.save_image(frame, 'employees')
         
         # Save encoding
         try:
-            relative_path = os.path.join('employees', employee_code, image_filename)
             encoding_id = self.db_manager.save_face_encoding(
                 employee_id, face_encoding, relative_path, quality_score
             )
             print(f"✓ Face photo added successfully (ID: {encoding_id})")
-            
-            # Reload encodings
-            self.face_recognizer.load_encodings_from_db()
-            
-            return True
         except Exception as e:
             print(f"✗ Failed to save encoding: {e}")
             return False
+        
+        # Reload encodings
+        _reload_gallery(self.face_recognizer)
+        
+        return True
     
     def list_employees(self):
         """List all enrolled employees"""
@@ -207,8 +191,9 @@ class FaceEnrollment:
         print(f"{'Code':<15} {'Name':<25} {'Department':<20} {'Photos':<10}")
         print(f"{'='*70}")
         
+        counts = self.db_manager.get_encoding_counts()
         for emp in employees:
-            count = self.db_manager.get_encoding_count(emp['employee_id'])
+            count = counts.get(emp['employee_id'], 0)
             print(f"{emp['employee_code']:<15} {emp['full_name']:<25} "
                   f"{emp['department'] or '-':<20} {count:<10}")
         
@@ -224,13 +209,13 @@ class EnrollmentSystem:
     Simplified enrollment system for API use
     Processes images from file paths instead of camera
     """
-    def __init__(self, db_manager: DatabaseManager, face_recognizer: FaceRecognizer):
+    def __init__(self, db_manager: DatabaseManager, face_recognizer: FaceRecognizer,
+                 image_store: ImageStore = None):
         self.db_manager = db_manager
         self.face_recognizer = face_recognizer
         # Use absolute path relative to ML directory
         self.base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.employee_images_path = os.path.join(self.base_path, 'data', 'images', 'employees')
-        os.makedirs(self.employee_images_path, exist_ok=True)
+        self.image_store = image_store or ImageStore(os.path.join(self.base_path, 'data', 'images'))
     
     def enroll_from_images(self, employee_code: str, full_name: str, 
                           image_paths: List[str],
@@ -240,23 +225,15 @@ class EnrollmentSystem:
         Enroll employee from uploaded image files
         Returns: (success: bool, employee_id: int, message: str)
         """
+        saved_paths = []
         try:
             # Check if employee already exists
             existing = self.db_manager.get_employee(employee_code=employee_code)
             if existing:
                 return False, None, f"Employee with code {employee_code} already exists"
             
-            # Add employee to database
-            employee_id = self.db_manager.add_employee(
-                employee_code, full_name, email, phone, department, position
-            )
-            
-            # Create employee directory
-            employee_dir = os.path.join(self.employee_images_path, employee_code)
-            os.makedirs(employee_dir, exist_ok=True)
-            
             # Process each image
-            success_count = 0
+            encodings = []
             for idx, image_path in enumerate(image_paths):
                 frame = cv2.imread(image_path)
                 if frame is None:
@@ -274,35 +251,30 @@ class EnrollmentSystem:
                     _, face_location = face_locations[0]
                     quality_score = self.face_recognizer.calculate_image_quality(frame, face_location)
                 
-                # Save image with absolute path
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                image_filename = f"{employee_code}_{timestamp}_{idx}.jpg"
-                save_path = os.path.join(employee_dir, image_filename)
-                cv2.imwrite(save_path, frame)
-                print(f"✓ Saved image: {save_path}")  # Debug log
+                # Save image; a photo identical to one already stored is not written again
+                relative_path, created = self.image_store.add_image(frame, 'employees')
+                if created:
+                    saved_paths.append(relative_path)
+                print(f"✓ Saved image: {relative_path}")  # Debug log
                 
-                # Save encoding with relative path for database
-                relative_path = os.path.join('employees', employee_code, image_filename)
-                is_primary = (idx == 0)
-                self.db_manager.save_face_encoding(
-                    employee_id, face_encoding, relative_path, quality_score, is_primary
-                )
-                success_count += 1
+                # Encoding is stored with the relative path; first valid photo is primary
+                encodings.append((face_encoding, relative_path, quality_score, not encodings))
             
-            if success_count == 0:
-                # Rollback - delete employee if no photos saved
-                self.db_manager.connect()
-                self.db_manager.cursor.execute(
-                    "DELETE FROM employees WHERE employee_id = %s", (employee_id,)
-                )
-                self.db_manager.connection.commit()
-                self.db_manager.close()
+            if not encodings:
+                # Nothing was written to the database, so there is nothing to roll back
                 return False, None, "No valid faces detected in uploaded images"
             
-            # Reload encodings
-            self.face_recognizer.load_encodings_from_db()
-            
-            return True, employee_id, f"Employee enrolled successfully with {success_count} photos"
-            
+            # Employee and all encodings commit together or not at all
+            employee_id = self.db_manager.enroll_employee(
+                employee_code, full_name, encodings, email, phone, department, position
+            )
         except Exception as e:
+            # Nothing was committed (the transaction rolled back); drop the images saved for it
+            for path in saved_paths:
+                self.image_store.remove(path)
             return False, None, f"Enrollment failed: {str(e)}"
+        
+        # The enrollment is committed; its images stay even if the reload fails
+        _reload_gallery(self.face_recognizer)
+        
+        return True, employee_id, f"Employee enrolled successfully with {len(encodings)} photos"
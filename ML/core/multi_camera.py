@@ -0,0 +1,292 @@
+import cv2
+import numpy as np
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from models.face_recognizer import FaceRecognizer
+from models.motion_gate import MotionGate
+from models.roi_tracker import FaceRegionTracker
+from core.camera import CameraInterface
+
+class CameraStream:
+    """
+    One source of a MultiCameraOrchestrator
+    A capture thread reads continuously and keeps only the newest frame, so
+    when recognition falls behind, stale frames are dropped instead of
+    queueing up. Video files are read at their own frame rate, like a camera.
+    Local devices and stream URLs are reopened after a read failure.
+
+    The tracker and motion gate are per-stream state. The orchestrator keeps
+    at most one frame of a stream in flight, so they see frames in order.
+    """
+    LATENCY_WINDOW = 200
+
+    def __init__(self, name: str, source: Union[int, str], motion_gate: bool = None,
+                 reconnect_seconds: float = None):
+        self.name = name
+        self.camera = CameraInterface(source)
+        self.tracker = FaceRegionTracker()
+        use_gate = motion_gate if motion_gate is not None else Config.MOTION_GATE_ENABLED
+        self.motion_gate = MotionGate() if use_gate else None
+        self.reconnect_seconds = reconnect_seconds if reconnect_seconds is not None else Config.MULTI_CAMERA_RECONNECT_SECONDS
+        self.results = []
+        self.busy = False
+        self.finished = False
+        self._frame = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._notify = None
+        self.reset_stats()
+
+    def start(self, notify: Callable[[], None] = None):
+        """Start the capture thread; notify is called whenever a new frame is ready"""
+        self._notify = notify
+        self._thread = threading.Thread(target=self._capture_loop, name=f"capture-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _capture_loop(self):
+        interval = None
+        next_frame = 0.0
+        try:
+            while not self._stop.is_set():
+                if self.camera.capture is None:
+                    if not self.camera.start():
+                        if self.camera.is_file:
+                            break
+                        self.reconnects += 1
+                        self._stop.wait(self.reconnect_seconds)
+                        continue
+                    if self.camera.is_file:
+                        interval = 1.0 / (self.camera.capture.get(cv2.CAP_PROP_FPS) or 25.0)
+                        next_frame = time.perf_counter()
+
+                frame = self.camera.read_frame()
+                if frame is None:
+                    self.camera.release()
+                    if self.camera.is_file:
+                        break
+                    self.reconnects += 1
+                    self._stop.wait(self.reconnect_seconds)
+                    continue
+
+                with self._lock:
+                    if self._frame is not None:
+                        self.frames_dropped += 1
+                    self._frame = (frame, time.perf_counter())
+                    self.frames_captured += 1
+                if self._notify is not None:
+                    self._notify()
+
+                if interval:
+                    next_frame += interval
+                    delay = next_frame - time.perf_counter()
+                    if delay > 0:
+                        self._stop.wait(delay)
+        finally:
+            self.camera.release()
+            self.finished = True
+            if self._notify is not None:
+                self._notify()
+
+    def has_frame(self) -> bool:
+        return self._frame is not None
+
+    def take(self) -> Optional[Tuple[np.ndarray, float]]:
+        """Claim the newest frame and the perf_counter time it was captured"""
+        with self._lock:
+            item, self._frame = self._frame, None
+            return item
+
+    def record(self, processed: bool, latency_seconds: float):
+        """Account one recognized (or motion-skipped) frame"""
+        with self._lock:
+            if processed:
+                self.frames_processed += 1
+            else:
+                self.frames_static += 1
+            self.latencies.append(latency_seconds)
+
+    def get_stats(self) -> Dict:
+        """Capture and recognition FPS since the last reset, latency from capture to result"""
+        with self._lock:
+            elapsed = time.perf_counter() - self.stats_since
+            latencies = np.array(self.latencies) * 1000 if self.latencies else None
+            return {
+                'source': str(self.camera.camera_index),
+                'running': not self.finished,
+                'frames_captured': self.frames_captured,
+                'frames_processed': self.frames_processed,
+                'frames_static': self.frames_static,
+                'frames_dropped': self.frames_dropped,
+                'reconnects': self.reconnects,
+                'capture_fps': round(self.frames_captured / elapsed, 1) if elapsed > 0 else None,
+                'processed_fps': round((self.frames_processed + self.frames_static) / elapsed, 1)
+                if elapsed > 0 else None,
+                'latency_ms_avg': round(float(latencies.mean()), 1) if latencies is not None else None,
+                'latency_ms_p95': round(float(np.percentile(latencies, 95)), 1) if latencies is not None else None
+            }
+
+    def reset_stats(self):
+        self.stats_since = time.perf_counter()
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self.frames_static = 0
+        self.frames_dropped = 0
+        self.reconnects = 0
+        self.latencies = deque(maxlen=self.LATENCY_WINDOW)
+
+
+class MultiCameraOrchestrator:
+    """
+    Recognize several cameras with one recognizer and one in-memory gallery
+    Each source has its own capture thread (CameraStream). One scheduler
+    thread hands the newest frame of each stream to a shared worker pool.
+    Streams are served round-robin, starting after the one served last, and
+    each stream has at most one frame in flight. A busy entrance therefore
+    cannot take more than its share of the workers, and each stream's
+    frames stay in order for its tracker. The gallery is polled for changes
+    once for all cameras.
+
+    on_results(stream, frame, results, processed) runs on the worker thread
+    after every frame. processed is False when the motion gate reused the
+    stream's previous results.
+    """
+    def __init__(self, face_recognizer: FaceRecognizer, sources: Dict[str, Union[int, str]],
+                 workers: int = None, on_results: Callable = None, motion_gate: bool = None):
+        if not sources:
+            raise ValueError("At least one camera source is required")
+
+        self.face_recognizer = face_recognizer
+        self.streams = [CameraStream(name, source, motion_gate) for name, source in sources.items()]
+        self.workers = workers or Config.MULTI_CAMERA_WORKERS or min(len(self.streams), os.cpu_count() or 1)
+        self.on_results = on_results
+        self._pool = None
+        self._scheduler = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._next = 0
+
+    @property
+    def running(self) -> bool:
+        return self._scheduler is not None and self._scheduler.is_alive()
+
+    def start(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='recognize')
+        for stream in self.streams:
+            stream.start(self._wakeup.set)
+        self._scheduler = threading.Thread(target=self._schedule, name='camera-scheduler', daemon=True)
+        self._scheduler.start()
+        print(f"✓ Multi-camera orchestrator started ({len(self.streams)} cameras, {self.workers} workers)")
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._scheduler is not None:
+            self._scheduler.join()
+        for stream in self.streams:
+            stream.stop()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        print("✓ Multi-camera orchestrator stopped")
+
+    def _schedule(self):
+        next_poll = time.monotonic() + Config.GALLERY_POLL_SECONDS
+        while not self._stop.is_set():
+            self._wakeup.wait(0.5)
+            self._wakeup.clear()
+
+            self._dispatch()
+
+            if all(stream.finished and not stream.has_frame() for stream in self.streams):
+                with self._in_flight_lock:
+                    if self._in_flight == 0:
+                        break
+
+            if self.face_recognizer.db_manager is not None and time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + Config.GALLERY_POLL_SECONDS
+                try:
+                    self.face_recognizer.refresh_if_stale()
+                except Exception as e:
+                    print(f"Warning: Gallery refresh failed: {e}")
+
+    def _dispatch(self):
+        """Submit frames round-robin while workers are free"""
+        count = len(self.streams)
+        for offset in range(count):
+            with self._in_flight_lock:
+                if self._in_flight >= self.workers:
+                    return
+
+            index = (self._next + offset) % count
+            stream = self.streams[index]
+            if stream.busy:
+                continue
+            item = stream.take()
+            if item is None:
+                continue
+
+            stream.busy = True
+            with self._in_flight_lock:
+                self._in_flight += 1
+            self._pool.submit(self._recognize, stream, *item)
+            self._next = (index + 1) % count
+
+    def _recognize(self, stream: CameraStream, frame: np.ndarray, captured_at: float):
+        try:
+            processed = stream.motion_gate is None or stream.motion_gate.should_process(frame)
+            if processed:
+                stream.results = self.face_recognizer.process_frame(frame, quality_gate=True, presence_check=True,
+                                                                    tracker=stream.tracker)
+            stream.record(processed, time.perf_counter() - captured_at)
+
+            if self.on_results is not None:
+                self.on_results(stream, frame, stream.results, processed)
+        except Exception as e:
+            print(f"✗ Recognition failed on camera {stream.name}: {e}")
+        finally:
+            stream.busy = False
+            with self._in_flight_lock:
+                self._in_flight -= 1
+            self._wakeup.set()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-camera FPS and latency stats"""
+        return {stream.name: stream.get_stats() for stream in self.streams}
+
+    def reset_stats(self):
+        for stream in self.streams:
+            stream.reset_stats()
+
+    @staticmethod
+    def parse_sources(specs: List[str]) -> Dict[str, Union[int, str]]:
+        """
+        Parse camera arguments: a device index, URL or file, optionally
+        named as name=source (e.g. lobby-east=rtsp://10.0.0.5/stream1)
+        """
+        sources = {}
+        for number, spec in enumerate(specs, 1):
+            name, separator, source = spec.partition('=')
+            if not separator or not name or any(char in name for char in ':/\\?&'):
+                name, source = f"cam{number}", spec
+            if name in sources:
+                raise ValueError(f"Duplicate camera name: {name}")
+            sources[name] = int(source) if source.isdigit() else source
+        return sources
@@ -0,0 +1,349 @@
+import cv2
+import numpy as np
+import multiprocessing
+import threading
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import csv
+import json
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from models.face_recognizer import FaceRecognizer
+from models.gallery_snapshot import GallerySnapshot
+from models.motion_gate import MotionGate
+from models.shared_gallery import SharedGallery
+
+# Recognizer owned by each pool worker process
+_worker_recognizer = None
+
+def _init_worker(threshold: float, shared_prefix: Optional[str], version: int,
+                 encodings: Optional[np.ndarray], employees: Optional[List[Dict]],
+                 centroids: Optional[Dict]):
+    """
+    Build the worker's recognizer from the parent's gallery
+    With a shared gallery the worker attaches to the published segment
+    instead of receiving its own pickled copy of the encodings
+    """
+    global _worker_recognizer
+    # One process per core already; OpenCV threads would only oversubscribe
+    cv2.setNumThreads(1)
+
+    recognizer = FaceRecognizer(None)
+    recognizer.recognition_threshold = threshold
+    if shared_prefix is not None:
+        def missing():
+            raise RuntimeError(f"Shared gallery v{version} is no longer published")
+        recognizer.shared_gallery = SharedGallery(shared_prefix)
+        version, encodings, employees = recognizer.shared_gallery.get(version, missing)
+    recognizer.gallery = GallerySnapshot(version, encodings, employees, Config.GALLERY_QUANTIZATION,
+                                         Config.GALLERY_CENTROID_PREFILTER, centroids)
+    recognizer.warm_up()
+    _worker_recognizer = recognizer
+
+def _recognize_frame(index: int, offset: float, frame: np.ndarray) -> Tuple[int, float, List[Dict], float]:
+    """Run process_frame in a pool worker; returns (index, offset, sightings, cpu seconds)"""
+    cpu_start = time.process_time()
+    sightings = []
+    for result in _worker_recognizer.process_frame(frame, quality_gate=True):
+        if result['recognized']:
+            employee = result['employee_info']
+            sightings.append({
+                'employee_id': employee['employee_id'],
+                'employee_code': employee['employee_code'],
+                'full_name': employee['full_name'],
+                'confidence': float(result['confidence'])
+            })
+    return index, offset, sightings, time.process_time() - cpu_start
+
+
+class VideoBatchProcessor:
+    """
+    Offline recognition over recorded footage (e.g. entrance CCTV)
+    A decode thread reads the file and keeps every frame_stride-th frame,
+    optionally dropping frames the motion gate finds static, and hands them
+    through a bounded queue to a process pool where each worker runs
+    FaceRecognizer.process_frame against a copy of the gallery. dlib holds
+    the GIL, so processes rather than threads are what scale across cores.
+
+    Sightings are merged per employee into visits: a sighting within
+    dedup_seconds of the employee's previous one extends the visit. Visits
+    seen in fewer than min_sightings frames are reported but not turned into
+    attendance events. With a recording start time, the first confirmed
+    visit of each employee per day becomes a check-in (and, optionally, the
+    last later visit a check-out).
+    """
+    def __init__(self, face_recognizer: FaceRecognizer, frame_stride: int = None, workers: int = None,
+                 dedup_seconds: float = None, min_sightings: int = None, max_width: int = None,
+                 motion_gate: bool = None, queue_size: int = None, check_out: bool = False):
+        self.face_recognizer = face_recognizer
+        self.frame_stride = max(1, frame_stride or Config.VIDEO_FRAME_STRIDE)
+        self.workers = workers or Config.VIDEO_WORKERS or os.cpu_count() or 1
+        self.dedup_seconds = dedup_seconds if dedup_seconds is not None else Config.VIDEO_DEDUP_SECONDS
+        self.min_sightings = min_sightings or Config.VIDEO_MIN_SIGHTINGS
+        self.max_width = max_width if max_width is not None else Config.VIDEO_MAX_WIDTH
+        self.motion_gate = motion_gate if motion_gate is not None else Config.MOTION_GATE_ENABLED
+        self.queue_size = queue_size or Config.VIDEO_QUEUE_SIZE
+        self.check_out = check_out
+        self.progress_seconds = 5.0
+
+    def run(self, video_path: str, started_at: datetime = None) -> Dict:
+        """
+        Recognize every sampled frame of a video file
+        started_at is the wall-clock time of the first frame; without it the
+        report only has offsets into the video
+        Returns: {video, stats, visits, events}
+        """
+        capture = cv2.VideoCapture(video_path)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video {video_path}")
+
+        video_fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        print(f"✓ Opened {os.path.basename(video_path)}: {total_frames or '?'} frames at {video_fps:.1f} FPS, "
+              f"every {self.frame_stride}. frame on {self.workers} workers")
+
+        frames = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        stats = {'frames_decoded': 0, 'frames_sampled': 0, 'frames_static': 0, 'frames_processed': 0,
+                 'frames_failed': 0, 'sightings': 0, 'worker_cpu_seconds': 0.0, 'video_seconds': 0.0}
+        decoder = threading.Thread(target=self._decode, name='video-decode',
+                                   args=(capture, video_fps, frames, stop, stats), daemon=True)
+
+        sightings = []
+        started = time.perf_counter()
+        # spawn, not fork: the decode thread is already running when workers start
+        context = multiprocessing.get_context('spawn')
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                     initializer=_init_worker, initargs=self._worker_args()) as pool:
+                decoder.start()
+                self._dispatch(pool, frames, sightings, stats, started, total_frames)
+        finally:
+            stop.set()
+            decoder.join()
+            capture.release()
+
+        stats['seconds'] = round(time.perf_counter() - started, 2)
+        stats['decode_fps'] = round(stats['frames_decoded'] / stats['seconds'], 1) if stats['seconds'] else None
+        stats['processed_fps'] = round(stats['frames_processed'] / stats['seconds'], 1) if stats['seconds'] else None
+        stats['realtime_factor'] = round(stats['video_seconds'] / stats['seconds'], 2) if stats['seconds'] else None
+        stats['worker_cpu_seconds'] = round(stats['worker_cpu_seconds'], 2)
+
+        visits = self.merge_sightings(sightings, started_at)
+        return {
+            'video': os.path.abspath(video_path),
+            'started_at': started_at.isoformat() if started_at else None,
+            'stats': stats,
+            'visits': visits,
+            'events': self.attendance_events(visits, os.path.basename(video_path), self.check_out)
+            if started_at else []
+        }
+
+    def _worker_args(self) -> Tuple:
+        gallery = self.face_recognizer.gallery
+        centroids = self.face_recognizer._read_centroids()
+        shared = self.face_recognizer.shared_gallery
+        if shared is not None:
+            return (self.face_recognizer.recognition_threshold, shared.name_prefix,
+                    gallery.version, None, None, centroids)
+        return (self.face_recognizer.recognition_threshold, None, gallery.version,
+                np.asarray(gallery.encodings), list(gallery.employees), centroids)
+
+    def _decode(self, capture, video_fps: float, frames: queue.Queue, stop: threading.Event, stats: Dict):
+        """Decode thread: sample, gate and downscale frames, then queue them for the pool"""
+        gate = MotionGate() if self.motion_gate else None
+        index = 0
+        try:
+            while not stop.is_set():
+                # grab() demuxes without converting; only sampled frames are retrieved
+                if not capture.grab():
+                    break
+                index += 1
+                stats['frames_decoded'] = index
+                if (index - 1) % self.frame_stride:
+                    continue
+
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                stats['frames_sampled'] += 1
+                if gate is not None and not gate.should_process(frame):
+                    stats['frames_static'] += 1
+                    continue
+
+                if self.max_width and frame.shape[1] > self.max_width:
+                    scale = self.max_width / frame.shape[1]
+                    frame = cv2.resize(frame, (self.max_width, int(frame.shape[0] * scale)),
+                                       interpolation=cv2.INTER_AREA)
+
+                self._put(frames, (index - 1, (index - 1) / video_fps, frame), stop)
+        finally:
+            stats['video_seconds'] = round(index / video_fps, 2)
+            self._put(frames, None, stop)
+
+    @staticmethod
+    def _put(frames: queue.Queue, item, stop: threading.Event):
+        """Block while the pool is behind, but give up once the run is stopped"""
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _dispatch(self, pool: ProcessPoolExecutor, frames: queue.Queue, sightings: List[Dict],
+                  stats: Dict, started: float, total_frames: int):
+        """
+        Feed queued frames to the pool, keeping at most two frames in flight per worker
+        A frame whose recognition raised is counted in frames_failed and skipped
+        """
+        in_flight = set()
+        frame_of = {}
+        max_in_flight = self.workers * 2
+        next_progress = started + self.progress_seconds
+        finished = False
+
+        while not finished or in_flight:
+            while not finished and len(in_flight) < max_in_flight:
+                item = frames.get()
+                if item is None:
+                    finished = True
+                    break
+                future = pool.submit(_recognize_frame, *item)
+                frame_of[future] = item[0]
+                in_flight.add(future)
+
+            if not in_flight:
+                continue
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                frame_index = frame_of.pop(future)
+                try:
+                    index, offset, found, cpu_seconds = future.result()
+                except Exception as e:
+                    stats['frames_failed'] += 1
+                    print(f"✗ Recognition failed on frame {frame_index}: {e}")
+                    continue
+                stats['frames_processed'] += 1
+                stats['worker_cpu_seconds'] += cpu_seconds
+                stats['sightings'] += len(found)
+                for sighting in found:
+                    sighting['frame'] = index
+                    sighting['offset'] = offset
+                    sightings.append(sighting)
+
+            now = time.perf_counter()
+            if now >= next_progress:
+                next_progress = now + self.progress_seconds
+                elapsed = now - started
+                position = f"{stats['frames_decoded']}/{total_frames}" if total_frames else f"{stats['frames_decoded']}"
+                print(f"  frame {position}: {stats['frames_decoded'] / elapsed:.1f} decoded/s, "
+                      f"{stats['frames_processed'] / elapsed:.1f} processed/s, {stats['sightings']} sightings")
+
+    def merge_sightings(self, sightings: List[Dict], started_at: datetime = None) -> List[Dict]:
+        """
+        Merge per-frame sightings into visits, one per employee per stretch of
+        footage with no gap longer than dedup_seconds
+        """
+        visits = []
+        current = {}
+        for sighting in sorted(sightings, key=lambda s: (s['offset'], s['frame'])):
+            employee_id = sighting['employee_id']
+            visit = current.get(employee_id)
+            if visit is None or sighting['offset'] - visit['last_offset'] > self.dedup_seconds:
+                visit = {
+                    'employee_id': employee_id,
+                    'employee_code': sighting['employee_code'],
+                    'full_name': sighting['full_name'],
+                    'first_offset': sighting['offset'],
+                    'last_offset': sighting['offset'],
+                    'first_frame': sighting['frame'],
+                    'sightings': 0,
+                    'best_confidence': 0.0
+                }
+                current[employee_id] = visit
+                visits.append(visit)
+            visit['last_offset'] = sighting['offset']
+            visit['sightings'] += 1
+            visit['best_confidence'] = max(visit['best_confidence'], round(sighting['confidence'], 4))
+
+        for visit in visits:
+            visit['confirmed'] = visit['sightings'] >= self.min_sightings
+            if started_at is not None:
+                visit['first_seen'] = (started_at + timedelta(seconds=visit['first_offset'])).isoformat()
+                visit['last_seen'] = (started_at + timedelta(seconds=visit['last_offset'])).isoformat()
+        return visits
+
+    @staticmethod
+    def attendance_events(visits: List[Dict], source: str, check_out: bool = False) -> List[Dict]:
+        """
+        Turn confirmed visits into attendance events
+        The first visit of each employee per day is a check-in; with check_out,
+        the last visit after it is a check-out. Idempotency keys are derived
+        from the source, so re-running the same video applies nothing twice.
+        They are hashed to a UUID to fit processed_events.idempotency_key
+        (CHAR(36)); the readable form is kept as source_key.
+        """
+        by_day = {}
+        for visit in visits:
+            if visit['confirmed'] and 'first_seen' in visit:
+                first_seen = datetime.fromisoformat(visit['first_seen'])
+                by_day.setdefault((visit['employee_id'], first_seen.date()), []).append(visit)
+
+        events = []
+        for (employee_id, day), day_visits in sorted(by_day.items(), key=lambda item: (item[0][1], item[0][0])):
+            first, last = day_visits[0], day_visits[-1]
+            source_key = f"video:{source}:check_in:{employee_id}:{day.isoformat()}"
+            events.append({
+                'idempotency_key': VideoBatchProcessor.event_key(source_key),
+                'source_key': source_key,
+                'event_type': 'check_in',
+                'employee_id': employee_id,
+                'confidence': first['best_confidence'],
+                'image_path': None,
+                'event_time': datetime.fromisoformat(first['first_seen'])
+            })
+            if check_out and last is not first:
+                source_key = f"video:{source}:check_out:{employee_id}:{day.isoformat()}"
+                events.append({
+                    'idempotency_key': VideoBatchProcessor.event_key(source_key),
+                    'source_key': source_key,
+                    'event_type': 'check_out',
+                    'employee_id': employee_id,
+                    'confidence': last['best_confidence'],
+                    'image_path': None,
+                    'event_time': datetime.fromisoformat(last['last_seen'])
+                })
+        return events
+
+    @staticmethod
+    def event_key(source_key: str) -> str:
+        """Fixed-width (36 character) idempotency key for a readable event key"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, source_key))
+
+    @staticmethod
+    def write_report(report: Dict, output_path: str):
+        """Write the report as JSON, or the visits as CSV for a .csv path"""
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        if output_path.lower().endswith('.csv'):
+            fields = ['employee_id', 'employee_code', 'full_name', 'first_offset', 'last_offset',
+                      'first_seen', 'last_seen', 'sightings', 'best_confidence', 'confirmed']
+            with open(output_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(report['visits'])
+            return
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
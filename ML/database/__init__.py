@@ -1,3 +1,7 @@
 from .db_manager import DatabaseManager
+from .journal import AttendanceJournal, JournalReplayer
+from .export import AttendanceExporter
+from .log_retention import RecognitionLogArchiver
 
-__all__ = ['DatabaseManager']
+__all__ = ['DatabaseManager', 'AttendanceJournal', 'JournalReplayer', 'AttendanceExporter',
+           'RecognitionLogArchiver']
@@ -1,9 +1,13 @@
 import mysql.connector
 from mysql.connector import pooling, Error
 import numpy as np
-from datetime import datetime, date
-from typing import Optional, List, Dict, Tuple
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Tuple, Iterator
 import pickle
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 import sys
 import os
 
@@ -11,10 +15,21 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import Config
+from utils.profiling import timed
 
 class DatabaseManager:
     def __init__(self):
         self.connection_pool = None
+        self.last_success_at = None
+        self.last_error = None
+        self.last_error_at = None
+        
+        # LRU of employee rows keyed by ('id', employee_id) and ('code', employee_code)
+        self._employee_cache = OrderedDict()
+        self._employee_cache_lock = threading.Lock()
+        self.employee_cache_size = Config.EMPLOYEE_CACHE_SIZE
+        self.employee_cache_ttl = Config.EMPLOYEE_CACHE_TTL
+        
         self._initialize_pool()
     
     def _initialize_pool(self):
@@ -39,24 +54,39 @@ class DatabaseManager:
             print(f"✗ Error getting connection: {e}")
             raise
     
-    def execute_query(self, query: str, params: tuple = None, fetch: bool = False):
-        """Execute a query with optional parameters"""
+    @timed
+    def execute_query(self, query: str, params=None, fetch: bool = False, many: bool = False):
+        """
+        Execute a query with optional parameters
+        With many=True, params is a sequence of parameter tuples sent with
+        executemany (multi-row INSERTs go out as one statement); returns rowcount
+        """
         connection = None
         cursor = None
         try:
             connection = self.get_connection()
             cursor = connection.cursor(dictionary=True)
-            cursor.execute(query, params or ())
             
-            if fetch:
-                result = cursor.fetchall()
-                return result
-            else:
+            if many:
+                cursor.executemany(query, params)
                 connection.commit()
-                return cursor.lastrowid
+                result = cursor.rowcount
+            else:
+                cursor.execute(query, params or ())
+                
+                if fetch:
+                    result = cursor.fetchall()
+                else:
+                    connection.commit()
+                    result = cursor.lastrowid
+            
+            self.last_success_at = time.time()
+            return result
         except Error as e:
             if connection:
                 connection.rollback()
+            self.last_error = str(e)
+            self.last_error_at = time.time()
             print(f"✗ Database error: {e}")
             raise
         finally:
@@ -65,6 +95,53 @@ class DatabaseManager:
             if connection:
                 connection.close()
     
+    @contextmanager
+    def transaction(self, prepared: bool = True) -> Iterator['Transaction']:
+        """
+        Hold one pooled connection across several statements
+        Commits when the block exits normally and rolls back on any exception:
+        
+            with db_manager.transaction() as tx:
+                employee_id = tx.execute(query, params).lastrowid
+                tx.executemany(insert_query, rows)
+        """
+        connection = self.get_connection()
+        tx = Transaction(connection, prepared)
+        try:
+            yield tx
+            connection.commit()
+            self.last_success_at = time.time()
+        except Error as e:
+            connection.rollback()
+            self.last_error = str(e)
+            self.last_error_at = time.time()
+            print(f"✗ Database error: {e}")
+            raise
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            tx.close()
+            connection.close()
+    
+    def get_pool_status(self) -> Dict:
+        """
+        Report pool state from what the pool already tracks
+        Does not open a connection, so it is safe to call from health probes
+        """
+        pool = self.connection_pool
+        # mysql-connector keeps idle connections in a private queue
+        idle_queue = getattr(pool, '_cnx_queue', None)
+        
+        return {
+            'pool_name': pool.pool_name if pool else None,
+            'pool_size': pool.pool_size if pool else 0,
+            'idle_connections': idle_queue.qsize() if idle_queue is not None else None,
+            'last_success_at': self.last_success_at,
+            'last_error': self.last_error,
+            'last_error_at': self.last_error_at
+        }
+    
     # ========== EMPLOYEE OPERATIONS ==========
     
     def add_employee(self, employee_code: str, full_name: str, email: str = None, 
@@ -75,21 +152,56 @@ class DatabaseManager:
             VALUES (%s, %s, %s, %s, %s, %s)
         """
         params = (employee_code, full_name, email, phone, department, position)
-        return self.execute_query(query, params)
+        employee_id = self.execute_query(query, params)
+        self._invalidate_employee(employee_id, employee_code)
+        return employee_id
     
     def get_employee(self, employee_id: int = None, employee_code: str = None) -> Optional[Dict]:
-        """Get employee by ID or code"""
+        """Get employee by ID or code (served from the employee cache when possible)"""
         if employee_id:
+            key = ('id', employee_id)
             query = "SELECT * FROM employees WHERE employee_id = %s"
             params = (employee_id,)
         elif employee_code:
+            key = ('code', employee_code)
             query = "SELECT * FROM employees WHERE employee_code = %s"
             params = (employee_code,)
         else:
             return None
         
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
         result = self.execute_query(query, params, fetch=True)
-        return result[0] if result else None
+        if not result:
+            return None
+        
+        self._cache_put(result[0])
+        return dict(result[0])
+    
+    def get_employees_by_codes(self, employee_codes: List[str]) -> Dict[str, Dict]:
+        """
+        Get several employees by code with one IN query for the cache misses
+        Returns: {employee_code: employee}; unknown codes are left out
+        """
+        employees = {}
+        missing = []
+        for code in dict.fromkeys(employee_codes):
+            cached = self._cache_get(('code', code))
+            if cached is not None:
+                employees[code] = cached
+            else:
+                missing.append(code)
+        
+        if missing:
+            placeholders = ', '.join(['%s'] * len(missing))
+            query = f"SELECT * FROM employees WHERE employee_code IN ({placeholders})"
+            for row in self.execute_query(query, tuple(missing), fetch=True):
+                self._cache_put(row)
+                employees[row['employee_code']] = dict(row)
+        
+        return employees
     
     def get_all_employees(self, status: str = 'active') -> List[Dict]:
         """Get all employees with specific status"""
@@ -98,27 +210,109 @@ class DatabaseManager:
     
     def update_employee_status(self, employee_id: int, status: str) -> bool:
         """Update employee status"""
-        query = "UPDATE employees SET status = %s WHERE employee_id = %s"
-        self.execute_query(query, (status, employee_id))
+        with self.transaction() as tx:
+            tx.execute("UPDATE employees SET status = %s WHERE employee_id = %s", (status, employee_id))
+            self._bump_gallery_version(tx)
+        self._invalidate_employee(employee_id)
         return True
     
+    def enroll_employee(self, employee_code: str, full_name: str, encodings: List[Tuple],
+                        email: str = None, phone: str = None, department: str = None,
+                        position: str = None) -> int:
+        """
+        Add an employee together with their face encodings in one transaction
+        encodings: list of (face_encoding, image_path, quality_score, is_primary)
+        Either everything is stored or nothing is
+        Returns: employee_id
+        """
+        with self.transaction() as tx:
+            employee_id = tx.execute("""
+                INSERT INTO employees (employee_code, full_name, email, phone, department, position)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (employee_code, full_name, email, phone, department, position)).lastrowid
+            
+            tx.executemany(self.INSERT_ENCODING_QUERY, [
+                (employee_id, pickle.dumps(face_encoding), image_path, quality_score, is_primary)
+                for face_encoding, image_path, quality_score, is_primary in encodings
+            ])
+            self._update_employee_centroid(tx, employee_id)
+            self._bump_gallery_version(tx)
+        
+        self._invalidate_employee(employee_id, employee_code)
+        return employee_id
+    
+    # ========== EMPLOYEE CACHE ==========
+    
+    def _cache_get(self, key: Tuple) -> Optional[Dict]:
+        """Return a copy of a cached employee, or None on a miss or expired entry"""
+        with self._employee_cache_lock:
+            entry = self._employee_cache.get(key)
+            if entry is None:
+                return None
+            
+            cached_at, employee = entry
+            if time.monotonic() - cached_at > self.employee_cache_ttl:
+                self._drop_cached(employee)
+                return None
+            
+            self._employee_cache.move_to_end(key)
+            return dict(employee)
+    
+    def _cache_put(self, employee: Dict):
+        """Cache an employee row under both its ID and its code"""
+        if self.employee_cache_size <= 0:
+            return
+        
+        entry = (time.monotonic(), dict(employee))
+        with self._employee_cache_lock:
+            for key in (('id', employee['employee_id']), ('code', employee['employee_code'])):
+                self._employee_cache[key] = entry
+                self._employee_cache.move_to_end(key)
+            
+            while len(self._employee_cache) > self.employee_cache_size * 2:
+                self._employee_cache.popitem(last=False)
+    
+    def _drop_cached(self, employee: Dict):
+        # Caller holds _employee_cache_lock
+        self._employee_cache.pop(('id', employee['employee_id']), None)
+        self._employee_cache.pop(('code', employee['employee_code']), None)
+    
+    def _invalidate_employee(self, employee_id: int = None, employee_code: str = None):
+        """Drop an employee from the cache after a write"""
+        with self._employee_cache_lock:
+            for key in (('id', employee_id), ('code', employee_code)):
+                entry = self._employee_cache.get(key)
+                if entry is not None:
+                    self._drop_cached(entry[1])
+    
+    def clear_employee_cache(self):
+        """Drop every cached employee (e.g. after edits made outside this process)"""
+        with self._employee_cache_lock:
+            self._employee_cache.clear()
+    
     # ========== FACE ENCODING OPERATIONS ==========
     
+    INSERT_ENCODING_QUERY = """
+        INSERT INTO face_encodings 
+        (employee_id, face_encoding, image_path, quality_score, is_primary)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    
     def save_face_encoding(self, employee_id: int, face_encoding: np.ndarray, 
                           image_path: str, quality_score: float = None, 
                           is_primary: bool = False) -> int:
         """Save face encoding to database"""
         # Convert numpy array to binary
         encoding_blob = pickle.dumps(face_encoding)
-        
-        query = """
-            INSERT INTO face_encodings 
-            (employee_id, face_encoding, image_path, quality_score, is_primary)
-            VALUES (%s, %s, %s, %s, %s)
-        """
         params = (employee_id, encoding_blob, image_path, quality_score, is_primary)
-        return self.execute_query(query, params)
+        
+        with self.transaction() as tx:
+            encoding_id = tx.execute(self.INSERT_ENCODING_QUERY, params).lastrowid
+            self._update_employee_centroid(tx, employee_id)
+            self._bump_gallery_version(tx)
+        return encoding_id
     
+    @timed
     def get_face_encodings(self, employee_id: int = None) -> List[Dict]:
         """Get face encodings for specific employee or all employees"""
         if employee_id:
@@ -158,74 +352,316 @@ class DatabaseManager:
         result = self.execute_query(query, (employee_id,), fetch=True)
         return result[0]['count'] if result else 0
     
+    def get_encoding_counts(self, employee_ids: List[int] = None) -> Dict[int, int]:
+        """
+        Get face encoding counts for many employees in one GROUP BY
+        Returns: {employee_id: count}; employees without encodings are left out
+        """
+        query = "SELECT employee_id, COUNT(*) as count FROM face_encodings"
+        params = ()
+        
+        if employee_ids is not None:
+            if not employee_ids:
+                return {}
+            query += f" WHERE employee_id IN ({', '.join(['%s'] * len(employee_ids))})"
+            params = tuple(employee_ids)
+        
+        query += " GROUP BY employee_id"
+        return {row['employee_id']: row['count'] for row in self.execute_query(query, params, fetch=True)}
+    
     def delete_face_encoding(self, encoding_id: int) -> bool:
         """Delete a face encoding"""
-        query = "DELETE FROM face_encodings WHERE encoding_id = %s"
-        self.execute_query(query, (encoding_id,))
+        with self.transaction() as tx:
+            rows = tx.fetchall("SELECT employee_id FROM face_encodings WHERE encoding_id = %s FOR UPDATE",
+                               (encoding_id,))
+            tx.execute("DELETE FROM face_encodings WHERE encoding_id = %s", (encoding_id,))
+            if rows:
+                self._update_employee_centroid(tx, rows[0]['employee_id'])
+            self._bump_gallery_version(tx)
         return True
     
+    # ========== EMPLOYEE CENTROID OPERATIONS ==========
+    
+    UPSERT_CENTROID_QUERY = """
+        INSERT INTO employee_centroids (employee_id, centroid, encoding_count, radius)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE centroid = VALUES(centroid), encoding_count = VALUES(encoding_count),
+            radius = VALUES(radius)
+    """
+    
+    @staticmethod
+    def _centroid_row(employee_id: int, encodings: np.ndarray) -> tuple:
+        """(employee_id, pickled centroid, encoding count, radius) for employee_centroids"""
+        centroid = encodings.mean(axis=0)
+        radius = float(np.linalg.norm(encodings - centroid, axis=1).max())
+        return employee_id, pickle.dumps(centroid), len(encodings), radius
+    
+    def _update_employee_centroid(self, tx: 'Transaction', employee_id: int):
+        """Recompute one employee's centroid and radius from their stored encodings"""
+        rows = tx.fetchall("SELECT face_encoding FROM face_encodings WHERE employee_id = %s", (employee_id,))
+        if not rows:
+            tx.execute("DELETE FROM employee_centroids WHERE employee_id = %s", (employee_id,))
+            return
+        
+        encodings = np.array([pickle.loads(row['face_encoding']) for row in rows], dtype=np.float64)
+        tx.execute(self.UPSERT_CENTROID_QUERY, self._centroid_row(employee_id, encodings))
+    
+    @timed
+    def get_employee_centroids(self) -> Dict[int, Tuple[np.ndarray, int, Optional[float]]]:
+        """
+        Get stored centroids of active employees
+        Returns: {employee_id: (centroid, encoding_count, radius)}; radius is
+        None for rows written before the column existed
+        """
+        query = """
+            SELECT ec.employee_id, ec.centroid, ec.encoding_count, ec.radius
+            FROM employee_centroids ec
+            JOIN employees e ON ec.employee_id = e.employee_id
+            WHERE e.status = 'active'
+        """
+        centroids = {}
+        for row in self.execute_query(query, fetch=True):
+            try:
+                centroids[row['employee_id']] = (pickle.loads(row['centroid']), row['encoding_count'],
+                                                 row['radius'])
+            except Exception as e:
+                print(f"Warning: Failed to deserialize centroid of employee {row['employee_id']}: {e}")
+        return centroids
+    
+    def rebuild_employee_centroids(self) -> int:
+        """
+        Recompute every employee's centroid and radius from face_encodings (backfill)
+        Returns: number of centroids written
+        """
+        encodings_by_employee = {}
+        for row in self.execute_query("SELECT employee_id, face_encoding FROM face_encodings", fetch=True):
+            try:
+                encodings_by_employee.setdefault(row['employee_id'], []).append(pickle.loads(row['face_encoding']))
+            except Exception as e:
+                print(f"Warning: Skipping unreadable encoding of employee {row['employee_id']}: {e}")
+        
+        rows = [self._centroid_row(employee_id, np.array(encodings, dtype=np.float64))
+                for employee_id, encodings in encodings_by_employee.items()]
+        
+        with self.transaction(prepared=False) as tx:
+            tx.execute("DELETE FROM employee_centroids")
+            tx.executemany("""
+                INSERT INTO employee_centroids (employee_id, centroid, encoding_count, radius)
+                VALUES (%s, %s, %s, %s)
+            """, rows)
+        return len(rows)
+    
+    # ========== GALLERY VERSION OPERATIONS ==========
+    
+    @timed
+    def get_gallery_version(self) -> int:
+        """Get current gallery version (cheap primary key lookup, safe to poll)"""
+        query = "SELECT version FROM gallery_state WHERE state_id = 1"
+        result = self.execute_query(query, fetch=True)
+        return result[0]['version'] if result else 0
+    
+    BUMP_GALLERY_QUERY = """
+        INSERT INTO gallery_state (state_id, version) VALUES (1, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1
+    """
+    
+    def bump_gallery_version(self):
+        """Signal all workers that the face gallery has changed"""
+        self.execute_query(self.BUMP_GALLERY_QUERY)
+    
+    def _bump_gallery_version(self, tx: 'Transaction'):
+        """Bump the gallery version as part of the caller's transaction"""
+        tx.execute(self.BUMP_GALLERY_QUERY)
+    
     # ========== ATTENDANCE OPERATIONS ==========
     
+    @timed
     def check_in(self, employee_id: int, confidence: float, image_path: str = None) -> Tuple[bool, str]:
         """Record check-in"""
-        today = date.today()
-        
-        # Check if already checked in today
-        check_query = """
-            SELECT attendance_id, check_in_time FROM attendance_records 
-            WHERE employee_id = %s AND attendance_date = %s
+        # Row lock, attendance write and summary update commit together
+        with self.transaction() as tx:
+            return self._apply_check_in(tx, employee_id, confidence, image_path, datetime.now())
+    
+    @timed
+    def check_in_many(self, check_ins: List[Tuple[int, float]], 
+                      image_path: str = None) -> Dict[int, Tuple[bool, str]]:
         """
-        existing = self.execute_query(check_query, (employee_id, today), fetch=True)
-        
-        if existing and existing[0]['check_in_time']:
-            return False, "Already checked in today"
+        Record check-ins for several employees in one transaction
+        check_ins: list of (employee_id, confidence)
+        Returns: {employee_id: (success, message)}
+        """
+        if not check_ins:
+            return {}
         
+        today = date.today()
         now = datetime.now()
+        status = self._check_in_status(now)
+        employee_ids = [employee_id for employee_id, _ in check_ins]
+        placeholders = ', '.join(['%s'] * len(employee_ids))
+        
+        with self.transaction() as tx:
+            # Lock today's rows for these employees so concurrent kiosks cannot double check-in
+            rows = tx.fetchall(f"""
+                SELECT attendance_id, employee_id, check_in_time, status FROM attendance_records 
+                WHERE attendance_date = %s AND employee_id IN ({placeholders})
+                FOR UPDATE
+            """, (today, *employee_ids))
+            existing = {row['employee_id']: row for row in rows}
+            
+            outcomes = {}
+            inserts = []
+            updates = []
+            summary_changes = []
+            for employee_id, confidence in check_ins:
+                row = existing.get(employee_id)
+                if row and row['check_in_time']:
+                    outcomes[employee_id] = (False, "Already checked in today")
+                elif row:
+                    updates.append((now, confidence, image_path, status, row['attendance_id']))
+                    summary_changes.append((employee_id, self._check_in_summary_deltas(status, row['status'])))
+                    outcomes[employee_id] = (True, f"Check-in successful ({status})")
+                else:
+                    inserts.append((employee_id, now, today, confidence, image_path, status))
+                    summary_changes.append((employee_id, self._check_in_summary_deltas(status)))
+                    outcomes[employee_id] = (True, f"Check-in successful ({status})")
+            
+            tx.executemany(self.UPDATE_CHECK_IN_QUERY, updates)
+            tx.executemany(self.INSERT_CHECK_IN_QUERY, inserts)
+            for employee_id, deltas in summary_changes:
+                self._update_daily_summary(tx, today, employee_id, deltas)
         
-        # Determine status (late or present)
+        return outcomes
+    
+    def _check_in_status(self, now: datetime) -> str:
+        """Determine check-in status (late or present)"""
         work_start = datetime.strptime(Config.WORK_START_TIME, '%H:%M:%S').time()
         late_minutes = Config.LATE_THRESHOLD_MINUTES
         
         status = 'present'
         if now.time() > work_start:
-            minutes_late = (datetime.combine(today, now.time()) - 
-                          datetime.combine(today, work_start)).seconds // 60
+            minutes_late = (datetime.combine(now.date(), now.time()) - 
+                          datetime.combine(now.date(), work_start)).seconds // 60
             if minutes_late > late_minutes:
                 status = 'late'
         
+        return status
+    
+    @timed
+    def check_out(self, employee_id: int, confidence: float, image_path: str = None) -> Tuple[bool, str]:
+        """Record check-out"""
+        # Row lock, attendance write and summary update commit together
+        with self.transaction() as tx:
+            return self._apply_check_out(tx, employee_id, confidence, image_path, datetime.now())
+    
+    @timed
+    def apply_attendance_events(self, events: List[Dict]) -> Tuple[Dict[str, Tuple[bool, str]], Dict[str, str]]:
+        """
+        Apply journaled check-in/check-out events in one transaction
+        Each event carries an idempotency key; keys already recorded in
+        processed_events are skipped, so replaying a batch twice is harmless.
+        Every event runs under its own savepoint: one that raises (bad data,
+        an employee row removed by hand) is rolled back alone and reported in
+        errors while the rest of the batch commits. Losing the connection
+        still fails the whole batch.
+        Returns: ({idempotency_key: (success, message)}, {idempotency_key: error})
+        """
+        if not events:
+            return {}, {}
+        
+        outcomes = {}
+        errors = {}
+        with self.transaction() as tx:
+            for event in events:
+                tx.savepoint('replay_event')
+                try:
+                    outcomes[event['idempotency_key']] = self._apply_event(tx, event)
+                except Exception as e:
+                    tx.rollback_to('replay_event')
+                    errors[event['idempotency_key']] = str(e)
+                    continue
+                tx.release('replay_event')
+        
+        return outcomes, errors
+    
+    def _apply_event(self, tx: 'Transaction', event: Dict) -> Tuple[bool, str]:
+        """Claim an event's idempotency key and apply it, inside an open transaction"""
+        claimed = tx.execute("""
+            INSERT IGNORE INTO processed_events (idempotency_key, event_type, employee_id)
+            VALUES (%s, %s, %s)
+        """, (event['idempotency_key'], event['event_type'], event['employee_id'])).rowcount
+        
+        if claimed == 0:
+            return True, "Already applied"
+        
+        if event['event_type'] == 'check_in':
+            return self._apply_check_in(tx, event['employee_id'], event['confidence'],
+                                        event['image_path'], event['event_time'])
+        return self._apply_check_out(tx, event['employee_id'], event['confidence'],
+                                     event['image_path'], event['event_time'])
+    
+    def delete_processed_events(self, cutoff: datetime, batch_size: int = 10000) -> int:
+        """Delete idempotency keys processed before cutoff, in batches; returns rows deleted"""
+        total = 0
+        while True:
+            with self.transaction(prepared=False) as tx:
+                deleted = tx.execute(
+                    "DELETE FROM processed_events WHERE processed_at < %s LIMIT %s", (cutoff, batch_size)
+                ).rowcount
+            total += deleted
+            if deleted < batch_size:
+                return total
+    
+    UPDATE_CHECK_IN_QUERY = """
+        UPDATE attendance_records 
+        SET check_in_time = %s, check_in_confidence = %s, 
+            check_in_image_path = %s, status = %s
+        WHERE attendance_id = %s
+    """
+    
+    INSERT_CHECK_IN_QUERY = """
+        INSERT INTO attendance_records 
+        (employee_id, check_in_time, attendance_date, check_in_confidence, 
+         check_in_image_path, status)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+    
+    def _apply_check_in(self, tx: 'Transaction', employee_id: int, confidence: float,
+                        image_path: Optional[str], event_time: datetime) -> Tuple[bool, str]:
+        """Check-in at a given time inside an open transaction"""
+        attendance_date = event_time.date()
+        
+        existing = tx.fetchall("""
+            SELECT attendance_id, check_in_time, status FROM attendance_records 
+            WHERE employee_id = %s AND attendance_date = %s
+            FOR UPDATE
+        """, (employee_id, attendance_date))
+        
+        if existing and existing[0]['check_in_time']:
+            return False, "Already checked in today"
+        
+        status = self._check_in_status(event_time)
+        
         if existing:
-            # Update existing record
-            query = """
-                UPDATE attendance_records 
-                SET check_in_time = %s, check_in_confidence = %s, 
-                    check_in_image_path = %s, status = %s
-                WHERE attendance_id = %s
-            """
-            params = (now, confidence, image_path, status, existing[0]['attendance_id'])
+            tx.execute(self.UPDATE_CHECK_IN_QUERY,
+                       (event_time, confidence, image_path, status, existing[0]['attendance_id']))
+            deltas = self._check_in_summary_deltas(status, existing[0]['status'])
         else:
-            # Create new record
-            query = """
-                INSERT INTO attendance_records 
-                (employee_id, check_in_time, attendance_date, check_in_confidence, 
-                 check_in_image_path, status)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            params = (employee_id, now, today, confidence, image_path, status)
+            tx.execute(self.INSERT_CHECK_IN_QUERY,
+                       (employee_id, event_time, attendance_date, confidence, image_path, status))
+            deltas = self._check_in_summary_deltas(status)
         
-        self.execute_query(query, params)
+        self._update_daily_summary(tx, attendance_date, employee_id, deltas)
         return True, f"Check-in successful ({status})"
     
-    def check_out(self, employee_id: int, confidence: float, image_path: str = None) -> Tuple[bool, str]:
-        """Record check-out"""
-        today = date.today()
-        
-        # Check if checked in today
-        check_query = """
+    def _apply_check_out(self, tx: 'Transaction', employee_id: int, confidence: float,
+                         image_path: Optional[str], event_time: datetime) -> Tuple[bool, str]:
+        """Check-out at a given time inside an open transaction"""
+        existing = tx.fetchall("""
             SELECT attendance_id, check_in_time, check_out_time 
             FROM attendance_records 
             WHERE employee_id = %s AND attendance_date = %s
-        """
-        existing = self.execute_query(check_query, (employee_id, today), fetch=True)
+            FOR UPDATE
+        """, (employee_id, event_time.date()))
         
         if not existing or not existing[0]['check_in_time']:
             return False, "No check-in record found for today"
@@ -233,18 +669,106 @@ class DatabaseManager:
         if existing[0]['check_out_time']:
             return False, "Already checked out today"
         
-        now = datetime.now()
-        
-        query = """
+        tx.execute("""
             UPDATE attendance_records 
             SET check_out_time = %s, check_out_confidence = %s, check_out_image_path = %s
             WHERE attendance_id = %s
-        """
-        params = (now, confidence, image_path, existing[0]['attendance_id'])
-        self.execute_query(query, params)
+        """, (event_time, confidence, image_path, existing[0]['attendance_id']))
         
+        self._update_daily_summary(tx, event_time.date(), employee_id, {'checked_out': 1})
         return True, "Check-out successful"
     
+    # ========== DAILY SUMMARY OPERATIONS ==========
+    
+    SUMMARY_STATUSES = ('present', 'late', 'absent', 'half_day', 'on_leave')
+    
+    @staticmethod
+    def _check_in_summary_deltas(status: str, previous_status: str = None) -> Dict[str, int]:
+        """
+        Summary changes for a check-in
+        previous_status is the status of a pre-existing record (e.g. 'absent')
+        that the check-in overwrites; without one a new record was inserted
+        """
+        deltas = {'checked_in': 1, status: 1}
+        if previous_status is None:
+            deltas['total_records'] = 1
+        elif previous_status == status:
+            deltas[status] = 0
+        else:
+            deltas[previous_status] = -1
+        return deltas
+    
+    def _update_daily_summary(self, tx: 'Transaction', summary_date: date, employee_id: int,
+                              deltas: Dict[str, int]):
+        """Apply counter deltas to the employee's department row, inside the caller's transaction"""
+        columns = list(deltas)
+        assignments = ', '.join(f"{column} = {column} + VALUES({column})" for column in columns)
+        
+        tx.execute(f"""
+            INSERT INTO daily_attendance_summary (summary_date, department, {', '.join(columns)})
+            SELECT %s, COALESCE(department, ''), {', '.join(['%s'] * len(columns))}
+            FROM employees WHERE employee_id = %s
+            ON DUPLICATE KEY UPDATE {assignments}
+        """, (summary_date, *deltas.values(), employee_id))
+    
+    def rebuild_daily_summary(self, start_date: date = None, end_date: date = None) -> int:
+        """
+        Recompute the daily summary from attendance_records (backfill/repair)
+        Rows are grouped by the employees' current department
+        Returns: number of summary rows written
+        """
+        range_sql = ""
+        params = []
+        if start_date:
+            range_sql += " AND {column} >= %s"
+            params.append(start_date)
+        if end_date:
+            range_sql += " AND {column} <= %s"
+            params.append(end_date)
+        
+        status_sums = ', '.join(f"SUM(ar.status = '{status}')" for status in self.SUMMARY_STATUSES)
+        
+        # One-off statements, nothing to gain from preparing them
+        with self.transaction(prepared=False) as tx:
+            tx.execute(
+                "DELETE FROM daily_attendance_summary WHERE 1=1" + range_sql.format(column='summary_date'),
+                tuple(params)
+            )
+            return tx.execute(f"""
+                INSERT INTO daily_attendance_summary
+                (summary_date, department, total_records, checked_in, checked_out,
+                 {', '.join(self.SUMMARY_STATUSES)})
+                SELECT ar.attendance_date, COALESCE(e.department, ''), COUNT(*),
+                       SUM(ar.check_in_time IS NOT NULL), SUM(ar.check_out_time IS NOT NULL),
+                       {status_sums}
+                FROM attendance_records ar
+                JOIN employees e ON ar.employee_id = e.employee_id
+                WHERE 1=1 {range_sql.format(column='ar.attendance_date')}
+                GROUP BY ar.attendance_date, COALESCE(e.department, '')
+            """, tuple(params)).rowcount
+    
+    def get_daily_summary(self, start_date: date, end_date: date = None,
+                          department: str = None) -> List[Dict]:
+        """Get per-day attendance counts from the summary table, oldest first"""
+        status_columns = ', '.join(f"SUM({status}) AS {status}" for status in self.SUMMARY_STATUSES)
+        query = f"""
+            SELECT summary_date, SUM(total_records) AS total_records,
+                   SUM(checked_in) AS checked_in, SUM(checked_out) AS checked_out,
+                   {status_columns}
+            FROM daily_attendance_summary
+            WHERE summary_date >= %s AND summary_date <= %s
+        """
+        params = [start_date, end_date or start_date]
+        
+        if department is not None:
+            query += " AND department = %s"
+            params.append(department)
+        
+        query += " GROUP BY summary_date ORDER BY summary_date"
+        return self.execute_query(query, tuple(params), fetch=True)
+    
+    # ========== ATTENDANCE HISTORY ==========
+    
     def get_attendance_records(self, employee_id: int = None, start_date: date = None, 
                               end_date: date = None) -> List[Dict]:
         """Get attendance records with filters"""
@@ -272,8 +796,249 @@ class DatabaseManager:
         
         return self.execute_query(query, tuple(params), fetch=True)
     
+    # Columns callers may project from attendance history; employee columns add a join
+    ATTENDANCE_FIELDS = {
+        'attendance_id': 'ar.attendance_id',
+        'employee_id': 'ar.employee_id',
+        'attendance_date': 'ar.attendance_date',
+        'check_in_time': 'ar.check_in_time',
+        'check_out_time': 'ar.check_out_time',
+        'status': 'ar.status',
+        'check_in_confidence': 'ar.check_in_confidence',
+        'check_out_confidence': 'ar.check_out_confidence',
+        'check_in_image_path': 'ar.check_in_image_path',
+        'check_out_image_path': 'ar.check_out_image_path',
+        'location': 'ar.location',
+        'notes': 'ar.notes',
+        'employee_code': 'e.employee_code',
+        'full_name': 'e.full_name',
+        'department': 'e.department',
+        'position': 'e.position'
+    }
+    
+    def _attendance_select(self, fields: Optional[List[str]], employee_id: Optional[int],
+                           start_date: Optional[date], end_date: Optional[date]) -> Tuple[List[str], str, list]:
+        """
+        Build the projected SELECT and filters shared by history paging and exports
+        Returns: (fields, query, params); the query ends in an open WHERE clause
+        """
+        fields = list(fields) if fields else ['attendance_id', 'employee_id', 'attendance_date',
+                                              'check_in_time', 'check_out_time', 'status',
+                                              'employee_code', 'full_name']
+        unknown = [field for field in fields if field not in self.ATTENDANCE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown attendance field(s): {', '.join(unknown)}")
+        
+        columns = ', '.join(f"{self.ATTENDANCE_FIELDS[field]} AS {field}" for field in fields)
+        query = f"SELECT {columns} FROM attendance_records ar"
+        if any(self.ATTENDANCE_FIELDS[field].startswith('e.') for field in fields):
+            query += " JOIN employees e ON ar.employee_id = e.employee_id"
+        query += " WHERE 1=1"
+        params = []
+        
+        if employee_id:
+            query += " AND ar.employee_id = %s"
+            params.append(employee_id)
+        
+        if start_date:
+            query += " AND ar.attendance_date >= %s"
+            params.append(start_date)
+        
+        if end_date:
+            query += " AND ar.attendance_date <= %s"
+            params.append(end_date)
+        
+        return fields, query, params
+    
+    def _attendance_page_query(self, fields: Optional[List[str]], employee_id: Optional[int],
+                               start_date: Optional[date], end_date: Optional[date],
+                               after: Optional[Tuple[date, int]], limit: int) -> Tuple[str, tuple]:
+        """
+        Build one keyset page over (attendance_date, attendance_id), newest first
+        The key columns are always selected so the next page can start after the last row
+        """
+        fields = list(fields) if fields else None
+        if fields:
+            for key in ('attendance_id', 'attendance_date'):
+                if key not in fields:
+                    fields.append(key)
+        
+        _, query, params = self._attendance_select(fields, employee_id, start_date, end_date)
+        
+        if after:
+            after_date, after_id = after
+            query += (" AND (ar.attendance_date < %s"
+                      " OR (ar.attendance_date = %s AND ar.attendance_id < %s))")
+            params.extend([after_date, after_date, after_id])
+        
+        query += " ORDER BY ar.attendance_date DESC, ar.attendance_id DESC LIMIT %s"
+        params.append(limit)
+        
+        return query, tuple(params)
+    
+    @timed
+    def get_attendance_page(self, fields: List[str] = None, employee_id: int = None,
+                            start_date: date = None, end_date: date = None,
+                            after: Tuple[date, int] = None,
+                            limit: int = 100) -> Tuple[List[Dict], Optional[Tuple[date, int]]]:
+        """
+        Get one page of attendance history, newest first
+        Returns: (records, next_after) where next_after is None on the last page
+        """
+        query, params = self._attendance_page_query(fields, employee_id, start_date, end_date,
+                                                    after, limit)
+        records = self.execute_query(query, params, fetch=True)
+        
+        next_after = None
+        if len(records) == limit:
+            next_after = (records[-1]['attendance_date'], records[-1]['attendance_id'])
+        
+        return records, next_after
+    
+    def iter_attendance_records(self, fields: List[str] = None, employee_id: int = None,
+                                start_date: date = None, end_date: date = None,
+                                page_size: int = 1000) -> Iterator[Dict]:
+        """
+        Stream attendance history, newest first, without loading it all at once
+        Pages are read with keyset pagination through an unbuffered cursor, so
+        memory use stays flat no matter how large the date range is
+        """
+        connection = self.get_connection()
+        cursor = None
+        after = None
+        try:
+            while True:
+                query, params = self._attendance_page_query(fields, employee_id, start_date,
+                                                            end_date, after, page_size)
+                cursor = connection.cursor(dictionary=True, buffered=False)
+                cursor.execute(query, params)
+                
+                row_count = 0
+                for record in cursor:
+                    row_count += 1
+                    after = (record['attendance_date'], record['attendance_id'])
+                    yield record
+                
+                cursor.close()
+                cursor = None
+                
+                if row_count < page_size:
+                    return
+        finally:
+            if cursor is not None:
+                # Abandoned mid-page: drain the unread rows before returning the connection
+                if connection.unread_result:
+                    connection.consume_results()
+                cursor.close()
+            connection.close()
+    
+    def iter_attendance_export(self, fields: List[str] = None, start_date: date = None,
+                               end_date: date = None, chunk_size: int = 10000) -> Iterator[List[tuple]]:
+        """
+        Stream attendance rows for a bulk export, oldest first, in chunks of tuples
+        One query read through an unbuffered cursor, so the server streams rows
+        as they are fetched and the full result set is never held in memory
+        Column order follows fields
+        """
+        _, query, params = self._attendance_select(fields, None, start_date, end_date)
+        query += " ORDER BY ar.attendance_date, ar.attendance_id"
+        
+        connection = self.get_connection()
+        cursor = None
+        try:
+            cursor = connection.cursor(buffered=False)
+            cursor.execute(query, tuple(params))
+            
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+            
+            self.last_success_at = time.time()
+        finally:
+            if cursor is not None:
+                # Abandoned mid-export: drain the unread rows before returning the connection
+                if connection.unread_result:
+                    connection.consume_results()
+                cursor.close()
+            connection.close()
+    
+    # ========== EVIDENCE IMAGE OPERATIONS ==========
+    
+    EVIDENCE_IMAGE_COLUMNS = ('check_in_image_path', 'check_out_image_path')
+    
+    def get_evidence_images_before(self, before_date: date, after_id: int, limit: int,
+                                   skip_prefix: str) -> List[Dict]:
+        """
+        Attendance rows dated before before_date with an evidence image not yet
+        under skip_prefix, in attendance_id order starting after after_id
+        """
+        query = """
+            SELECT attendance_id, attendance_date, check_in_image_path, check_out_image_path
+            FROM attendance_records
+            WHERE attendance_id > %s AND attendance_date < %s
+              AND ((check_in_image_path IS NOT NULL AND check_in_image_path NOT LIKE %s)
+                OR (check_out_image_path IS NOT NULL AND check_out_image_path NOT LIKE %s))
+            ORDER BY attendance_id
+            LIMIT %s
+        """
+        pattern = f"{skip_prefix}%"
+        return self.execute_query(query, (after_id, before_date, pattern, pattern, limit), fetch=True)
+    
+    def replace_evidence_images(self, replacements: List[Tuple[int, date, str, str, str]]) -> List[str]:
+        """
+        Point evidence image columns at new files, in one transaction
+        replacements: (attendance_id, attendance_date, column, old_path, new_path)
+        A row only changes if it still holds old_path. Recognition logs written
+        around the same day that reference old_path are repointed too.
+        Returns the old paths no attendance record references any more, which
+        are then safe to delete.
+        """
+        if not replacements:
+            return []
+        
+        by_column = {}
+        for attendance_id, _, column, old_path, new_path in replacements:
+            if column not in self.EVIDENCE_IMAGE_COLUMNS:
+                raise ValueError(f"Not an evidence image column: {column}")
+            by_column.setdefault(column, []).append((new_path, attendance_id, old_path))
+        
+        # Logs are written at recognition time, so the log window is the attendance day
+        # (plus one for check-outs after midnight); idx_timestamp keeps this a range scan
+        log_updates = {}
+        for _, attendance_date, _, old_path, new_path in replacements:
+            log_updates[old_path] = (new_path, old_path, attendance_date, attendance_date + timedelta(days=2))
+        
+        # Images are deduplicated per day, so any other reference is within a day of the batch
+        dates = [replacement[1] for replacement in replacements]
+        old_paths = list(log_updates)
+        placeholders = ', '.join(['%s'] * len(old_paths))
+        
+        with self.transaction(prepared=False) as tx:
+            for column, params in by_column.items():
+                tx.executemany(f"""
+                    UPDATE attendance_records SET {column} = %s
+                    WHERE attendance_id = %s AND {column} = %s
+                """, params)
+            tx.executemany("""
+                UPDATE recognition_logs SET image_path = %s
+                WHERE image_path = %s AND timestamp >= %s AND timestamp < %s
+            """, list(log_updates.values()))
+            
+            rows = tx.fetchall(f"""
+                SELECT check_in_image_path, check_out_image_path
+                FROM attendance_records
+                WHERE attendance_date BETWEEN %s AND %s
+                  AND (check_in_image_path IN ({placeholders}) OR check_out_image_path IN ({placeholders}))
+            """, (min(dates) - timedelta(days=1), max(dates) + timedelta(days=1), *old_paths, *old_paths))
+        
+        referenced = {row[column] for row in rows for column in self.EVIDENCE_IMAGE_COLUMNS}
+        return [path for path in old_paths if path not in referenced]
+    
     # ========== RECOGNITION LOG OPERATIONS ==========
     
+    @timed
     def log_recognition(self, employee_id: Optional[int], recognized_name: str, 
                        confidence_score: float, image_path: str, 
                        recognition_status: str, processing_time_ms: int) -> int:
@@ -288,16 +1053,50 @@ class DatabaseManager:
                  recognition_status, processing_time_ms)
         return self.execute_query(query, params)
     
-    def get_recognition_logs(self, limit: int = 100) -> List[Dict]:
-        """Get recent recognition logs"""
+    def get_recognition_logs(self, limit: int = 100, before_id: int = None) -> List[Dict]:
+        """
+        Get recent recognition logs, newest first
+        log_id grows with time, so this walks the primary key backwards;
+        pass the last log_id seen as before_id for the next page
+        """
         query = """
             SELECT rl.*, e.full_name 
             FROM recognition_logs rl
             LEFT JOIN employees e ON rl.employee_id = e.employee_id
-            ORDER BY rl.timestamp DESC
+        """
+        params = []
+        if before_id:
+            query += " WHERE rl.log_id < %s"
+            params.append(before_id)
+        
+        query += " ORDER BY rl.log_id DESC LIMIT %s"
+        params.append(limit)
+        return self.execute_query(query, tuple(params), fetch=True)
+    
+    def get_recognition_logs_before(self, cutoff: datetime, after_id: int, limit: int) -> List[Dict]:
+        """Get logs older than cutoff in log_id order, starting after after_id (for archiving)"""
+        query = """
+            SELECT log_id, employee_id, recognized_name, confidence_score, image_path,
+                   recognition_status, processing_time_ms, timestamp
+            FROM recognition_logs
+            WHERE log_id > %s AND timestamp < %s
+            ORDER BY log_id
             LIMIT %s
         """
-        return self.execute_query(query, (limit,), fetch=True)
+        return self.execute_query(query, (after_id, cutoff, limit), fetch=True)
+    
+    def count_recognition_logs_before(self, cutoff: datetime) -> int:
+        query = "SELECT COUNT(*) AS count FROM recognition_logs WHERE timestamp < %s"
+        result = self.execute_query(query, (cutoff,), fetch=True)
+        return result[0]['count'] if result else 0
+    
+    def delete_recognition_logs(self, first_id: int, last_id: int, cutoff: datetime) -> int:
+        """Delete expired logs in a log_id range; returns rows deleted"""
+        with self.transaction(prepared=False) as tx:
+            return tx.execute("""
+                DELETE FROM recognition_logs
+                WHERE log_id BETWEEN %s AND %s AND timestamp < %s
+            """, (first_id, last_id, cutoff)).rowcount
     
     # ========== SYSTEM SETTINGS OPERATIONS ==========
     
@@ -321,3 +1120,67 @@ class DatabaseManager:
         """Close all connections"""
         # Connection pool handles this automatically
         pass
+
+
+class Transaction:
+    """
+    Statements of one DatabaseManager.transaction() scope
+    Each distinct statement run through execute() is prepared once and its
+    cursor reused for the rest of the scope, so statements repeated in a
+    loop (replaying a batch of events, per-employee summary updates) skip
+    re-parsing. Prepared statements are dropped when the pooled connection
+    is reset on return, so the cache lives only as long as the scope.
+    """
+    def __init__(self, connection, prepared: bool = True):
+        self.connection = connection
+        self.use_prepared = prepared
+        self._cursor = connection.cursor(dictionary=True)
+        self._prepared = {}
+    
+    def execute(self, query: str, params: tuple = ()):
+        """Execute one statement; returns the cursor (lastrowid, rowcount, fetchall)"""
+        cursor = self._statement_cursor(query)
+        cursor.execute(query, params)
+        return cursor
+    
+    def fetchall(self, query: str, params: tuple = ()) -> List[Dict]:
+        return self.execute(query, params).fetchall()
+    
+    def savepoint(self, name: str):
+        self._cursor.execute(f"SAVEPOINT {name}")
+    
+    def rollback_to(self, name: str):
+        """Undo the statements run since the savepoint; the transaction stays open"""
+        self._cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+    
+    def release(self, name: str):
+        self._cursor.execute(f"RELEASE SAVEPOINT {name}")
+    
+    def executemany(self, query: str, seq_params: List[tuple]) -> int:
+        """
+        Execute a statement for every parameter tuple
+        Uses the text protocol so INSERT ... VALUES batches are rewritten into
+        one multi-row statement; returns rowcount
+        """
+        if not seq_params:
+            return 0
+        self._cursor.executemany(query, seq_params)
+        return self._cursor.rowcount
+    
+    def _statement_cursor(self, query: str):
+        if not self.use_prepared:
+            return self._cursor
+        
+        cursor = self._prepared.get(query)
+        if cursor is None:
+            cursor = self.connection.cursor(prepared=True, dictionary=True)
+            self._prepared[query] = cursor
+        return cursor
+    
+    def close(self):
+        for cursor in [self._cursor, *self._prepared.values()]:
+            try:
+                cursor.close()
+            except Error:
+                pass
+        self._prepared = {}
@@ -0,0 +1,218 @@
+import csv
+import io
+import zlib
+import time
+from datetime import date
+from typing import Iterable, Iterator, List, Dict
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+EXPORT_FIELDS = ['attendance_date', 'employee_code', 'full_name', 'department', 'position',
+                 'check_in_time', 'check_out_time', 'status',
+                 'check_in_confidence', 'check_out_confidence', 'location', 'notes']
+
+# Arrow column types by field name; anything not listed is exported as a string
+FIELD_TYPES = {
+    'attendance_id': 'int64',
+    'employee_id': 'int64',
+    'attendance_date': 'date',
+    'check_in_time': 'timestamp',
+    'check_out_time': 'timestamp',
+    'check_in_confidence': 'float',
+    'check_out_confidence': 'float',
+    # recognition_logs archives
+    'log_id': 'int64',
+    'confidence_score': 'float',
+    'processing_time_ms': 'int64',
+    'timestamp': 'timestamp'
+}
+
+class AttendanceExporter:
+    """
+    Bulk attendance export to CSV, Parquet or Arrow IPC
+    Rows arrive from DatabaseManager.iter_attendance_export in chunks and are
+    encoded chunk by chunk, so memory stays at one chunk plus writer buffers
+    whatever the date range.
+    """
+    FORMATS = ('csv', 'parquet', 'arrow')
+
+    def __init__(self, db_manager=None, chunk_size: int = None):
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size or Config.EXPORT_CHUNK_SIZE
+
+    @staticmethod
+    def file_name(fmt: str, start_date: date, end_date: date, compress: bool = False) -> str:
+        """Default file name for an export"""
+        name = f"attendance_{start_date.isoformat()}_{end_date.isoformat()}.{fmt}"
+        # Parquet/Arrow compress internally
+        if compress and fmt == 'csv':
+            name += '.gz'
+        return name
+
+    @staticmethod
+    def media_type(fmt: str, compress: bool = False) -> str:
+        if fmt == 'csv':
+            return 'application/gzip' if compress else 'text/csv'
+        if fmt == 'parquet':
+            return 'application/vnd.apache.parquet'
+        return 'application/vnd.apache.arrow.stream'
+
+    def stream(self, fmt: str, start_date: date, end_date: date, fields: List[str] = None,
+               compress: bool = False) -> Iterator[bytes]:
+        """Encoded export of attendance rows from the database, as byte chunks"""
+        fields = list(fields) if fields else list(EXPORT_FIELDS)
+        chunks = self.db_manager.iter_attendance_export(fields, start_date, end_date, self.chunk_size)
+        return self.encode(chunks, fields, fmt, compress)
+
+    def encode(self, chunks: Iterable[List[tuple]], fields: List[str], fmt: str,
+               compress: bool = False) -> Iterator[bytes]:
+        """
+        Encode row chunks (lists of tuples ordered like fields) into byte chunks
+        compress gzips CSV output; Parquet and Arrow use their own codecs instead
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        if fmt == 'csv':
+            encoded = self._encode_csv(chunks, fields)
+            return self._gzip(encoded) if compress else encoded
+
+        # pyarrow is only needed for Parquet/Arrow and is slow to import
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("pyarrow is required for Parquet/Arrow exports (pip install pyarrow)")
+
+        if fmt == 'parquet':
+            return self._encode_parquet(chunks, fields, compress)
+        return self._encode_arrow(chunks, fields, compress)
+
+    def write(self, path: str, fmt: str, start_date: date, end_date: date,
+              fields: List[str] = None, compress: bool = False) -> Dict:
+        """
+        Export to a file, writing to a temporary name first
+        Returns: {path, bytes, seconds}
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        started = time.perf_counter()
+        written = 0
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, 'wb') as output:
+                for data in self.stream(fmt, start_date, end_date, fields, compress):
+                    output.write(data)
+                    written += len(data)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return {'path': path, 'bytes': written, 'seconds': time.perf_counter() - started}
+
+    @staticmethod
+    def _encode_csv(chunks: Iterable[List[tuple]], fields: List[str]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+
+        for rows in chunks:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def _gzip(encoded: Iterator[bytes]) -> Iterator[bytes]:
+        # wbits=31 writes a gzip header, so the output is a regular .gz file
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for data in encoded:
+            compressed = compressor.compress(data)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def _encode_parquet(self, chunks: Iterable[List[tuple]], fields: List[str],
+                        compress: bool) -> Iterator[bytes]:
+        import pyarrow.parquet as pq
+
+        schema = self._arrow_schema(fields)
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression='zstd' if compress else 'snappy')
+        try:
+            for rows in chunks:
+                # One row group per chunk
+                writer.write_batch(self._record_batch(rows, schema))
+                yield from sink.drain()
+        finally:
+            writer.close()
+        yield from sink.drain()
+
+    def _encode_arrow(self, chunks: Iterable[List[tuple]], fields: List[str],
+                      compress: bool) -> Iterator[bytes]:
+        import pyarrow as pa
+
+        schema = self._arrow_schema(fields)
+        sink = _ChunkSink()
+        options = pa.ipc.IpcWriteOptions(compression='zstd' if compress else None)
+        writer = pa.ipc.new_stream(sink, schema, options=options)
+        try:
+            for rows in chunks:
+                writer.write_batch(self._record_batch(rows, schema))
+                yield from sink.drain()
+        finally:
+            writer.close()
+        yield from sink.drain()
+
+    @staticmethod
+    def _arrow_schema(fields: List[str]):
+        import pyarrow as pa
+
+        types = {
+            'int64': pa.int64(),
+            'date': pa.date32(),
+            'timestamp': pa.timestamp('us'),
+            'float': pa.float64()
+        }
+        return pa.schema([(field, types.get(FIELD_TYPES.get(field), pa.string())) for field in fields])
+
+    @staticmethod
+    def _record_batch(rows: List[tuple], schema):
+        import pyarrow as pa
+
+        columns = list(zip(*rows)) if rows else [()] * len(schema)
+        arrays = [pa.array(column, type=field.type) for column, field in zip(columns, schema)]
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator"""
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> List[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
@@ -0,0 +1,380 @@
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Tuple
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+class AttendanceJournal:
+    """
+    Append-only local journal of attendance events (SQLite)
+    Check-ins and check-outs are committed here first, so a kiosk only waits
+    for a local disk write and nothing is lost while MySQL is unreachable.
+    JournalReplayer drains pending events to MySQL in the background.
+    The last gallery loaded from MySQL is kept here too, so a worker that
+    starts while MySQL is down can still recognize and journal attendance.
+    """
+    def __init__(self, journal_path: str = None):
+        self.journal_path = journal_path or Config.JOURNAL_PATH
+        
+        journal_dir = os.path.dirname(self.journal_path)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.journal_path, check_same_thread=False,
+                                           isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._create_tables()
+        
+        print(f"✓ Attendance journal opened ({self.journal_path})")
+    
+    def _create_tables(self):
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT UNIQUE NOT NULL,
+                event_type TEXT NOT NULL,
+                employee_id INTEGER NOT NULL,
+                confidence REAL,
+                image_path TEXT,
+                event_time TEXT NOT NULL,
+                attendance_date TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                result_message TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                applied_at TEXT
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_status ON events (status, event_id)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_employee_date "
+            "ON events (employee_id, attendance_date, event_type)"
+        )
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS gallery_cache (
+                cache_id INTEGER PRIMARY KEY CHECK (cache_id = 1),
+                version INTEGER NOT NULL,
+                encodings BLOB NOT NULL,
+                employees TEXT NOT NULL,
+                saved_at TEXT NOT NULL
+            )
+        """)
+    
+    def record_check_in(self, employee_id: int, confidence: float,
+                        image_path: str = None) -> Tuple[bool, str]:
+        """Journal a check-in, rejecting duplicates already journaled today"""
+        return self._record('check_in', employee_id, confidence, image_path)
+    
+    def record_check_out(self, employee_id: int, confidence: float,
+                         image_path: str = None) -> Tuple[bool, str]:
+        """
+        Journal a check-out, rejecting duplicates already journaled today
+        Without a check-in journaled today the check-in can only be verified
+        in MySQL, so the check-out is accepted as pending verification
+        """
+        return self._record('check_out', employee_id, confidence, image_path)
+    
+    def record_check_ins(self, check_ins: List[Tuple[int, float]],
+                         image_path: str = None) -> Dict[int, Tuple[bool, str]]:
+        """
+        Journal several check-ins in one local transaction
+        Returns: {employee_id: (success, message)}
+        """
+        now = datetime.now()
+        outcomes = {}
+        
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                for employee_id, confidence in check_ins:
+                    outcomes[employee_id] = self._insert_event(
+                        'check_in', employee_id, confidence, image_path, now
+                    )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        
+        return outcomes
+    
+    def _record(self, event_type: str, employee_id: int, confidence: float,
+                image_path: Optional[str]) -> Tuple[bool, str]:
+        now = datetime.now()
+        
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                outcome = self._insert_event(event_type, employee_id, confidence, image_path, now)
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        
+        return outcome
+    
+    def _insert_event(self, event_type: str, employee_id: int, confidence: float,
+                      image_path: Optional[str], event_time: datetime) -> Tuple[bool, str]:
+        """Insert one event inside an open local transaction"""
+        attendance_date = event_time.date().isoformat()
+        
+        duplicate = self._connection.execute("""
+            SELECT 1 FROM events
+            WHERE employee_id = ? AND attendance_date = ? AND event_type = ? AND status NOT IN ('rejected', 'failed')
+            LIMIT 1
+        """, (employee_id, attendance_date, event_type)).fetchone()
+        
+        if duplicate:
+            label = "checked in" if event_type == 'check_in' else "checked out"
+            return False, f"Already {label} today"
+        
+        verified = True
+        if event_type == 'check_out':
+            verified = self._connection.execute("""
+                SELECT 1 FROM events
+                WHERE employee_id = ? AND attendance_date = ? AND event_type = 'check_in' AND status NOT IN ('rejected', 'failed')
+                LIMIT 1
+            """, (employee_id, attendance_date)).fetchone() is not None
+        
+        self._connection.execute("""
+            INSERT INTO events
+            (idempotency_key, event_type, employee_id, confidence, image_path, event_time, attendance_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (str(uuid.uuid4()), event_type, employee_id, confidence, image_path,
+              event_time.isoformat(sep=' '), attendance_date))
+        
+        if not verified:
+            return True, "Check-out pending verification (no check-in recorded here today)"
+        label = "Check-in" if event_type == 'check_in' else "Check-out"
+        return True, f"{label} recorded"
+    
+    def get_pending(self, limit: int) -> List[Dict]:
+        """Get the oldest pending events, in journal order"""
+        with self._lock:
+            rows = self._connection.execute("""
+                SELECT * FROM events WHERE status = 'pending'
+                ORDER BY event_id LIMIT ?
+            """, (limit,)).fetchall()
+        
+        events = []
+        for row in rows:
+            event = dict(row)
+            event['event_time'] = datetime.fromisoformat(event['event_time'])
+            events.append(event)
+        return events
+    
+    def mark_results(self, outcomes: Dict[str, Tuple[bool, str]]):
+        """Record the MySQL outcome of replayed events"""
+        applied_at = datetime.now().isoformat(sep=' ')
+        params = [('applied' if success else 'rejected', message, applied_at, key)
+                  for key, (success, message) in outcomes.items()]
+        
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany("""
+                    UPDATE events SET status = ?, result_message = ?, applied_at = ?,
+                        attempts = attempts + 1
+                    WHERE idempotency_key = ?
+                """, params)
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+    
+    def mark_errors(self, errors: Dict[str, str], max_attempts: int = None) -> List[str]:
+        """
+        Record events MySQL raised on; they stay pending until they have
+        failed max_attempts times, then are set aside as 'failed' so later
+        events can still be replayed
+        Returns: keys of the events just marked failed
+        """
+        max_attempts = max_attempts or Config.JOURNAL_MAX_ATTEMPTS
+        failed_at = datetime.now().isoformat(sep=' ')
+        keys = list(errors)
+        placeholders = ', '.join('?' * len(keys))
+        
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany(
+                    "UPDATE events SET attempts = attempts + 1, result_message = ? WHERE idempotency_key = ?",
+                    [(message, key) for key, message in errors.items()]
+                )
+                failed = [row['idempotency_key'] for row in self._connection.execute(f"""
+                    SELECT idempotency_key FROM events
+                    WHERE idempotency_key IN ({placeholders}) AND attempts >= ?
+                """, (*keys, max_attempts)).fetchall()]
+                self._connection.executemany(
+                    "UPDATE events SET status = 'failed', applied_at = ? WHERE idempotency_key = ?",
+                    [(failed_at, key) for key in failed]
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        
+        return failed
+    
+    def get_failed(self, limit: int = 20) -> List[Dict]:
+        """The most recent events set aside as 'failed', for an operator to look at"""
+        with self._lock:
+            rows = self._connection.execute("""
+                SELECT idempotency_key, event_type, employee_id, event_time, attempts, result_message
+                FROM events WHERE status = 'failed'
+                ORDER BY event_id DESC LIMIT ?
+            """, (limit,)).fetchall()
+        return [dict(row) for row in rows]
+    
+    def prune(self, retention_days: int = None) -> int:
+        """Delete replayed events older than the retention period (failed ones are kept)"""
+        retention_days = retention_days if retention_days is not None else Config.JOURNAL_RETENTION_DAYS
+        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat(sep=' ')
+        
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM events WHERE status IN ('applied', 'rejected') AND event_time < ?", (cutoff,)
+            )
+        return cursor.rowcount
+    
+    def save_gallery(self, version: int, encodings: np.ndarray, employees: List[Dict]):
+        """Keep a copy of the gallery for startups without MySQL"""
+        data = np.ascontiguousarray(encodings, dtype=np.float64).tobytes()
+        with self._lock:
+            self._connection.execute("""
+                INSERT OR REPLACE INTO gallery_cache (cache_id, version, encodings, employees, saved_at)
+                VALUES (1, ?, ?, ?, ?)
+            """, (version, data, json.dumps(list(employees)), datetime.now().isoformat(sep=' ')))
+    
+    def load_gallery(self) -> Optional[Tuple[int, np.ndarray, List[Dict]]]:
+        """
+        The last saved gallery, or None if none was saved
+        Returns: (version, encodings matrix, employee metadata list)
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, encodings, employees FROM gallery_cache WHERE cache_id = 1"
+            ).fetchone()
+        if row is None:
+            return None
+        encodings = np.frombuffer(row['encodings'], dtype=np.float64).reshape(-1, 128)
+        return row['version'], encodings, json.loads(row['employees'])
+    
+    def get_stats(self) -> Dict:
+        """Count events by status"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT status, COUNT(*) AS count FROM events GROUP BY status"
+            ).fetchall()
+        return {row['status']: row['count'] for row in rows}
+    
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class JournalReplayer:
+    """
+    Background thread draining the local journal into MySQL
+    Events are sent in batches, one MySQL transaction per batch; if the
+    batch fails (MySQL unreachable) it stays pending and is retried with
+    exponential backoff. An event that fails on its own is retried on the
+    next pass and set aside as 'failed' after JOURNAL_MAX_ATTEMPTS tries.
+    """
+    def __init__(self, journal: AttendanceJournal, db_manager, interval: float = None,
+                 batch_size: int = None):
+        self.journal = journal
+        self.db_manager = db_manager
+        self.interval = interval or Config.JOURNAL_REPLAY_INTERVAL
+        self.batch_size = batch_size or Config.JOURNAL_REPLAY_BATCH_SIZE
+        self.max_attempts = Config.JOURNAL_MAX_ATTEMPTS
+        self.max_backoff = 60.0
+        
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.replayed = 0
+        self.last_error = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="journal-replayer", daemon=True)
+        self._thread.start()
+        print("✓ Journal replayer started")
+    
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+    
+    def replay_once(self) -> int:
+        """
+        Replay pending events until the journal is drained
+        Returns: number of events applied
+        """
+        total = 0
+        
+        while True:
+            events = self.journal.get_pending(self.batch_size)
+            if not events:
+                return total
+            
+            outcomes, errors = self.db_manager.apply_attendance_events(events)
+            
+            self.journal.mark_results(outcomes)
+            total += len(outcomes)
+            self.replayed += len(outcomes)
+            
+            if errors:
+                failed = self.journal.mark_errors(errors, self.max_attempts)
+                for key in failed:
+                    print(f"✗ Journaled event {key} failed {self.max_attempts} times and was set aside: {errors[key]}")
+                # Events still pending are retried on the next pass, not in a tight loop
+                if len(failed) < len(errors):
+                    self.last_error = next(iter(errors.values()))
+                    return total
+            
+            if len(events) < self.batch_size:
+                return total
+    
+    def prune(self, retention_days: int = None):
+        """
+        Delete replayed journal events and the MySQL idempotency keys
+        (processed_events) past the retention period. A key is recorded when
+        its event is applied, never before the event happened, so it always
+        outlives the journal entry that could resend it
+        """
+        retention_days = retention_days if retention_days is not None else Config.JOURNAL_RETENTION_DAYS
+        pruned = self.journal.prune(retention_days)
+        keys = self.db_manager.delete_processed_events(datetime.now() - timedelta(days=retention_days))
+        if pruned or keys:
+            print(f"✓ Pruned {pruned} journaled event(s) and {keys} processed event key(s)")
+    
+    def _run(self):
+        delay = self.interval
+        last_prune = None
+        
+        while not self._stop_event.wait(delay):
+            try:
+                self.last_error = None
+                replayed = self.replay_once()
+                if replayed:
+                    print(f"✓ Replayed {replayed} journaled attendance event(s)")
+                delay = self.interval
+                
+                if last_prune != datetime.now().date():
+                    self.prune()
+                    last_prune = datetime.now().date()
+            except Exception as e:
+                self.last_error = str(e)
+                delay = min(delay * 2, self.max_backoff)
+                print(f"Warning: Journal replay failed, retrying in {delay:.0f}s: {e}")
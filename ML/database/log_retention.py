@@ -0,0 +1,99 @@
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from database.export import AttendanceExporter
+
+LOG_FIELDS = ['log_id', 'employee_id', 'recognized_name', 'confidence_score', 'image_path',
+              'recognition_status', 'processing_time_ms', 'timestamp']
+
+class RecognitionLogArchiver:
+    """
+    Retention for recognition_logs
+    Rows older than the retention period are copied, in log_id order and one
+    batch at a time, into compressed files under
+    <archive_path>/<YYYY-MM>/recognition_logs_<first_id>_<last_id>.<format>
+    and then deleted by primary-key range. Keeping the live table to the
+    retention window keeps inserts and recent-log queries fast.
+
+    Each batch is written to its file atomically before its rows are deleted,
+    and file names come from the batch's log_id range, so a run interrupted
+    at any point can simply be started again.
+    """
+    def __init__(self, db_manager, retention_days: int = None, archive_path: str = None,
+                 archive_format: str = None, batch_size: int = None):
+        self.db_manager = db_manager
+        self.retention_days = retention_days if retention_days is not None else Config.LOG_RETENTION_DAYS
+        self.archive_path = archive_path or Config.LOG_ARCHIVE_PATH
+        self.archive_format = archive_format or Config.LOG_ARCHIVE_FORMAT
+        self.batch_size = batch_size or Config.LOG_ARCHIVE_BATCH_SIZE
+        self.encoder = AttendanceExporter()
+
+    def cutoff(self) -> datetime:
+        return datetime.now() - timedelta(days=self.retention_days)
+
+    def run(self, archive: bool = True, dry_run: bool = False) -> Dict:
+        """
+        Archive (optionally) and delete every row older than the retention period
+        Returns: {rows, files, bytes, seconds}
+        """
+        cutoff = self.cutoff()
+        started = time.perf_counter()
+        stats = {'rows': 0, 'files': 0, 'bytes': 0, 'cutoff': cutoff.isoformat(sep=' ')}
+
+        if dry_run:
+            stats['rows'] = self.db_manager.count_recognition_logs_before(cutoff)
+            stats['seconds'] = time.perf_counter() - started
+            return stats
+
+        after_id = 0
+        while True:
+            records = self.db_manager.get_recognition_logs_before(cutoff, after_id, self.batch_size)
+            if not records:
+                break
+
+            rows = [tuple(record[field] for field in LOG_FIELDS) for record in records]
+            first_id, last_id = rows[0][0], rows[-1][0]
+            if archive:
+                stats['bytes'] += self._write_batch(rows)
+                stats['files'] += 1
+
+            stats['rows'] += self.db_manager.delete_recognition_logs(first_id, last_id, cutoff)
+            after_id = last_id
+
+            if len(records) < self.batch_size:
+                break
+
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+    def _write_batch(self, rows: List[tuple]) -> int:
+        """Write one batch to its archive file; returns bytes written"""
+        first_id, last_id = rows[0][0], rows[-1][0]
+        month = rows[0][LOG_FIELDS.index('timestamp')].strftime('%Y-%m')
+        extension = 'csv.gz' if self.archive_format == 'csv' else self.archive_format
+
+        directory = os.path.join(self.archive_path, month)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"recognition_logs_{first_id:012d}_{last_id:012d}.{extension}")
+        temp_path = f"{path}.tmp"
+
+        written = 0
+        try:
+            with open(temp_path, 'wb') as output:
+                for data in self.encoder.encode([rows], LOG_FIELDS, self.archive_format, compress=True):
+                    output.write(data)
+                    written += len(data)
+                output.flush()
+                os.fsync(output.fileno())
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return written
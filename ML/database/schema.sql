@@ -33,6 +33,21 @@ CREATE TABLE IF NOT EXISTS face_encodings (
     INDEX idx_primary (employee_id, is_primary)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Employee Centroids Table
+-- Mean face encoding per employee, used to shortlist employees before
+-- comparing against their individual encodings, and the distance to the
+-- employee's farthest encoding (radius); kept current by every
+-- face_encodings write in the same transaction; rebuild with
+-- `python main.py rebuild-centroids`
+CREATE TABLE IF NOT EXISTS employee_centroids (
+    employee_id INT PRIMARY KEY,
+    centroid BLOB NOT NULL,
+    encoding_count INT NOT NULL,
+    radius DOUBLE NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (employee_id) REFERENCES employees(employee_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Attendance Records Table
 CREATE TABLE IF NOT EXISTS attendance_records (
     attendance_id INT PRIMARY KEY AUTO_INCREMENT,
@@ -70,6 +85,46 @@ CREATE TABLE IF NOT EXISTS recognition_logs (
     INDEX idx_status (recognition_status)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Processed Events Table
+-- Idempotency keys of journaled attendance events already applied; pruned
+-- daily by the journal replayer after JOURNAL_RETENTION_DAYS
+CREATE TABLE IF NOT EXISTS processed_events (
+    idempotency_key CHAR(36) PRIMARY KEY,
+    event_type ENUM('check_in', 'check_out') NOT NULL,
+    employee_id INT NOT NULL,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_processed_at (processed_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Daily Attendance Summary Table
+-- Rollup of attendance_records per date and department, kept current by
+-- check-in/check-out in the same transaction; rebuild with
+-- `python main.py rebuild-summary`
+CREATE TABLE IF NOT EXISTS daily_attendance_summary (
+    summary_date DATE NOT NULL,
+    department VARCHAR(50) NOT NULL DEFAULT '',
+    total_records INT NOT NULL DEFAULT 0,
+    checked_in INT NOT NULL DEFAULT 0,
+    checked_out INT NOT NULL DEFAULT 0,
+    present INT NOT NULL DEFAULT 0,
+    late INT NOT NULL DEFAULT 0,
+    absent INT NOT NULL DEFAULT 0,
+    half_day INT NOT NULL DEFAULT 0,
+    on_leave INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (summary_date, department)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Gallery State Table
+-- Single row; version is bumped whenever the recognizable face gallery changes
+CREATE TABLE IF NOT EXISTS gallery_state (
+    state_id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO gallery_state (state_id, version) VALUES (1, 1);
+
 -- System Settings Table
 CREATE TABLE IF NOT EXISTS system_settings (
     setting_id INT PRIMARY KEY AUTO_INCREMENT,
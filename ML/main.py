@@ -3,18 +3,29 @@
 Face Recognition Attendance System - Main Entry Point
 """
 
+import argparse
+import threading
+import time
 import sys
 import os
-from datetime import datetime
+from datetime import datetime, date
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from config.config import Config
 from database.db_manager import DatabaseManager
+from database.export import AttendanceExporter
+from database.log_retention import RecognitionLogArchiver
 from models.face_recognizer import FaceRecognizer
+from models.shared_gallery import SharedGallery
 from core.enrollment import FaceEnrollment
 from core.attendance import AttendanceManager
+from core.video_batch import VideoBatchProcessor
+from core.multi_camera import MultiCameraOrchestrator
+from utils.image_archiver import EvidenceImageArchiver
+from utils.image_store import ImageStore
+from utils.profiling import SamplingProfiler, timings
 
 class AttendanceSystem:
     def __init__(self):
@@ -166,8 +177,324 @@ class AttendanceSystem:
         self.enrollment.cleanup()
         self.attendance.cleanup()
 
+def rebuild_summary(args):
+    """Backfill the daily attendance summary from attendance records"""
+    db_manager = DatabaseManager()
+    try:
+        rows = db_manager.rebuild_daily_summary(args.start, args.end)
+        print(f"✓ Rebuilt daily attendance summary ({rows} rows)")
+    finally:
+        db_manager.close()
+
+def rebuild_centroids(args):
+    """Backfill employee_centroids from face_encodings"""
+    db_manager = DatabaseManager()
+    try:
+        count = db_manager.rebuild_employee_centroids()
+        print(f"✓ Rebuilt {count} employee centroids")
+    finally:
+        db_manager.close()
+
+def export_attendance(args):
+    """Export attendance records for a date range to a file"""
+    output = args.output or os.path.join(
+        Config.EXPORT_PATH, AttendanceExporter.file_name(args.format, args.start, args.end, args.gzip)
+    )
+    fields = [field.strip() for field in args.fields.split(',') if field.strip()] if args.fields else None
+    
+    db_manager = DatabaseManager()
+    try:
+        exporter = AttendanceExporter(db_manager, args.chunk_size)
+        result = exporter.write(output, args.format, args.start, args.end, fields, args.gzip)
+        print(f"✓ Exported attendance to {result['path']} "
+              f"({result['bytes'] / 1024 / 1024:.1f} MB in {result['seconds']:.1f}s)")
+    finally:
+        db_manager.close()
+
+def prune_logs(args):
+    """Archive and delete recognition logs older than the retention period"""
+    db_manager = DatabaseManager()
+    try:
+        archiver = RecognitionLogArchiver(db_manager, retention_days=args.retention_days,
+                                          archive_format=args.format)
+        result = archiver.run(archive=not args.no_archive, dry_run=args.dry_run)
+        if args.dry_run:
+            print(f"{result['rows']} recognition logs older than {result['cutoff']} would be removed")
+        else:
+            print(f"✓ Removed {result['rows']} recognition logs older than {result['cutoff']} "
+                  f"({result['files']} archive files, {result['bytes'] / 1024 / 1024:.1f} MB, "
+                  f"{result['seconds']:.1f}s)")
+    finally:
+        db_manager.close()
+
+def archive_images(args):
+    """Recompress evidence images older than the archive period"""
+    if not args.dry_run and hasattr(os, 'nice'):
+        # Yield the CPU to recognition running on the same machine
+        os.nice(10)
+    
+    db_manager = DatabaseManager()
+    try:
+        archiver = EvidenceImageArchiver(db_manager, older_than_days=args.older_than_days,
+                                         image_format=args.format, quality=args.quality,
+                                         max_dimension=args.max_dimension, workers=args.workers,
+                                         rate=args.rate, hours=args.hours)
+        result = archiver.run(dry_run=args.dry_run)
+        if args.dry_run:
+            print(f"{result['images']} evidence images ({result['bytes_before'] / 1024 / 1024:.1f} MB) "
+                  f"from before {result['cutoff']} would be recompressed")
+        else:
+            print(f"✓ Recompressed {result['images']} evidence images from before {result['cutoff']}: "
+                  f"{result['bytes_before'] / 1024 / 1024:.1f} MB -> {result['bytes_after'] / 1024 / 1024:.1f} MB, "
+                  f"{result['bytes_reclaimed'] / 1024 / 1024:.1f} MB reclaimed ({result['seconds']:.1f}s)")
+        if result['missing'] or result['failed']:
+            print(f"⚠ {result['missing']} missing, {result['failed']} failed")
+        if result['stopped']:
+            print(f"⚠ Stopped early: {result['stopped']} (run again to resume)")
+    finally:
+        db_manager.close()
+
+def process_video(args):
+    """Recognize employees in a recorded video and report (or record) their attendance"""
+    if args.record and args.start is None:
+        print("✗ --record needs --start (the wall-clock time of the first frame)")
+        sys.exit(1)
+    
+    db_manager = DatabaseManager()
+    face_recognizer = FaceRecognizer(db_manager, SharedGallery() if Config.GALLERY_SHARED_MEMORY else None)
+    try:
+        face_recognizer.load_encodings_from_db()
+        processor = VideoBatchProcessor(face_recognizer, frame_stride=args.stride, workers=args.workers,
+                                        dedup_seconds=args.dedup_seconds, min_sightings=args.min_sightings,
+                                        max_width=args.max_width, motion_gate=not args.no_motion_gate,
+                                        check_out=args.check_out)
+        report = processor.run(args.video, args.start)
+        
+        stats = report['stats']
+        print(f"✓ Processed {stats['frames_processed']} of {stats['frames_decoded']} frames "
+              f"({stats['frames_static']} static) in {stats['seconds']:.1f}s: "
+              f"{stats['decode_fps']} decoded/s, {stats['processed_fps']} recognized/s, "
+              f"{stats['realtime_factor']}x real time")
+        if stats['frames_failed']:
+            print(f"⚠ {stats['frames_failed']} frames failed recognition and were skipped")
+        
+        confirmed = [visit for visit in report['visits'] if visit['confirmed']]
+        for visit in confirmed:
+            seen = visit.get('first_seen') or f"{visit['first_offset']:.1f}s"
+            print(f"  {visit['employee_code']:<12} {visit['full_name']:<30} {seen} "
+                  f"({visit['sightings']} sightings, {visit['best_confidence']:.2f})")
+        print(f"{len(confirmed)} visits, {len(report['visits']) - len(confirmed)} unconfirmed")
+        
+        if args.record:
+            outcomes, errors = db_manager.apply_attendance_events(report['events'])
+            for event in report['events']:
+                key = event['idempotency_key']
+                event['outcome'] = outcomes[key] if key in outcomes else (False, f"Error: {errors[key]}")
+            applied = sum(1 for success, message in outcomes.values() if success and message != "Already applied")
+            print(f"✓ Recorded {applied} of {len(report['events'])} attendance events")
+            if errors:
+                print(f"⚠ {len(errors)} events failed and were not recorded (see the report for details)")
+        
+        if args.output:
+            VideoBatchProcessor.write_report(report, args.output)
+            print(f"✓ Report written to {args.output}")
+    finally:
+        if face_recognizer.shared_gallery is not None:
+            face_recognizer.shared_gallery.close()
+        db_manager.close()
+
+def multi_camera(args):
+    """Recognize several cameras with one shared recognizer and gallery"""
+    specs = args.sources or [spec.strip() for spec in Config.MULTI_CAMERA_SOURCES.split(',') if spec.strip()]
+    if not specs:
+        print("✗ No camera sources (pass them as arguments or set MULTI_CAMERA_SOURCES)")
+        sys.exit(1)
+    
+    db_manager = DatabaseManager()
+    face_recognizer = FaceRecognizer(db_manager, SharedGallery() if Config.GALLERY_SHARED_MEMORY else None)
+    image_store = ImageStore()
+    last_seen = {}
+    seen_lock = threading.Lock()
+    
+    def on_results(stream, frame, results, processed):
+        """Announce (and optionally check in) employees not seen on this camera recently"""
+        if not processed:
+            return
+        now = time.monotonic()
+        for result in results:
+            if not result['recognized']:
+                continue
+            employee = result['employee_info']
+            key = (stream.name, employee['employee_id'])
+            with seen_lock:
+                if now - last_seen.get(key, float('-inf')) < Config.MULTI_CAMERA_DEDUP_SECONDS:
+                    last_seen[key] = now
+                    continue
+                last_seen[key] = now
+            
+            print(f"[{stream.name}] {employee['full_name']} ({result['confidence']:.2f})")
+            if args.check_in:
+                relative_path = image_store.save_image(face_recognizer.draw_results(frame, results), 'attendance')
+                success, message = db_manager.check_in(employee['employee_id'], result['confidence'], relative_path)
+                print(f"[{stream.name}] Check-in {employee['full_name']}: {message}")
+    
+    try:
+        face_recognizer.load_encodings_from_db()
+        face_recognizer.warm_up()
+        orchestrator = MultiCameraOrchestrator(face_recognizer, MultiCameraOrchestrator.parse_sources(specs),
+                                               workers=args.workers, on_results=on_results,
+                                               motion_gate=False if args.no_motion_gate else None)
+        orchestrator.start()
+        next_stats = time.monotonic() + args.stats_seconds
+        try:
+            while orchestrator.running:
+                time.sleep(min(1.0, args.stats_seconds))
+                if time.monotonic() >= next_stats:
+                    next_stats = time.monotonic() + args.stats_seconds
+                    print_camera_stats(orchestrator.get_stats())
+                    orchestrator.reset_stats()
+        except KeyboardInterrupt:
+            print("\nStopping cameras...")
+        finally:
+            orchestrator.stop()
+            print_camera_stats(orchestrator.get_stats())
+    finally:
+        if face_recognizer.shared_gallery is not None:
+            face_recognizer.shared_gallery.close()
+        db_manager.close()
+
+def print_camera_stats(stats):
+    """Print per-camera FPS and latency"""
+    print(f"{'Camera':<14} {'Capture FPS':>11} {'Recog FPS':>9} {'Static':>7} {'Dropped':>8} "
+          f"{'Latency ms':>11} {'p95 ms':>7}")
+    for name, camera in stats.items():
+        latency = camera['latency_ms_avg'] if camera['latency_ms_avg'] is not None else '-'
+        p95 = camera['latency_ms_p95'] if camera['latency_ms_p95'] is not None else '-'
+        state = '' if camera['running'] else '  (stopped)'
+        print(f"{name:<14} {camera['capture_fps']:>11} {camera['processed_fps']:>9} {camera['frames_static']:>7} "
+              f"{camera['frames_dropped']:>8} {latency:>11} {p95:>7}{state}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Face Recognition Attendance System")
+    subparsers = parser.add_subparsers(dest='command')
+    
+    rebuild = subparsers.add_parser('rebuild-summary',
+                                    help="Recompute daily_attendance_summary from attendance records")
+    rebuild.add_argument('--start', type=date.fromisoformat, help="First date (YYYY-MM-DD)")
+    rebuild.add_argument('--end', type=date.fromisoformat, help="Last date (YYYY-MM-DD)")
+    rebuild.set_defaults(handler=rebuild_summary)
+    
+    centroids = subparsers.add_parser('rebuild-centroids',
+                                      help="Recompute employee_centroids from face encodings")
+    centroids.set_defaults(handler=rebuild_centroids)
+    
+    export = subparsers.add_parser('export', help="Export attendance records to CSV/Parquet/Arrow")
+    export.add_argument('--start', type=date.fromisoformat, required=True, help="First date (YYYY-MM-DD)")
+    export.add_argument('--end', type=date.fromisoformat, required=True, help="Last date (YYYY-MM-DD)")
+    export.add_argument('--format', choices=AttendanceExporter.FORMATS, default='csv')
+    export.add_argument('--gzip', action='store_true',
+                        help="Gzip CSV output (Parquet/Arrow use internal compression)")
+    export.add_argument('--fields', help="Comma-separated columns (default: all export fields)")
+    export.add_argument('--output', help="Output file (default: EXPORT_PATH/attendance_<start>_<end>.<format>)")
+    export.add_argument('--chunk-size', type=int, default=None, help="Rows fetched per chunk")
+    export.set_defaults(handler=export_attendance)
+    
+    prune = subparsers.add_parser('prune-logs',
+                                  help="Archive and delete recognition logs past the retention period")
+    prune.add_argument('--retention-days', type=int, default=None,
+                       help="Keep this many days of logs (default: LOG_RETENTION_DAYS)")
+    prune.add_argument('--format', choices=('parquet', 'csv'), default=None,
+                       help="Archive format (default: LOG_ARCHIVE_FORMAT)")
+    prune.add_argument('--no-archive', action='store_true', help="Delete without archiving")
+    prune.add_argument('--dry-run', action='store_true', help="Only count the expired logs")
+    prune.set_defaults(handler=prune_logs)
+    
+    archive = subparsers.add_parser('archive-images',
+                                    help="Recompress old check-in/check-out evidence images")
+    archive.add_argument('--older-than-days', type=int, default=None,
+                         help="Archive images older than this (default: EVIDENCE_ARCHIVE_DAYS)")
+    archive.add_argument('--format', choices=('webp', 'jpg'), default=None,
+                         help="Archive format (default: EVIDENCE_ARCHIVE_FORMAT)")
+    archive.add_argument('--quality', type=int, default=None, help="Encoder quality, 1-100")
+    archive.add_argument('--max-dimension', type=int, default=None,
+                         help="Downscale so the longest side is at most this many px (0 = keep size)")
+    archive.add_argument('--workers', type=int, default=None, help="Recompression threads")
+    archive.add_argument('--rate', type=float, default=None, help="Max images per second (0 = unlimited)")
+    archive.add_argument('--hours', default=None, help="Only run between these hours, e.g. 20-6")
+    archive.add_argument('--dry-run', action='store_true', help="Only count the images and their size")
+    archive.set_defaults(handler=archive_images)
+    
+    video = subparsers.add_parser('process-video',
+                                  help="Recognize employees in recorded footage (e.g. entrance CCTV)")
+    video.add_argument('video', help="Video file or stream URL")
+    video.add_argument('--start', type=datetime.fromisoformat, default=None,
+                       help="Wall-clock time of the first frame (YYYY-MM-DDTHH:MM:SS)")
+    video.add_argument('--stride', type=int, default=None,
+                       help="Recognize every Nth frame (default: VIDEO_FRAME_STRIDE)")
+    video.add_argument('--workers', type=int, default=None,
+                       help="Recognition processes (default: VIDEO_WORKERS or one per core)")
+    video.add_argument('--dedup-seconds', type=float, default=None,
+                       help="Sightings closer than this belong to one visit (default: VIDEO_DEDUP_SECONDS)")
+    video.add_argument('--min-sightings', type=int, default=None,
+                       help="Frames needed to confirm a visit (default: VIDEO_MIN_SIGHTINGS)")
+    video.add_argument('--max-width', type=int, default=None, help="Downscale wider frames (0 = keep size)")
+    video.add_argument('--no-motion-gate', action='store_true', help="Recognize static frames too")
+    video.add_argument('--record', action='store_true',
+                       help="Record the first visit per employee and day as a check-in (needs --start)")
+    video.add_argument('--check-out', action='store_true',
+                       help="With --record, also record the last later visit as a check-out")
+    video.add_argument('--output', help="Write the report as .json (full) or .csv (visits)")
+    video.set_defaults(handler=process_video)
+    
+    cameras = subparsers.add_parser('multi-camera',
+                                    help="Recognize several cameras with one shared recognizer")
+    cameras.add_argument('sources', nargs='*',
+                         help="Device indexes, stream URLs or video files, optionally as name=source "
+                              "(default: MULTI_CAMERA_SOURCES)")
+    cameras.add_argument('--workers', type=int, default=None,
+                         help="Recognition threads (default: MULTI_CAMERA_WORKERS or min(cameras, cores))")
+    cameras.add_argument('--stats-seconds', type=float, default=Config.MULTI_CAMERA_STATS_SECONDS,
+                         help="How often to print per-camera stats")
+    cameras.add_argument('--no-motion-gate', action='store_true', help="Recognize static frames too")
+    cameras.add_argument('--check-in', action='store_true',
+                         help="Check in recognized employees (once per MULTI_CAMERA_DEDUP_SECONDS per camera)")
+    cameras.set_defaults(handler=multi_camera)
+    
+    parser.add_argument('--profile', type=float, metavar='SECONDS', default=None,
+                        help="Sample the process for up to SECONDS and write collapsed stacks or a .prof")
+    parser.add_argument('--profile-output', default=None,
+                        help="Profile file; .prof for pstats, anything else for collapsed stacks "
+                             "(default: PROFILE_PATH/profile_<time>.folded)")
+    
+    return parser.parse_args()
+
+def start_profile(args) -> SamplingProfiler:
+    """Start the --profile sampler in the background"""
+    profiler = SamplingProfiler().start(args.profile)
+    print(f"✓ Profiling for up to {args.profile:.0f}s")
+    return profiler
+
+def finish_profile(args, profiler: SamplingProfiler):
+    """Stop the sampler, write its output and print where the time went"""
+    profiler.stop()
+    output = args.profile_output or os.path.join(
+        Config.PROFILE_PATH, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+    )
+    profiler.write(output)
+    print(f"\n✓ Profile written to {output} ({profiler.sample_count} samples over {profiler.seconds:.1f}s)")
+    for label, milliseconds in profiler.summary(5):
+        print(f"  {milliseconds:>8.0f} ms  {label}")
+    
+    if Config.PROFILE_TIMINGS:
+        print("\nTimings (PROFILE_TIMINGS):")
+        for name, stats in list(timings.get_stats().items())[:15]:
+            print(f"  {name:<45} {stats['calls']:>7} calls {stats['total_ms']:>10.1f} ms "
+                  f"(avg {stats['avg_ms']:.2f}, max {stats['max_ms']:.1f})")
+
 def main():
     """Entry point"""
+    args = parse_args()
+    
     # Check if .env exists
     if not os.path.exists('.env'):
         print("\n⚠ Warning: .env file not found!")
@@ -187,9 +514,18 @@ def main():
         else:
             sys.exit(1)
     
-    # Initialize and run system
-    system = AttendanceSystem()
-    system.run()
+    profiler = start_profile(args) if args.profile else None
+    try:
+        if args.command:
+            args.handler(args)
+            return
+        
+        # Initialize and run system
+        system = AttendanceSystem()
+        system.run()
+    finally:
+        if profiler is not None:
+            finish_profile(args, profiler)
 
 if __name__ == "__main__":
     main()
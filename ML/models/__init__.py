@@ -1,3 +1,12 @@
 from .face_recognizer import FaceRecognizer
+from .centroid_index import CentroidIndex
+from .frame_quality import FrameQualityGate
+from .gallery_snapshot import GallerySnapshot
+from .motion_gate import MotionGate
+from .presence_filter import FacePresenceFilter
+from .quantized_gallery import QuantizedGallery
+from .roi_tracker import FaceRegionTracker
+from .shared_gallery import SharedGallery
 
-__all__ = ['FaceRecognizer']
+__all__ = ['FaceRecognizer', 'CentroidIndex', 'FrameQualityGate', 'FacePresenceFilter', 'MotionGate',
+           'GallerySnapshot', 'QuantizedGallery', 'FaceRegionTracker', 'SharedGallery']
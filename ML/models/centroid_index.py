@@ -0,0 +1,119 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+class CentroidIndex:
+    """
+    Per-employee centroids over the gallery encodings
+    A probe is scored against one centroid per employee, then compared with
+    the individual encodings of the top-k closest employees only.
+
+    Every employee also has a radius: the distance from its centroid to its
+    farthest encoding. By the triangle inequality no encoding of an employee
+    is closer to the probe than (centroid distance - radius), so after the
+    top-k pass any other employee whose bound is not above the best distance
+    found is compared too. The result is therefore always the same encoding
+    an exhaustive search would pick, whatever k is.
+
+    Stored (centroid, encoding count, radius) rows are written together from
+    the employee's encodings, so a row whose count matches the gallery is
+    used as is and that employee's encodings are not read at all. Missing
+    and stale rows are computed in one vectorized pass.
+    """
+    SLICE_LIMIT = 64
+    BOUND_SLACK = 1e-6
+
+    def __init__(self, encodings: np.ndarray, employees: List[Dict],
+                 centroids: Dict[int, Tuple[np.ndarray, int, float]] = None):
+        centroids = centroids or {}
+        employee_ids = np.array([employee['employee_id'] for employee in employees])
+
+        # Rows grouped by employee (CSR layout: rows[offsets[e]:offsets[e + 1]])
+        self.employee_ids, inverse = np.unique(employee_ids, return_inverse=True)
+        self.owners = inverse
+        self.rows = np.argsort(inverse, kind='stable')
+        counts = np.bincount(inverse, minlength=len(self.employee_ids))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        self.centroids = np.empty((len(self.employee_ids), 128), dtype=np.float64)
+        self.radii = np.empty(len(self.employee_ids), dtype=np.float64)
+        current = np.zeros(len(self.employee_ids), dtype=bool)
+        for index, employee_id in enumerate(self.employee_ids):
+            stored = centroids.get(int(employee_id))
+            if stored is not None and stored[1] == counts[index] and stored[2] is not None:
+                self.centroids[index] = np.asarray(stored[0], dtype=np.float64).reshape(128)
+                self.radii[index] = stored[2]
+                current[index] = True
+        self.persisted = int(current.sum())
+
+        stale = np.flatnonzero(~current)
+        if len(stale):
+            # Members of the stale employees, still grouped by employee in stale order
+            member_rows = self.rows[~current[self.owners[self.rows]]]
+            starts = np.concatenate(([0], np.cumsum(counts[stale])[:-1]))
+            members = encodings[member_rows]
+            self.centroids[stale] = np.add.reduceat(members, starts, axis=0) / counts[stale, None]
+            distances = np.linalg.norm(members - self.centroids[self.owners[member_rows]], axis=1)
+            self.radii[stale] = np.maximum.reduceat(distances, starts)
+
+        self.centroids.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.employee_ids)
+
+    def nearest(self, encodings: np.ndarray, probe: np.ndarray, k: int) -> Tuple[int, float, int]:
+        """
+        Exact nearest gallery row for one probe
+        Returns: (row index, distance, number of distance computations)
+        """
+        centroid_distances = np.linalg.norm(self.centroids - probe, axis=1)
+        return self._refine(encodings, probe, centroid_distances, k)
+
+    def nearest_many(self, encodings: np.ndarray, probes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact nearest gallery row for each probe
+        All probes are scored against the centroids in one matrix product;
+        only the member comparisons are done per probe.
+        Returns: (row index per probe, distance per probe)
+        """
+        squared = (np.einsum('ij,ij->i', probes, probes)[:, None]
+                   + np.einsum('ij,ij->i', self.centroids, self.centroids)[None, :]
+                   - 2.0 * probes @ self.centroids.T)
+        centroid_distances = np.sqrt(np.maximum(squared, 0.0))
+
+        rows = np.empty(len(probes), dtype=np.int64)
+        distances = np.empty(len(probes), dtype=np.float64)
+        for index, probe in enumerate(probes):
+            rows[index], distances[index], _ = self._refine(encodings, probe, centroid_distances[index], k)
+        return rows, distances
+
+    def _refine(self, encodings: np.ndarray, probe: np.ndarray, centroid_distances: np.ndarray,
+                k: int) -> Tuple[int, float, int]:
+        k = min(k, len(self.employee_ids))
+        shortlist = np.argpartition(centroid_distances, k - 1)[:k]
+
+        best_row, best_distance, compared = self._best_member(encodings, probe, shortlist)
+
+        # Employees outside the shortlist that could still hold a closer encoding
+        # (with slack for rounding in the batched centroid distances)
+        possible = np.flatnonzero(centroid_distances - self.radii <= best_distance + self.BOUND_SLACK)
+        extra = np.setdiff1d(possible, shortlist, assume_unique=True)
+        if len(extra):
+            row, distance, extra_compared = self._best_member(encodings, probe, extra)
+            compared += extra_compared
+            if distance < best_distance or (distance == best_distance and row < best_row):
+                best_row, best_distance = row, distance
+
+        return best_row, best_distance, len(self.employee_ids) + compared
+
+    def _best_member(self, encodings: np.ndarray, probe: np.ndarray,
+                     employees: np.ndarray) -> Tuple[int, float, int]:
+        if len(employees) > self.SLICE_LIMIT:
+            # Many employees (e.g. a stranger, far from everyone): one vectorized pass
+            selected = np.zeros(len(self.employee_ids), dtype=bool)
+            selected[employees] = True
+            rows = np.flatnonzero(selected[self.owners])
+        else:
+            rows = np.sort(np.concatenate([self.rows[self.offsets[e]:self.offsets[e + 1]] for e in employees]))
+        distances = np.linalg.norm(encodings[rows] - probe, axis=1)
+        best = np.argmin(distances)
+        return int(rows[best]), float(distances[best]), len(rows)
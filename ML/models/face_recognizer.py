@@ -3,6 +3,7 @@ import cv2
 import numpy as np
 from typing import List, Tuple, Optional, Dict
 import time
+import threading
 import sys
 import os
 
@@ -10,88 +11,412 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import Config
 from database.db_manager import DatabaseManager
+from models.frame_quality import FrameQualityGate
+from models.presence_filter import FacePresenceFilter
+from models.roi_tracker import FaceRegionTracker
+from models.shared_gallery import SharedGallery
+from models.gallery_snapshot import GallerySnapshot
+from utils.profiling import timed
 
 class FaceRecognizer:
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, shared_gallery: SharedGallery = None):
         self.db_manager = db_manager
-        self.known_encodings = []
-        self.known_employees = []
+        self.shared_gallery = shared_gallery
+        self.gallery = GallerySnapshot.empty()
+        self._reload_lock = threading.Lock()
+        self.last_swap_us = None
         self.recognition_threshold = Config.RECOGNITION_THRESHOLD
+        self.rerank_k = Config.GALLERY_RERANK_K
+        self.centroid_top_k = Config.GALLERY_CENTROID_TOP_K
+        self.quality_gate = FrameQualityGate()
+        self.presence_filter = FacePresenceFilter()
+        self._encode_ms_per_face = None
+        self.warmed_up = False
+        self.warmup_ms = None
         print("✓ Face Recognizer initialized")
         
+    @property
+    def known_encodings(self) -> np.ndarray:
+        return self.gallery.encodings
+    
+    @property
+    def known_employees(self) -> Tuple[Dict, ...]:
+        return self.gallery.employees
+    
+    @property
+    def gallery_version(self) -> int:
+        return self.gallery.version
+    
+    @property
+    def gallery_loaded_at(self) -> Optional[float]:
+        return self.gallery.loaded_at if self.gallery.version else None
+    
+    @timed
     def load_encodings_from_db(self):
-        """Load all face encodings from database into memory"""
+        """
+        Load all face encodings from database into memory
+        The new gallery is built as a separate snapshot and published with one
+        reference swap, so concurrent recognitions never see a partial reload.
+        With a shared gallery, only one worker per gallery version reads the
+        database; the others attach to its shared memory segment
+        """
         print("Loading face encodings from database...")
         start_time = time.time()
         
+        # Reloads are serialized; recognitions never take this lock
+        with self._reload_lock:
+            if self.shared_gallery is not None:
+                version, encodings, employees = self.shared_gallery.get(
+                    self.db_manager.get_gallery_version(), self._read_gallery_from_db
+                )
+            else:
+                version, encodings, employees = self._read_gallery_from_db()
+            
+            snapshot = GallerySnapshot(version, encodings, employees, Config.GALLERY_QUANTIZATION,
+                                       Config.GALLERY_CENTROID_PREFILTER, self._read_centroids())
+            
+            if snapshot.version < self.gallery.version:
+                print(f"✓ Gallery v{self.gallery.version} is already newer than v{snapshot.version}, keeping it")
+                return
+            
+            swap_start = time.perf_counter()
+            self.gallery = snapshot
+            self.last_swap_us = (time.perf_counter() - swap_start) * 1e6
+        
+        elapsed = time.time() - start_time
+        print(f"✓ Loaded {len(snapshot)} face encodings (gallery v{version}) in {elapsed:.2f}s, "
+              f"swap took {self.last_swap_us:.1f} µs")
+    
+    def use_cached_gallery(self, version: int, encodings: np.ndarray, employees: List[Dict]) -> bool:
+        """
+        Install a gallery saved by an earlier run, for when the database is unreachable
+        Ignored if a gallery of the same or a newer version is already loaded
+        Returns: True if it was installed
+        """
+        snapshot = GallerySnapshot(version, encodings, employees, Config.GALLERY_QUANTIZATION,
+                                   Config.GALLERY_CENTROID_PREFILTER)
+        with self._reload_lock:
+            if snapshot.version <= self.gallery.version:
+                return False
+            self.gallery = snapshot
+        
+        print(f"✓ Using cached gallery v{version} ({len(snapshot)} face encodings)")
+        return True
+    
+    @timed
+    def _read_gallery_from_db(self) -> Tuple[int, np.ndarray, List[Dict]]:
+        """
+        Read the gallery and the version it belongs to
+        The version is read first, so a change made during the load leaves
+        this copy marked stale and it is reloaded on the next poll
+        Returns: (version, encodings matrix, employee metadata list)
+        """
+        version = self.db_manager.get_gallery_version()
         encodings_data = self.db_manager.get_face_encodings()
         
-        self.known_encodings = []
-        self.known_employees = []
+        encodings = np.array([data['face_encoding'] for data in encodings_data],
+                             dtype=np.float64).reshape(-1, 128)
+        employees = [{
+            'employee_id': data['employee_id'],
+            'employee_code': data['employee_code'],
+            'full_name': data['full_name'],
+            'encoding_id': data['encoding_id']
+        } for data in encodings_data]
         
-        for data in encodings_data:
-            self.known_encodings.append(data['face_encoding'])
-            self.known_employees.append({
-                'employee_id': data['employee_id'],
-                'employee_code': data['employee_code'],
-                'full_name': data['full_name'],
-                'encoding_id': data['encoding_id']
-            })
+        return version, encodings, employees
+    
+    def _read_centroids(self) -> Optional[Dict]:
+        """Stored employee centroids; missing or stale ones are recomputed from the gallery"""
+        if not Config.GALLERY_CENTROID_PREFILTER:
+            return None
+        try:
+            return self.db_manager.get_employee_centroids()
+        except Exception as e:
+            print(f"Warning: Could not read employee centroids, computing them from the gallery: {e}")
+            return None
+    
+    def refresh_if_stale(self) -> bool:
+        """
+        Reload the gallery if another process changed it
+        Returns: True if a reload happened
+        """
+        if self.db_manager.get_gallery_version() == self.gallery_version:
+            return False
         
-        elapsed = time.time() - start_time
-        print(f"✓ Loaded {len(self.known_encodings)} face encodings in {elapsed:.2f}s")
+        self.load_encodings_from_db()
+        return True
+    
+    def warm_up(self):
+        """
+        Run the detector and encoder once on a synthetic image so the first
+        real recognition does not pay for dlib model loading and first-call
+        allocations
+        """
+        start_time = time.time()
+        
+        image = self._synthetic_face_image()
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         
-    def detect_faces(self, image: np.ndarray) -> List[Tuple[np.ndarray, Tuple]]:
+        # The synthetic face may or may not be detected, so the encoder is
+        # run on a fixed box to make sure the landmark and ResNet models load
+        face_recognition.face_locations(rgb_image, model='hog')
+        face_recognition.face_encodings(rgb_image, [(60, 260, 260, 60)])
+        
+        self.warmup_ms = (time.time() - start_time) * 1000
+        self.warmed_up = True
+        print(f"✓ Face Recognizer warmed up in {self.warmup_ms:.0f} ms")
+    
+    @staticmethod
+    def _synthetic_face_image() -> np.ndarray:
+        """Draw a simple face-like pattern used for warm-up"""
+        image = np.full((320, 320, 3), 90, dtype=np.uint8)
+        cv2.ellipse(image, (160, 160), (85, 110), 0, 0, 360, (150, 180, 215), -1)
+        cv2.circle(image, (125, 135), 12, (40, 40, 40), -1)
+        cv2.circle(image, (195, 135), 12, (40, 40, 40), -1)
+        cv2.line(image, (160, 145), (160, 190), (110, 130, 170), 4)
+        cv2.ellipse(image, (160, 215), (35, 12), 0, 0, 180, (60, 60, 150), 4)
+        return image
+        
+    def detect_faces(self, image: np.ndarray, quality_gate: bool = False) -> List[Tuple[np.ndarray, Tuple]]:
         """
         Detect faces in image and return encodings with locations
+        When quality_gate is set, faces failing the quality pre-filter are
+        skipped before encoding and left out of the result
         Returns: List of (encoding, face_location) tuples
         """
+        faces, _ = self._detect_and_encode(image, quality_gate)
+        return [(encoding, location) for encoding, location in faces if encoding is not None]
+    
+    @timed
+    def _detect_and_encode(self, image: np.ndarray, quality_gate: bool, presence_check: bool = False,
+                           tracker: FaceRegionTracker = None) -> Tuple[List[Tuple], Dict]:
+        """
+        Run detection, the optional quality gate, then encoding
+        With a tracker, detection first runs only around the faces found in
+        the stream's previous frame, falling back to a full-frame scan when
+        one is due or the crops miss a face
+        With presence_check, the cascade presence filter runs before a
+        full-frame scan: frames without a candidate face return no faces
+        without running dlib
+        Returns: (list of (encoding or None, face_location), {face_location: rejection_reason})
+        """
         # Convert BGR to RGB (OpenCV uses BGR, face_recognition uses RGB)
         rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         
-        # Find all face locations and encodings
-        face_locations = face_recognition.face_locations(rgb_image, model='hog')
-        face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
+        face_locations = None
+        if tracker is not None:
+            regions = tracker.regions(image.shape)
+            if regions is not None:
+                face_locations = self._locate_faces(rgb_image, regions)
+                if tracker.is_miss(face_locations):
+                    # Someone moved out of their crop or left: rescan this frame in full
+                    tracker.record_miss()
+                    face_locations = None
+                else:
+                    tracker.update(face_locations, full_scan=False)
+        
+        if face_locations is None:
+            regions = None
+            if presence_check and self.presence_filter.enabled:
+                regions = self.presence_filter.find(image)
+                if not regions:
+                    if tracker is not None:
+                        tracker.update([], full_scan=True)
+                    return [], {}
+                if not self.presence_filter.restrict_to_roi:
+                    regions = None
+            
+            # Find all face locations
+            face_locations = self._locate_faces(rgb_image, regions)
+            if presence_check and self.presence_filter.enabled and not face_locations:
+                self.presence_filter.record_miss()
+            if tracker is not None:
+                tracker.update(face_locations, full_scan=True)
+        
+        rejected = {}
+        accepted_locations = face_locations
         
-        return list(zip(face_encodings, face_locations))
+        if quality_gate and face_locations:
+            small_gray, scale = self.quality_gate.prepare(image)
+            accepted_locations = []
+            for location in face_locations:
+                reason = self.quality_gate.check_face(small_gray, scale, location)
+                if reason:
+                    rejected[location] = reason
+                else:
+                    accepted_locations.append(location)
+        
+        # Encode only the faces that passed the gate
+        face_encodings = []
+        if accepted_locations:
+            encode_start = time.time()
+            face_encodings = face_recognition.face_encodings(rgb_image, accepted_locations)
+            per_face_ms = (time.time() - encode_start) * 1000 / len(accepted_locations)
+            if self._encode_ms_per_face is None:
+                self._encode_ms_per_face = per_face_ms
+            else:
+                self._encode_ms_per_face = 0.9 * self._encode_ms_per_face + 0.1 * per_face_ms
+        
+        if quality_gate and face_locations:
+            reasons = {}
+            for reason in rejected.values():
+                reasons[reason] = reasons.get(reason, 0) + 1
+            saved_ms = len(rejected) * (self._encode_ms_per_face or 0.0)
+            self.quality_gate.record(len(face_locations), reasons, saved_ms)
+        
+        encodings_by_location = dict(zip(accepted_locations, face_encodings))
+        faces = [(encodings_by_location.get(location), location) for location in face_locations]
+        
+        return faces, rejected
     
-    def recognize_face(self, face_encoding: np.ndarray) -> Tuple[Optional[Dict], float]:
+    @staticmethod
+    @timed
+    def _locate_faces(rgb_image: np.ndarray, regions: List[Tuple] = None) -> List[Tuple]:
+        """
+        HOG face detection over the whole image, or only inside regions
+        given as (top, right, bottom, left); boxes found in a region are
+        remapped to image coordinates, so encoding still uses the full image
+        """
+        if regions is None:
+            return face_recognition.face_locations(rgb_image, model='hog')
+        
+        face_locations = []
+        for top, right, bottom, left in regions:
+            crop = np.ascontiguousarray(rgb_image[top:bottom, left:right])
+            if crop.size == 0:
+                continue
+            for c_top, c_right, c_bottom, c_left in face_recognition.face_locations(crop, model='hog'):
+                face_locations.append((c_top + top, c_right + left, c_bottom + top, c_left + left))
+        return face_locations
+    
+    def recognize_face(self, face_encoding: np.ndarray,
+                       gallery: GallerySnapshot = None) -> Tuple[Optional[Dict], float]:
         """
         Recognize a face encoding against known encodings
+        Pass a gallery snapshot to match several faces against the same gallery
         Returns: (employee_info, confidence) or (None, 0.0) if not recognized
         """
-        if len(self.known_encodings) == 0:
-            return None, 0.0
+        # Take one reference so a concurrent reload cannot change the gallery mid-match
+        gallery = gallery if gallery is not None else self.gallery
         
-        # Compare face encoding with all known encodings
-        face_distances = face_recognition.face_distance(self.known_encodings, face_encoding)
+        if len(gallery) == 0:
+            return None, 0.0
         
-        # Find the best match
-        best_match_index = np.argmin(face_distances)
-        best_distance = face_distances[best_match_index]
+        if gallery.centroid_index is not None or gallery.quantized is not None:
+            indices, distances = self._shortlist_match(
+                np.asarray(face_encoding, dtype=np.float64).reshape(1, 128), gallery
+            )
+            best_match_index, best_distance = indices[0], distances[0]
+        else:
+            # Compare face encoding with all known encodings
+            face_distances = face_recognition.face_distance(gallery.encodings, face_encoding)
+            
+            # Find the best match
+            best_match_index = np.argmin(face_distances)
+            best_distance = face_distances[best_match_index]
         
         # Convert distance to confidence (0-1, where 1 is perfect match)
         confidence = 1 - best_distance
         
         # Check if confidence meets threshold
         if confidence >= self.recognition_threshold:
-            return self.known_employees[best_match_index], confidence
+            return gallery.employees[best_match_index], confidence
         
         return None, confidence
     
-    def process_frame(self, frame: np.ndarray) -> List[Dict]:
+    @timed
+    def recognize_faces(self, face_encodings: List[np.ndarray],
+                        gallery: GallerySnapshot = None) -> List[Tuple[Optional[Dict], float]]:
+        """
+        Recognize several face encodings with one distance-matrix computation
+        Returns: list of (employee_info, confidence), same order as face_encodings
+        """
+        gallery = gallery if gallery is not None else self.gallery
+        
+        if len(face_encodings) == 0:
+            return []
+        if len(gallery) == 0:
+            return [(None, 0.0)] * len(face_encodings)
+        
+        probes = np.asarray(face_encodings, dtype=np.float64).reshape(-1, 128)
+        
+        if gallery.centroid_index is not None or gallery.quantized is not None:
+            best_indices, best_distances = self._shortlist_match(probes, gallery)
+        else:
+            known = gallery.encodings
+            
+            # ||p - k||^2 = ||p||^2 + ||k||^2 - 2 p.k, computed for all pairs at once
+            squared = (np.einsum('ij,ij->i', probes, probes)[:, None]
+                       + np.einsum('ij,ij->i', known, known)[None, :]
+                       - 2.0 * probes @ known.T)
+            distances = np.sqrt(np.maximum(squared, 0.0))
+            
+            best_indices = np.argmin(distances, axis=1)
+            best_distances = distances[np.arange(len(probes)), best_indices]
+        
+        matches = []
+        
+        for row, best_index in enumerate(best_indices):
+            confidence = 1 - best_distances[row]
+            if confidence >= self.recognition_threshold:
+                matches.append((gallery.employees[best_index], confidence))
+            else:
+                matches.append((None, confidence))
+        
+        return matches
+    
+    def _shortlist_match(self, probes: np.ndarray, gallery: GallerySnapshot) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest gallery row per probe without an exhaustive float64 scan
+        The centroid index compares only the closest employees' encodings and
+        is exact; otherwise the top-k candidates from the quantized gallery
+        are re-ranked by exact float64 distance
+        Returns: (best index per probe, exact distance per probe)
+        """
+        if gallery.centroid_index is not None:
+            return gallery.centroid_index.nearest_many(gallery.encodings, probes, self.centroid_top_k)
+        
+        candidates = gallery.quantized.top_k(probes, self.rerank_k)
+        exact = np.linalg.norm(gallery.encodings[candidates] - probes[:, None, :], axis=2)
+        best = np.argmin(exact, axis=1)
+        rows = np.arange(len(probes))
+        return candidates[rows, best], exact[rows, best]
+    
+    @timed
+    def process_frame(self, frame: np.ndarray, quality_gate: bool = False,
+                      presence_check: bool = False, tracker: FaceRegionTracker = None) -> List[Dict]:
         """
         Process a frame and return all detected and recognized faces
+        With quality_gate, faces rejected by the pre-filter are reported with
+        a 'quality_issue' reason and are never encoded or matched
+        With presence_check (live streams), frames the cascade presence
+        filter finds no face in are skipped before dlib detection
+        With a tracker (one per live stream), detection is restricted to the
+        area around the faces in the stream's previous frame
         Returns: List of dicts with face info, location, and recognition results
         """
         results = []
+        gallery = self.gallery
         
         # Detect faces
-        faces = self.detect_faces(frame)
+        faces, rejected = self._detect_and_encode(frame, quality_gate, presence_check, tracker)
+        
+        # Match every encoded face against the gallery in one batch
+        encodings = [face_encoding for face_encoding, _ in faces if face_encoding is not None]
+        matches = iter(self.recognize_faces(encodings, gallery))
         
         for face_encoding, face_location in faces:
-            # Recognize face
-            employee_info, confidence = self.recognize_face(face_encoding)
+            if face_encoding is None:
+                results.append({
+                    'face_location': face_location,
+                    'recognized': False,
+                    'employee_info': None,
+                    'confidence': 0.0,
+                    'quality_issue': rejected.get(face_location)
+                })
+                continue
+            
+            employee_info, confidence = next(matches)
             
             result = {
                 'face_location': face_location,
@@ -104,6 +429,42 @@ class FaceRecognizer:
         
         return results
     
+    @timed
+    def recognize_from_image(self, image_path: str) -> Dict:
+        """
+        Recognize all faces in an image file
+        Returns: JSON-serializable dict with per-face results
+        """
+        frame = cv2.imread(image_path)
+        if frame is None:
+            return {'success': False, 'message': 'Failed to load image', 'faces': []}
+        
+        faces = self.serialize_results(self.process_frame(frame, quality_gate=True))
+        
+        return {
+            'success': any(face['recognized'] for face in faces),
+            'message': f"{len(faces)} face(s) detected" if faces else "No face detected in image",
+            'faces': faces
+        }
+    
+    @staticmethod
+    def serialize_results(results: List[Dict]) -> List[Dict]:
+        """Convert process_frame results into plain JSON-serializable dicts"""
+        serialized = []
+        
+        for result in results:
+            top, right, bottom, left = result['face_location']
+            serialized.append({
+                'face_location': {'top': int(top), 'right': int(right),
+                                  'bottom': int(bottom), 'left': int(left)},
+                'recognized': bool(result['recognized']),
+                'confidence': round(float(result['confidence']), 4),
+                'employee': result['employee_info'],
+                'quality_issue': result.get('quality_issue')
+            })
+        
+        return serialized
+    
     def draw_results(self, frame: np.ndarray, results: List[Dict]) -> np.ndarray:
         """
         Draw bounding boxes and labels on frame
@@ -118,6 +479,9 @@ class FaceRecognizer:
                 color = (0, 255, 0)  # Green for recognized
                 employee_info = result['employee_info']
                 label = f"{employee_info['full_name']} ({result['confidence']:.2f})"
+            elif result.get('quality_issue'):
+                color = (0, 165, 255)  # Orange for low quality
+                label = f"Low quality ({result['quality_issue']})"
             else:
                 color = (0, 0, 255)  # Red for unknown
                 label = f"Unknown ({result['confidence']:.2f})"
@@ -134,6 +498,7 @@ class FaceRecognizer:
         
         return output_frame
     
+    @timed
     def encode_face(self, image: np.ndarray) -> Optional[np.ndarray]:
         """
         Generate face encoding from an image containing a single face
@@ -0,0 +1,51 @@
+import numpy as np
+from typing import Dict, List, Tuple
+import time
+
+from models.quantized_gallery import QuantizedGallery
+from models.centroid_index import CentroidIndex
+
+class GallerySnapshot:
+    """
+    Immutable view of the face gallery
+    A reload builds a new snapshot off to the side and publishes it with a
+    single reference assignment, so a recognition always sees one complete
+    gallery where row i of encodings belongs to employees[i].
+    With quantization ('float16' or 'int8'), a compact copy of the encodings
+    is built alongside for candidate shortlisting. With centroid_prefilter,
+    a per-employee centroid index is built instead (from the stored centroids
+    where they are current) so matching only compares the closest employees;
+    only the structure matching will use is built.
+    """
+    __slots__ = ('version', 'encodings', 'employees', 'loaded_at', 'quantized', 'centroid_index')
+    
+    def __init__(self, version: int, encodings: np.ndarray, employees: List[Dict],
+                 quantization: str = None, centroid_prefilter: bool = False,
+                 centroids: Dict[int, Tuple[np.ndarray, int, float]] = None):
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+        if encodings.flags.writeable:
+            encodings = encodings.copy()
+            encodings.flags.writeable = False
+        
+        if len(encodings) != len(employees):
+            raise ValueError(f"Gallery has {len(encodings)} encodings but {len(employees)} employee entries")
+        
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'encodings', encodings)
+        object.__setattr__(self, 'employees', tuple(employees))
+        object.__setattr__(self, 'loaded_at', time.time())
+        object.__setattr__(self, 'quantized', QuantizedGallery(encodings, quantization)
+                           if quantization and quantization != 'none' and not centroid_prefilter
+                           and len(encodings) else None)
+        object.__setattr__(self, 'centroid_index', CentroidIndex(encodings, employees, centroids)
+                           if centroid_prefilter and len(encodings) else None)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("GallerySnapshot is immutable")
+    
+    def __len__(self) -> int:
+        return len(self.employees)
+    
+    @classmethod
+    def empty(cls) -> 'GallerySnapshot':
+        return cls(0, np.empty((0, 128)), [])
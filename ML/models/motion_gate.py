@@ -0,0 +1,93 @@
+import cv2
+import numpy as np
+from typing import Dict
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+class MotionGate:
+    """
+    Frame-differencing gate for live loops
+    Each frame is shrunk to a small blurred grayscale image and compared with
+    the last frame that was actually processed. If too few pixels changed,
+    the scene is static (an empty hallway, someone standing still) and the
+    loop can reuse its previous results instead of running detection and
+    matching. Comparing against the last processed frame rather than the
+    previous one means slow changes still add up and trigger processing;
+    max_skip forces a refresh even in a perfectly still scene.
+
+    The gate also keeps CPU time per loop iteration, split into idle
+    (skipped) and busy (processed) iterations, to size how many cameras
+    one machine can run. One gate belongs to one stream.
+    """
+    def __init__(self, threshold: float = None, pixel_delta: int = None,
+                 downscale_width: int = None, max_skip: int = None):
+        self.threshold = threshold if threshold is not None else Config.MOTION_THRESHOLD
+        self.pixel_delta = pixel_delta if pixel_delta is not None else Config.MOTION_PIXEL_DELTA
+        self.downscale_width = downscale_width or Config.MOTION_DOWNSCALE_WIDTH
+        self.max_skip = max_skip if max_skip is not None else Config.MOTION_MAX_SKIP
+        self._reference = None
+        self._skipped_in_row = 0
+        self.last_change = 1.0
+        self.reset_stats()
+
+    def should_process(self, frame: np.ndarray) -> bool:
+        """True if the frame differs enough from the last processed one to run recognition"""
+        small = self._prepare(frame)
+
+        if self._reference is None or self._reference.shape != small.shape:
+            changed = 1.0
+        else:
+            changed = np.count_nonzero(cv2.absdiff(small, self._reference) > self.pixel_delta) / small.size
+        self.last_change = changed
+
+        if changed >= self.threshold or self._skipped_in_row >= self.max_skip:
+            self._reference = small
+            self._skipped_in_row = 0
+            return True
+
+        self._skipped_in_row += 1
+        return False
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.downscale_width / float(width))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        if scale < 1.0:
+            gray = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        # Blur away sensor noise so it does not count as motion
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def record(self, processed: bool, cpu_seconds: float, wall_seconds: float):
+        """Account one loop iteration (use time.process_time / time.perf_counter deltas)"""
+        kind = 'busy' if processed else 'idle'
+        self.frames[kind] += 1
+        self.cpu_seconds[kind] += cpu_seconds
+        self.wall_seconds[kind] += wall_seconds
+
+    def get_stats(self) -> Dict:
+        """
+        Frame counts and CPU usage (percent of one core) for idle and busy iterations
+        """
+        def cpu_percent(kind):
+            wall = self.wall_seconds[kind]
+            return round(self.cpu_seconds[kind] / wall * 100, 1) if wall > 0 else None
+
+        total = self.frames['idle'] + self.frames['busy']
+        return {
+            'frames': total,
+            'frames_skipped': self.frames['idle'],
+            'skip_ratio': round(self.frames['idle'] / total, 3) if total else None,
+            'idle_cpu_percent': cpu_percent('idle'),
+            'busy_cpu_percent': cpu_percent('busy'),
+            'overall_cpu_percent': round(sum(self.cpu_seconds.values()) / sum(self.wall_seconds.values()) * 100, 1)
+            if sum(self.wall_seconds.values()) > 0 else None
+        }
+
+    def reset_stats(self):
+        self.frames = {'idle': 0, 'busy': 0}
+        self.cpu_seconds = {'idle': 0.0, 'busy': 0.0}
+        self.wall_seconds = {'idle': 0.0, 'busy': 0.0}
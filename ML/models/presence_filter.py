@@ -0,0 +1,167 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+class FacePresenceFilter:
+    """
+    Fast face-presence check that runs before dlib HOG detection.
+    An OpenCV Haar or LBP cascade scans a downscaled grayscale copy of the
+    frame; frames without a candidate face skip detection and encoding
+    entirely, and frames with one can be restricted to the regions around
+    the candidates. The cascade is tuned to over-report (few neighbours, a
+    generous margin), since dlib still makes the final decision.
+
+    CascadeClassifier is not safe to share between threads, so every thread
+    that calls find() (API threadpool, multi-camera workers) gets its own
+    copy of the cascade.
+    """
+    CASCADE_FILES = {
+        'haar': 'haarcascade_frontalface_default.xml',
+        'lbp': 'lbpcascade_frontalface_improved.xml'
+    }
+
+    def __init__(self, cascade: str = None, cascade_path: str = None, downscale_width: int = None,
+                 restrict_to_roi: bool = None, roi_margin: float = None):
+        self.cascade_name = cascade or Config.FACE_PRESENCE_CASCADE
+        self.downscale_width = downscale_width or Config.FACE_PRESENCE_DOWNSCALE_WIDTH
+        self.restrict_to_roi = restrict_to_roi if restrict_to_roi is not None else Config.FACE_PRESENCE_ROI
+        self.roi_margin = roi_margin if roi_margin is not None else Config.FACE_PRESENCE_ROI_MARGIN
+        self.classifier = None
+        self.cascade_path = None
+        self._local = threading.local()
+
+        if self.cascade_name and self.cascade_name != 'none':
+            self.classifier = self._load_cascade(cascade_path or Config.FACE_PRESENCE_CASCADE_PATH)
+
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.classifier is not None
+
+    def _load_cascade(self, cascade_path: str):
+        if self.cascade_name not in self.CASCADE_FILES:
+            raise ValueError(f"Unknown presence cascade: {self.cascade_name} (expected haar, lbp or none)")
+
+        if not cascade_path:
+            # opencv-python bundles the Haar cascades; LBP files need FACE_PRESENCE_CASCADE_PATH
+            data_dir = getattr(getattr(cv2, 'data', None), 'haarcascades', '')
+            cascade_path = os.path.join(data_dir, self.CASCADE_FILES[self.cascade_name])
+
+        if not hasattr(cv2, 'CascadeClassifier') or not os.path.exists(cascade_path):
+            print(f"Warning: {self.cascade_name} cascade not available ({cascade_path}), "
+                  f"face presence filter disabled")
+            return None
+
+        classifier = cv2.CascadeClassifier(cascade_path)
+        if classifier.empty():
+            print(f"Warning: Could not load cascade {cascade_path}, face presence filter disabled")
+            return None
+
+        print(f"✓ Face presence filter using {os.path.basename(cascade_path)}")
+        self.cascade_path = cascade_path
+        self._local.classifier = classifier
+        return classifier
+
+    def _thread_classifier(self):
+        """This thread's own classifier, loaded on its first call"""
+        classifier = getattr(self._local, 'classifier', None)
+        if classifier is None:
+            classifier = cv2.CascadeClassifier(self.cascade_path)
+            self._local.classifier = classifier
+        return classifier
+
+    def find(self, frame: np.ndarray) -> Optional[List[Tuple[int, int, int, int]]]:
+        """
+        Look for candidate faces
+        Returns: None when the filter is disabled, otherwise a (possibly empty)
+        list of regions (top, right, bottom, left) in frame coordinates that
+        cover the candidates plus a margin; overlapping regions are merged
+        """
+        if self.classifier is None:
+            return None
+
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.downscale_width / float(width))
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        if scale < 1.0:
+            gray = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        gray = cv2.equalizeHist(gray)
+
+        boxes = self._thread_classifier().detectMultiScale(gray, scaleFactor=1.15, minNeighbors=2, minSize=(20, 20))
+
+        regions = []
+        for x, y, w, h in boxes:
+            margin_x, margin_y = w * self.roi_margin, h * self.roi_margin
+            regions.append((
+                max(0, int((y - margin_y) / scale)),
+                min(width, int((x + w + margin_x) / scale)),
+                min(height, int((y + h + margin_y) / scale)),
+                max(0, int((x - margin_x) / scale))
+            ))
+        regions = self.merge_regions(regions)
+
+        self.record(bool(regions), (time.perf_counter() - start) * 1000)
+        return regions
+
+    @staticmethod
+    def merge_regions(regions: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
+        """Merge overlapping (top, right, bottom, left) regions so no face is detected twice"""
+        merged = list(regions)
+        changed = True
+        while changed:
+            changed = False
+            for i in range(len(merged)):
+                for j in range(i + 1, len(merged)):
+                    a, b = merged[i], merged[j]
+                    if a[0] < b[2] and b[0] < a[2] and a[3] < b[1] and b[3] < a[1]:
+                        merged[i] = (min(a[0], b[0]), max(a[1], b[1]), max(a[2], b[2]), min(a[3], b[3]))
+                        del merged[j]
+                        changed = True
+                        break
+                if changed:
+                    break
+        return merged
+
+    def record(self, candidate: bool, check_ms: float):
+        """Accumulate counters for one checked frame"""
+        with self._lock:
+            self.frames_checked += 1
+            if not candidate:
+                self.frames_skipped += 1
+            self.check_ms += check_ms
+
+    def record_miss(self):
+        """The cascade reported a candidate but dlib found no face"""
+        with self._lock:
+            self.false_candidates += 1
+
+    def get_stats(self) -> Dict:
+        """Return a copy of the filter counters"""
+        with self._lock:
+            return {
+                'cascade': self.cascade_name if self.enabled else None,
+                'frames_checked': self.frames_checked,
+                'frames_skipped': self.frames_skipped,
+                'false_candidates': self.false_candidates,
+                'avg_check_ms': round(self.check_ms / self.frames_checked, 2) if self.frames_checked else None
+            }
+
+    def reset_stats(self):
+        """Reset all counters"""
+        with self._lock:
+            self.frames_checked = 0
+            self.frames_skipped = 0
+            self.false_candidates = 0
+            self.check_ms = 0.0
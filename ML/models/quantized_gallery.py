@@ -0,0 +1,83 @@
+import numpy as np
+
+class QuantizedGallery:
+    """
+    Compact copy of the gallery encodings used to shortlist match candidates
+    float16 halves the float32 footprint (a quarter of float64); int8 stores
+    each dimension as 8-bit codes with a per-dimension scale and offset (an
+    eighth of float64). Approximate distances come from a blocked kernel
+    that converts one block of codes at a time to float32, so a scan reads
+    the compact matrix once and never materializes a full-size copy.
+
+    The caller re-ranks the shortlist with exact float64 distances; the
+    result only differs from an exhaustive search if the true nearest
+    encoding falls outside the approximate top-k.
+    """
+    MODES = ('float16', 'int8')
+    BLOCK_ROWS = 4096
+
+    def __init__(self, encodings: np.ndarray, mode: str):
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported gallery quantization: {mode} (expected one of {self.MODES})")
+
+        encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+        self.mode = mode
+
+        if mode == 'float16':
+            self.codes = encodings.astype(np.float16)
+            self.scale = np.ones(128, dtype=np.float32)
+            self.offset = np.zeros(128, dtype=np.float32)
+        else:
+            low = encodings.min(axis=0) if len(encodings) else np.zeros(128)
+            high = encodings.max(axis=0) if len(encodings) else np.zeros(128)
+            scale = (high - low) / 254.0
+            scale[scale == 0] = 1.0
+            # x ~ offset + scale * q with q in [-127, 127]
+            offset = low + 127.0 * scale
+            self.codes = np.clip(np.round((encodings - offset) / scale), -127, 127).astype(np.int8)
+            self.scale = scale.astype(np.float32)
+            self.offset = offset.astype(np.float32)
+
+        # Squared norms of the dequantized rows, for ||p - x||^2 = ||p||^2 + ||x||^2 - 2 p.x
+        self.norms = np.empty(len(encodings), dtype=np.float32)
+        for start, block in self._blocks():
+            decoded = self.offset + self.scale * block
+            self.norms[start:start + len(block)] = np.einsum('ij,ij->i', decoded, decoded)
+
+        self.codes.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.norms.nbytes + self.scale.nbytes + self.offset.nbytes
+
+    def squared_distances(self, probes: np.ndarray) -> np.ndarray:
+        """Approximate squared distances, shape (probes, gallery)"""
+        probes = np.asarray(probes, dtype=np.float32).reshape(-1, 128)
+        # p.x = p.offset + (p * scale).q, so the kernel only ever multiplies by the codes
+        scaled = (probes * self.scale).T
+        bias = probes @ self.offset
+        probe_norms = np.einsum('ij,ij->i', probes, probes)
+
+        distances = np.empty((len(probes), len(self.codes)), dtype=np.float32)
+        for start, block in self._blocks():
+            dots = block @ scaled
+            distances[:, start:start + len(block)] = (
+                probe_norms[:, None] + self.norms[None, start:start + len(block)]
+                - 2.0 * (dots.T + bias[:, None])
+            )
+        return distances
+
+    def top_k(self, probes: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k approximately nearest encodings per probe, shape (probes, k)"""
+        distances = self.squared_distances(probes)
+        k = min(k, distances.shape[1])
+        if k == distances.shape[1]:
+            return np.tile(np.arange(k), (len(distances), 1))
+        return np.argpartition(distances, k - 1, axis=1)[:, :k]
+
+    def _blocks(self):
+        for start in range(0, len(self.codes), self.BLOCK_ROWS):
+            yield start, self.codes[start:start + self.BLOCK_ROWS].astype(np.float32)
@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from models.presence_filter import FacePresenceFilter
+
+class FaceRegionTracker:
+    """
+    Per-stream memory of where faces were in the previous frame
+    Someone at a kiosk barely moves between frames, so detection can run on
+    an expanded crop around each last known face box instead of the whole
+    frame. A full-frame scan still runs every full_scan_interval frames (to
+    pick up people entering the frame) and whenever the crops find fewer
+    faces than were tracked.
+
+    One tracker belongs to one camera or stream and is not shared between
+    threads; the FaceRecognizer itself stays stateless.
+    """
+    def __init__(self, margin: float = None, full_scan_interval: int = None):
+        self.margin = margin if margin is not None else Config.ROI_TRACK_MARGIN
+        self.full_scan_interval = full_scan_interval or Config.ROI_FULL_SCAN_INTERVAL
+        self.boxes = []
+        self._since_full_scan = 0
+        self.reset_stats()
+
+    def regions(self, frame_shape: Tuple) -> Optional[List[Tuple[int, int, int, int]]]:
+        """
+        Regions (top, right, bottom, left) to detect in for the next frame,
+        or None when a full-frame scan is due
+        """
+        if not self.boxes or self._since_full_scan >= self.full_scan_interval:
+            return None
+
+        height, width = frame_shape[:2]
+        regions = []
+        for top, right, bottom, left in self.boxes:
+            margin_y = int((bottom - top) * self.margin)
+            margin_x = int((right - left) * self.margin)
+            regions.append((max(0, top - margin_y), min(width, right + margin_x),
+                            min(height, bottom + margin_y), max(0, left - margin_x)))
+        return FacePresenceFilter.merge_regions(regions)
+
+    def is_miss(self, face_locations: List[Tuple]) -> bool:
+        """True if a region scan found fewer faces than were being tracked"""
+        return len(face_locations) < len(self.boxes)
+
+    def update(self, face_locations: List[Tuple], full_scan: bool):
+        """Remember the face boxes (frame coordinates) found in the latest frame"""
+        self.boxes = list(face_locations)
+        self.frames += 1
+        if full_scan:
+            self.full_scans += 1
+            self._since_full_scan = 0
+        else:
+            self.roi_frames += 1
+            self._since_full_scan += 1
+
+    def record_miss(self):
+        self.misses += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            'frames': self.frames,
+            'roi_frames': self.roi_frames,
+            'full_scans': self.full_scans,
+            'misses': self.misses
+        }
+
+    def reset_stats(self):
+        self.frames = 0
+        self.roi_frames = 0
+        self.full_scans = 0
+        self.misses = 0
@@ -0,0 +1,218 @@
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Tuple
+import json
+import struct
+import sys
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    from multiprocessing import resource_tracker
+except ImportError:
+    resource_tracker = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+# magic, version, count, dim, metadata length
+HEADER_FORMAT = '<8sqqqq'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b'GALLERY1'
+
+class SharedGallery:
+    """
+    Face gallery published in multiprocessing.shared_memory
+    One segment per gallery version, named <prefix>_v<version>. The first
+    worker to need a version loads it from the database under a file lock
+    and publishes it; every other worker attaches to the same segment
+    instead of running its own DB load. The lock file lives in a directory
+    only the service user can read (GALLERY_LOCK_DIR), so other local users
+    cannot hold the lock and stall reloads.
+    """
+    def __init__(self, name_prefix: str = None, lock_path: str = None):
+        self.name_prefix = name_prefix or Config.GALLERY_SHM_NAME
+        self.lock_path = lock_path or os.path.join(Config.GALLERY_LOCK_DIR, f"{self.name_prefix}.lock")
+        lock_dir = os.path.dirname(self.lock_path)
+        if lock_dir:
+            os.makedirs(lock_dir, mode=0o700, exist_ok=True)
+        self._segment = None
+        self._version = None
+        self._retired = []
+    
+    def get(self, version: int, loader: Callable[[], Tuple[int, np.ndarray, List[Dict]]]):
+        """
+        Return the gallery for a version, attaching to an existing segment
+        or loading and publishing it with loader() if none exists yet
+        loader returns (version, encodings matrix, employee metadata list)
+        Returns: (version, encodings, employees)
+        """
+        gallery = self._attach(version)
+        if gallery is not None:
+            return gallery
+        
+        with self._file_lock():
+            # Another worker may have published while we waited for the lock
+            gallery = self._attach(version)
+            if gallery is not None:
+                return gallery
+            
+            loaded_version, encodings, employees = loader()
+            gallery = self._attach(loaded_version)
+            if gallery is not None:
+                return gallery
+            
+            return self._publish(loaded_version, encodings, employees)
+    
+    def _attach(self, version: int):
+        """Attach to a published segment, or return None if it does not exist"""
+        try:
+            segment = shared_memory.SharedMemory(name=self._segment_name(version))
+        except FileNotFoundError:
+            return None
+        self._untrack(segment)
+        
+        magic, seg_version, count, dim, meta_len = struct.unpack_from(HEADER_FORMAT, segment.buf, 0)
+        if magic != MAGIC or seg_version != version:
+            # Publisher has not finished writing yet
+            segment.close()
+            return None
+        
+        return self._read(segment, seg_version, count, dim, meta_len)
+    
+    def _publish(self, version: int, encodings: np.ndarray, employees: List[Dict]):
+        """Write a new segment and release the previous one"""
+        encodings = np.ascontiguousarray(encodings, dtype=np.float64).reshape(-1, 128)
+        count, dim = encodings.shape
+        metadata = json.dumps(employees).encode('utf-8')
+        matrix_bytes = encodings.nbytes
+        size = HEADER_SIZE + matrix_bytes + len(metadata)
+        
+        try:
+            segment = shared_memory.SharedMemory(name=self._segment_name(version), create=True, size=size)
+        except FileExistsError:
+            # Left half-written by a publisher that died (a complete one would have been attached)
+            print(f"Warning: Replacing stale shared memory segment {self._segment_name(version)}")
+            self._unlink(version)
+            segment = shared_memory.SharedMemory(name=self._segment_name(version), create=True, size=size)
+        self._untrack(segment)
+        
+        matrix = self._matrix_view(segment, count, dim)
+        matrix[:] = encodings
+        del matrix
+        segment.buf[HEADER_SIZE + matrix_bytes:size] = metadata
+        
+        # Header goes last so readers never see a half-written gallery
+        struct.pack_into(HEADER_FORMAT, segment.buf, 0, MAGIC, version, count, dim, len(metadata))
+        
+        if self._version is not None and self._version != version:
+            self._unlink(self._version)
+        
+        print(f"✓ Published gallery v{version} to shared memory ({size / 1024:.0f} KB)")
+        return self._read(segment, version, count, dim, len(metadata))
+    
+    def _read(self, segment, version: int, count: int, dim: int, meta_len: int):
+        matrix = self._matrix_view(segment, count, dim)
+        matrix.flags.writeable = False
+        
+        meta_start = HEADER_SIZE + matrix.nbytes
+        employees = json.loads(bytes(segment.buf[meta_start:meta_start + meta_len]).decode('utf-8'))
+        
+        # Older segments stay mapped until no gallery snapshot uses them
+        previous = self._segment
+        self._segment = segment
+        self._version = version
+        if previous is not None and previous is not segment:
+            self._retired.append(previous)
+        self._release_retired()
+        
+        return version, matrix, employees
+    
+    @staticmethod
+    def _matrix_view(segment, count: int, dim: int) -> np.ndarray:
+        """
+        Map the encoding matrix without copying
+        np.frombuffer keeps a buffer export on the segment, so close() raises
+        BufferError instead of unmapping memory a snapshot still points at
+        """
+        return np.frombuffer(segment.buf, dtype=np.float64, count=count * dim,
+                             offset=HEADER_SIZE).reshape(count, dim)
+    
+    def _unlink(self, version: int):
+        """Remove an old segment; processes still attached keep their mapping"""
+        try:
+            old = shared_memory.SharedMemory(name=self._segment_name(version))
+        except FileNotFoundError:
+            return
+        # unlink() unregisters from the resource tracker itself
+        old.close()
+        try:
+            old.unlink()
+        except FileNotFoundError:
+            pass
+    
+    def _segment_name(self, version: int) -> str:
+        return f"{self.name_prefix}_v{version}"
+    
+    @staticmethod
+    def _untrack(segment):
+        """
+        Stop the resource tracker from unlinking the segment when this
+        worker exits; other workers may still be using it
+        """
+        if resource_tracker is not None and os.name == 'posix':
+            try:
+                resource_tracker.unregister(segment._name, 'shared_memory')
+            except Exception:
+                pass
+    
+    def _release_retired(self):
+        """Close retired segments whose matrices are no longer referenced"""
+        still_used = []
+        for segment in self._retired:
+            try:
+                segment.close()
+            except BufferError:
+                # A snapshot still holds a view into this segment
+                still_used.append(segment)
+        self._retired = still_used
+    
+    def _file_lock(self):
+        return _FileLock(self.lock_path)
+    
+    def close(self):
+        """Detach from all segments that are no longer in use"""
+        if self._segment is not None:
+            self._retired.append(self._segment)
+            self._segment = None
+        self._release_retired()
+
+
+class _FileLock:
+    """Cross-process exclusive lock on a file"""
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+    
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
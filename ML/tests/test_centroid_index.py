@@ -0,0 +1,80 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.centroid_index import CentroidIndex
+
+def _gallery(rng, employees_count=300, per_employee=5):
+    centers = rng.normal(0, 0.09, size=(employees_count, 128))
+    counts = rng.integers(1, per_employee + 1, size=employees_count)
+    owners = np.repeat(np.arange(employees_count), counts)
+    rng.shuffle(owners)
+    encodings = centers[owners] + rng.normal(0, 0.025, size=(len(owners), 128))
+    employees = [{'employee_id': int(owner) + 1000, 'encoding_id': i} for i, owner in enumerate(owners)]
+    return encodings, employees, centers
+
+def _probes(rng, centers, count=60):
+    known = centers[rng.integers(0, len(centers), size=count)] + rng.normal(0, 0.025, size=(count, 128))
+    strangers = rng.normal(0, 0.09, size=(count // 2, 128))
+    pairs = rng.integers(0, len(centers), size=(count, 2))
+    between = (centers[pairs[:, 0]] + centers[pairs[:, 1]]) / 2
+    return np.vstack([known, strangers, between])
+
+def _assert_exhaustive(index, encodings, probes, k):
+    distances = np.linalg.norm(encodings[None, :, :] - probes[:, None, :], axis=2)
+    expected_rows = np.argmin(distances, axis=1)
+    expected = distances[np.arange(len(probes)), expected_rows]
+
+    for probe, row, distance in zip(probes, expected_rows, expected):
+        found_row, found_distance, _ = index.nearest(encodings, probe, k)
+        assert found_row == row
+        assert abs(found_distance - distance) < 1e-12
+
+    rows, batched = index.nearest_many(encodings, probes, k)
+    assert np.array_equal(rows, expected_rows)
+    assert np.allclose(batched, expected, rtol=0, atol=1e-12)
+
+def test_fresh_centroids_match_exhaustive_search():
+    rng = np.random.default_rng(1)
+    encodings, employees, centers = _gallery(rng)
+    index = CentroidIndex(encodings, employees)
+
+    # Vectorized centroids and radii equal the per-employee definitions
+    for i in range(len(index)):
+        members = encodings[index.rows[index.offsets[i]:index.offsets[i + 1]]]
+        assert np.allclose(index.centroids[i], members.mean(axis=0))
+        assert np.isclose(index.radii[i], np.linalg.norm(members - index.centroids[i], axis=1).max())
+
+    _assert_exhaustive(index, encodings, _probes(rng, centers), k=10)
+
+def test_stale_stored_centroids_match_exhaustive_search():
+    rng = np.random.default_rng(2)
+    encodings, employees, centers = _gallery(rng)
+    fresh = CentroidIndex(encodings, employees)
+
+    stored = {}
+    for i, employee_id in enumerate(fresh.employee_ids):
+        members = encodings[fresh.rows[fresh.offsets[i]:fresh.offsets[i + 1]]]
+        if i % 2:
+            # Count no longer matches the gallery: the row must be ignored
+            stored[int(employee_id)] = (rng.normal(0, 0.09, size=128), len(members) + 1, 0.0)
+        else:
+            # Off-center but consistent row (radius measured from that center) stays exact
+            center = members.mean(axis=0) + rng.normal(0, 0.02, size=128)
+            stored[int(employee_id)] = (center, len(members),
+                                        float(np.linalg.norm(members - center, axis=1).max()))
+
+    index = CentroidIndex(encodings, employees, stored)
+    assert index.persisted == (len(fresh) + 1) // 2
+    _assert_exhaustive(index, encodings, _probes(rng, centers), k=10)
+
+def test_k1_between_two_employees_matches_exhaustive_search():
+    rng = np.random.default_rng(3)
+    encodings, employees, centers = _gallery(rng)
+    index = CentroidIndex(encodings, employees)
+
+    pairs = rng.integers(0, len(centers), size=(100, 2))
+    between = (centers[pairs[:, 0]] + centers[pairs[:, 1]]) / 2 + rng.normal(0, 0.005, size=(100, 128))
+    _assert_exhaustive(index, encodings, between, k=1)
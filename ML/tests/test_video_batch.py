@@ -0,0 +1,32 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.video_batch import VideoBatchProcessor
+
+def _visit(employee_id, first_seen, last_seen):
+    return {'employee_id': employee_id, 'confirmed': True, 'best_confidence': 0.9,
+            'first_seen': first_seen, 'last_seen': last_seen}
+
+def test_event_keys_fit_processed_events_column():
+    source = "CCTV_Pintu_Masuk_Utama_Lantai_1_2026-10-19_07-00-00_sampai_09-00-00.mp4"
+    visits = [
+        _visit(12345, '2026-10-19T07:03:00', '2026-10-19T07:04:00'),
+        _visit(12345, '2026-10-19T08:40:00', '2026-10-19T08:41:00'),
+        _visit(12346, '2026-10-19T07:05:00', '2026-10-19T07:06:00'),
+    ]
+
+    events = VideoBatchProcessor.attendance_events(visits, source, check_out=True)
+    keys = [event['idempotency_key'] for event in events]
+
+    assert len(events) == 3
+    # processed_events.idempotency_key is CHAR(36)
+    assert all(len(key) == 36 for key in keys)
+    assert len(set(keys)) == len(keys)
+    # Same video, same keys: a re-run is recognized as already applied
+    assert keys == [event['idempotency_key']
+                    for event in VideoBatchProcessor.attendance_events(visits, source, check_out=True)]
+    assert events[0]['source_key'].startswith(f"video:{source}:check_in:12345:")
+    assert events[0]['event_time'] == datetime(2026, 10, 19, 7, 3)
@@ -1,3 +1,6 @@
 from .logger import setup_logger
+from .image_store import ImageStore
+from .image_archiver import EvidenceImageArchiver
+from .profiling import SamplingProfiler, timed, timings
 
-__all__ = ['setup_logger']
+__all__ = ['setup_logger', 'ImageStore', 'EvidenceImageArchiver', 'SamplingProfiler', 'timed', 'timings']
@@ -0,0 +1,202 @@
+import cv2
+import numpy as np
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from utils.image_store import ImageStore
+
+class EvidenceImageArchiver:
+    """
+    Recompress old attendance evidence images
+    Images referenced by attendance rows older than the retention period are
+    downscaled to fit max_dimension, re-encoded as lower-quality WebP/JPEG and
+    stored under archive/ in the image store. Each batch of rows is repointed
+    in one transaction, and only then are the originals deleted.
+
+    Archived paths start with archive/, so a stopped run simply resumes with
+    the rows still pointing at originals. Work is spread over a small thread
+    pool (OpenCV releases the GIL while decoding and encoding), paced to at
+    most rate images per second, and can be limited to an hours window so it
+    stays out of the way of daytime recognition.
+    """
+    ARCHIVE_CATEGORY = 'archive'
+
+    def __init__(self, db_manager, image_store: ImageStore = None, older_than_days: int = None,
+                 image_format: str = None, quality: int = None, max_dimension: int = None,
+                 workers: int = None, batch_size: int = None, rate: float = None, hours: str = None):
+        self.db_manager = db_manager
+        self.image_store = image_store or ImageStore()
+        self.older_than_days = older_than_days if older_than_days is not None else Config.EVIDENCE_ARCHIVE_DAYS
+        self.image_format = image_format or Config.EVIDENCE_ARCHIVE_FORMAT
+        self.quality = quality or Config.EVIDENCE_ARCHIVE_QUALITY
+        self.max_dimension = max_dimension if max_dimension is not None else Config.EVIDENCE_ARCHIVE_MAX_DIMENSION
+        self.workers = workers or Config.EVIDENCE_ARCHIVE_WORKERS
+        self.batch_size = batch_size or Config.EVIDENCE_ARCHIVE_BATCH_SIZE
+        self.rate = rate if rate is not None else Config.EVIDENCE_ARCHIVE_RATE
+        self.hours = self._parse_hours(hours if hours is not None else Config.EVIDENCE_ARCHIVE_HOURS)
+        self._next_slot = 0.0
+
+    def cutoff(self) -> date:
+        return date.today() - timedelta(days=self.older_than_days)
+
+    def run(self, dry_run: bool = False) -> Dict:
+        """
+        Archive every evidence image older than the cutoff (or until outside the hours window)
+        Returns: {rows, images, missing, failed, bytes_before, bytes_after,
+                  bytes_reclaimed, cutoff, stopped, seconds}
+        dry_run only counts the images and their current size
+        """
+        cutoff = self.cutoff()
+        started = time.perf_counter()
+        stats = {'rows': 0, 'images': 0, 'missing': 0, 'failed': 0, 'bytes_before': 0,
+                 'bytes_after': 0, 'bytes_reclaimed': 0, 'cutoff': cutoff.isoformat(), 'stopped': None}
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-archiver') as executor:
+            after_id = 0
+            while True:
+                if not self._in_window():
+                    stats['stopped'] = 'outside archive hours'
+                    break
+
+                records = self.db_manager.get_evidence_images_before(
+                    cutoff, after_id, self.batch_size, f"{self.ARCHIVE_CATEGORY}/"
+                )
+                if not records:
+                    break
+                after_id = records[-1]['attendance_id']
+                stats['rows'] += len(records)
+
+                pending = self._pending_images(records)
+                if dry_run:
+                    for path in pending:
+                        self._count_dry_run(path, stats)
+                else:
+                    self._archive_batch(executor, pending, stats)
+
+                if len(records) < self.batch_size:
+                    break
+
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+    def recompress(self, relative_path: str, attendance_date: date) -> Optional[Tuple[str, int, int, bool]]:
+        """
+        Store a smaller copy of one image under archive/
+        Returns: (new_path, bytes_before, bytes_after, created) or None if the original is missing
+        """
+        source = self.image_store.absolute_path(relative_path)
+        try:
+            with open(source, 'rb') as input_file:
+                original = input_file.read()
+        except FileNotFoundError:
+            return None
+
+        image = cv2.imdecode(np.frombuffer(original, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not decode image: {relative_path}")
+
+        height, width = image.shape[:2]
+        scale = self.max_dimension / max(height, width) if self.max_dimension else 1
+        if scale < 1:
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+
+        data, extension = self.image_store.encode(image, self.image_format, self.quality), self.image_format
+        if len(data) >= len(original):
+            # Already small: keep the original bytes, but still move it so it is not retried
+            data, extension = original, os.path.splitext(relative_path)[1].lstrip('.').lower() or 'jpg'
+
+        when = datetime.combine(attendance_date, datetime.min.time())
+        new_path, created = self.image_store.put(data, self.ARCHIVE_CATEGORY, when, extension)
+        return new_path, len(original), len(data), created
+
+    def _pending_images(self, records: List[Dict]) -> Dict[str, List[Tuple[int, date, str]]]:
+        """Unarchived image paths in a batch -> the (attendance_id, date, column) cells holding them"""
+        prefix = f"{self.ARCHIVE_CATEGORY}/"
+        pending = {}
+        for record in records:
+            for column in self.db_manager.EVIDENCE_IMAGE_COLUMNS:
+                path = record[column]
+                if path and not path.startswith(prefix):
+                    pending.setdefault(path, []).append((record['attendance_id'], record['attendance_date'], column))
+        return pending
+
+    def _archive_batch(self, executor: ThreadPoolExecutor,
+                       pending: Dict[str, List[Tuple[int, date, str]]], stats: Dict):
+        futures = {}
+        for path, cells in pending.items():
+            self._throttle()
+            futures[path] = executor.submit(self.recompress, path, cells[0][1])
+
+        replacements = []
+        for path, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"Warning: Could not archive {path}: {e}")
+                continue
+            if result is None:
+                stats['missing'] += 1
+                continue
+
+            new_path, before, after, created = result
+            stats['images'] += 1
+            stats['bytes_before'] += before
+            stats['bytes_after'] += after
+            if created:
+                stats['bytes_reclaimed'] -= after
+            for attendance_id, attendance_date, column in pending[path]:
+                replacements.append((attendance_id, attendance_date, column, path, new_path))
+
+        # Originals are only deleted once nothing in the database points at them
+        for path in self.db_manager.replace_evidence_images(replacements):
+            try:
+                stats['bytes_reclaimed'] += os.path.getsize(self.image_store.absolute_path(path))
+                self.image_store.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _count_dry_run(self, path: str, stats: Dict):
+        try:
+            stats['bytes_before'] += os.path.getsize(self.image_store.absolute_path(path))
+            stats['images'] += 1
+        except FileNotFoundError:
+            stats['missing'] += 1
+
+    def _throttle(self):
+        """Space out image submissions to at most rate per second"""
+        if not self.rate:
+            return
+        now = time.monotonic()
+        if self._next_slot > now:
+            time.sleep(self._next_slot - now)
+        self._next_slot = max(now, self._next_slot) + 1.0 / self.rate
+
+    def _in_window(self) -> bool:
+        if self.hours is None:
+            return True
+        start, end = self.hours
+        hour = datetime.now().hour
+        # A window like 20-6 wraps past midnight
+        return start <= hour < end if start < end else hour >= start or hour < end
+
+    @staticmethod
+    def _parse_hours(hours: str) -> Optional[Tuple[int, int]]:
+        """'20-6' -> (20, 6); empty means any time"""
+        if not hours:
+            return None
+        try:
+            start, end = (int(hour) for hour in hours.split('-'))
+        except ValueError:
+            raise ValueError(f"Invalid archive hours '{hours}', expected START-END such as 20-6")
+        if not (0 <= start < 24 and 0 <= end <= 24) or start == end:
+            raise ValueError(f"Invalid archive hours '{hours}'")
+        return start, end
@@ -0,0 +1,165 @@
+import cv2
+import hashlib
+import tempfile
+import numpy as np
+from datetime import datetime
+from typing import List, Tuple
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+class ImageStore:
+    """
+    Content-addressed image storage under IMAGE_BASE_PATH
+    Images are stored as <category>/<YYYY>/<MM>/<DD>/<hash[:2]>/<hash>.<ext>,
+    so no directory grows without bound, identical images written the same
+    day share one file, and two writes in the same second never collide.
+    Files are written to a temporary name and renamed into place, so readers
+    (and the /images mount) never see a partial image.
+    Returned paths are relative to the base path and always use '/'.
+
+    Downscaled variants (thumbnails) live beside the originals under
+    _variants/<size>/<relative_path>. They are written when an image is saved
+    (IMAGE_EAGER_VARIANTS) and otherwise generated on first request.
+    """
+    VARIANTS_DIR = '_variants'
+
+    def __init__(self, base_path: str = None, jpeg_quality: int = None):
+        self.base_path = base_path or Config.IMAGE_BASE_PATH
+        self.jpeg_quality = jpeg_quality or Config.IMAGE_JPEG_QUALITY
+        self.variant_sizes = sorted(Config.IMAGE_VARIANT_SIZES)
+        self.variant_quality = Config.IMAGE_VARIANT_JPEG_QUALITY
+        self.eager_variants = Config.IMAGE_EAGER_VARIANTS
+
+    def encode(self, image: np.ndarray, extension: str = 'jpg', quality: int = None) -> bytes:
+        """Encode an image to bytes"""
+        quality = quality or self.jpeg_quality
+        params = []
+        if extension in ('jpg', 'jpeg'):
+            params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        elif extension == 'webp':
+            params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+        ok, buffer = cv2.imencode(f".{extension}", image, params)
+        if not ok:
+            raise ValueError(f"Could not encode image as {extension}")
+        return buffer.tobytes()
+
+    def save_image(self, image: np.ndarray, category: str, when: datetime = None) -> str:
+        """Encode and store an image; returns its relative path"""
+        relative_path, _ = self.add_image(image, category, when)
+        return relative_path
+
+    def add_image(self, image: np.ndarray, category: str, when: datetime = None) -> Tuple[str, bool]:
+        """
+        Encode and store an image, writing its variants while the pixels are at hand
+        Returns: (relative_path, created) as for put()
+        """
+        relative_path, created = self.put(self.encode(image), category, when)
+        if created and self.eager_variants:
+            for size in self.variant_sizes:
+                try:
+                    self._write_variant(relative_path, image, size)
+                except Exception as e:
+                    # The original is stored; the variant is generated on first request instead
+                    print(f"Warning: Could not write {size}px variant of {relative_path}: {e}")
+        return relative_path, created
+
+    def put(self, data: bytes, category: str, when: datetime = None,
+            extension: str = 'jpg') -> Tuple[str, bool]:
+        """
+        Store encoded image bytes
+        Returns: (relative_path, created) where created is False if identical
+        content was already stored in the same shard
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        when = when or datetime.now()
+        relative_path = '/'.join([category, when.strftime('%Y'), when.strftime('%m'), when.strftime('%d'),
+                                  digest[:2], f"{digest}.{extension}"])
+        path = self.absolute_path(relative_path)
+
+        if os.path.exists(path):
+            return relative_path, False
+
+        self._write_atomic(path, data)
+        return relative_path, True
+
+    def absolute_path(self, relative_path: str) -> str:
+        return os.path.join(self.base_path, *self._parts(relative_path))
+
+    def variant_path(self, relative_path: str, size: int) -> str:
+        """
+        Absolute path of the <size>px variant of a stored image, generating it if missing
+        The variant fits within size x size, keeps the aspect ratio and is
+        never larger than the original. Raises FileNotFoundError if the
+        original does not exist and ValueError for sizes not in IMAGE_VARIANT_SIZES.
+        """
+        if size not in self.variant_sizes:
+            raise ValueError(f"Unsupported image size: {size} (allowed: {self.variant_sizes})")
+
+        source = self.absolute_path(relative_path)
+        path = self._variant_file(relative_path, size)
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+            return path
+
+        if not os.path.exists(source):
+            raise FileNotFoundError(relative_path)
+        image = cv2.imread(source)
+        if image is None:
+            raise ValueError(f"Could not decode image: {relative_path}")
+
+        self._write_variant(relative_path, image, size)
+        return path
+
+    def remove(self, relative_path: str):
+        """Delete a stored image and its variants (only safe for images this caller created)"""
+        for path in [self.absolute_path(relative_path)] + self._variant_files(relative_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _parts(self, relative_path: str) -> List[str]:
+        """Path components of a stored image; rejects paths that escape the base path"""
+        # Paths saved before the sharded layout may use the OS separator
+        parts = [part for part in relative_path.replace('\\', '/').split('/') if part not in ('', '.')]
+        if not parts or '..' in parts or os.path.isabs(relative_path):
+            raise ValueError(f"Invalid image path: {relative_path}")
+        return parts
+
+    def _variant_file(self, relative_path: str, size: int) -> str:
+        parts = self._parts(relative_path)
+        # Variants are always JPEG
+        if not parts[-1].lower().endswith(('.jpg', '.jpeg')):
+            parts[-1] += '.jpg'
+        return os.path.join(self.base_path, self.VARIANTS_DIR, str(size), *parts)
+
+    def _variant_files(self, relative_path: str) -> List[str]:
+        return [self._variant_file(relative_path, size) for size in self.variant_sizes]
+
+    def _write_variant(self, relative_path: str, image: np.ndarray, size: int):
+        height, width = image.shape[:2]
+        scale = size / max(height, width)
+        if scale < 1:
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        self._write_atomic(self._variant_file(relative_path, size),
+                           self.encode(image, 'jpg', self.variant_quality))
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        """Write to a temporary file in the target directory, fsync, then rename into place"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                output.write(data)
+                output.flush()
+                os.fsync(output.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
@@ -0,0 +1,232 @@
+import functools
+import marshal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+
+class TimingStats:
+    """Thread-safe call count, total and max time per timed method"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                self._stats[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per method: calls, total_ms, avg_ms, max_ms (sorted by total time)"""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: item[1][1], reverse=True)
+            return {name: {
+                'calls': calls,
+                'total_ms': round(total * 1000, 1),
+                'avg_ms': round(total * 1000 / calls, 3),
+                'max_ms': round(longest * 1000, 1)
+            } for name, (calls, total, longest) in items}
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+timings = TimingStats()
+
+def timed(func: Callable = None, *, name: str = None):
+    """
+    Record the wall time of every call in timings (use as @timed)
+    The switch is PROFILE_TIMINGS, read when the method is decorated: when it
+    is off the function is returned unwrapped, so a disabled decorator costs
+    nothing per call. Turning it on needs a restart.
+    """
+    def decorate(function: Callable) -> Callable:
+        if not Config.PROFILE_TIMINGS:
+            return function
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timings.record(label, time.perf_counter() - start)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler over all threads of the process
+    A background thread snapshots every thread's Python stack every
+    interval_ms (sys._current_frames) for a bounded time, so it sees live
+    traffic in server and worker threads without instrumenting them.
+    Time spent in C code (dlib, OpenCV, the MySQL driver, pickle) is charged
+    to the Python line that called it. Threads parked in a wait are left out
+    unless include_idle is set.
+
+    Native calls that keep the GIL (dlib's face encoder does) hold the
+    sampler off until they return, so each sample is weighted by the real
+    time since the previous one rather than by interval_ms. Use the @timed
+    method timings for exact per-method totals.
+
+    Results are collapsed stacks (the input format of flamegraph.pl,
+    speedscope and similar tools) weighted in milliseconds, or a
+    pstats-compatible .prof file, where call counts are sample counts.
+    """
+    IDLE_FUNCTIONS = {
+        ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'),
+        ('queue.py', 'get'), ('selectors.py', 'select'), ('socket.py', 'accept'),
+        ('thread.py', '_worker'), ('base_events.py', '_run_once')
+    }
+
+    # Only one profile may run at a time; overlapping samplers skew each other
+    _active = threading.Lock()
+
+    def __init__(self, interval_ms: float = None, include_idle: bool = False):
+        self.interval = (interval_ms or Config.PROFILE_INTERVAL_MS) / 1000.0
+        self.include_idle = include_idle
+        self.samples = Counter()
+        self.sample_seconds = Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, seconds: float):
+        """Sample in the background for at most seconds; raises RuntimeError if a profile is already running"""
+        if not SamplingProfiler._active.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, args=(seconds,), name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop early and wait for the sampler to finish"""
+        self._stop.set()
+        self.join()
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self, seconds: float) -> 'SamplingProfiler':
+        """Profile for seconds, blocking the calling thread (which is not sampled while it waits)"""
+        self.start(seconds)
+        self.join()
+        return self
+
+    def _run(self, seconds: float):
+        own_id = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + seconds
+        last = started - self.interval
+        try:
+            while not self._stop.is_set() and time.perf_counter() < deadline:
+                now = time.perf_counter()
+                weight, last = now - last, now
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    stack = self._stack(frame)
+                    if not self.include_idle and stack[-1][:2] in self.IDLE_FUNCTIONS:
+                        continue
+                    key = (names.get(thread_id, str(thread_id)), stack)
+                    self.samples[key] += 1
+                    self.sample_seconds[key] += weight
+                self.sample_count += 1
+                self._stop.wait(self.interval)
+        finally:
+            self.seconds = time.perf_counter() - started
+            SamplingProfiler._active.release()
+
+    @staticmethod
+    def _stack(frame) -> Tuple[Tuple[str, str, int, str, int], ...]:
+        """(file name, function, current line, full path, first line) per frame, root first"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((os.path.basename(code.co_filename), code.co_name, frame.f_lineno,
+                          code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    @staticmethod
+    def _label(entry: Tuple) -> str:
+        file_name, function, line, path, _ = entry
+        folder = os.path.basename(os.path.dirname(path))
+        return f"{function} ({folder}/{file_name}:{line})"
+
+    def collapsed(self) -> str:
+        """One 'thread;frame;frame milliseconds' line per distinct stack"""
+        lines = []
+        for (thread_name, stack), seconds in self.sample_seconds.most_common():
+            frames = ';'.join(self._label(entry) for entry in stack)
+            lines.append(f"{thread_name};{frames} {max(1, round(seconds * 1000))}")
+        return '\n'.join(lines) + '\n'
+
+    def pstats_bytes(self) -> bytes:
+        """
+        Samples in the marshalled format pstats.Stats and snakeviz load
+        Every sample adds its weight to the leaf function's own time and to
+        the cumulative time of each function on the stack
+        """
+        stats = {}
+        for sample, count in self.samples.items():
+            stack = sample[1]
+            seconds = self.sample_seconds[sample]
+            keys = [(path, first_line, function) for _, function, _, path, first_line in stack]
+            for depth, key in enumerate(keys):
+                entry = stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+                leaf = depth == len(keys) - 1
+                # Recursive functions only count once per sample
+                if key not in keys[:depth]:
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += seconds
+                if leaf:
+                    entry[2] += seconds
+                if depth:
+                    caller = entry[4].get(keys[depth - 1], (0, 0, 0.0, 0.0))
+                    entry[4][keys[depth - 1]] = (caller[0] + count, caller[1] + count,
+                                                 caller[2] + (seconds if leaf else 0.0), caller[3] + seconds)
+        return marshal.dumps({key: (cc, nc, tt, ct, callers) for key, (cc, nc, tt, ct, callers) in stats.items()})
+
+    def write(self, output_path: str) -> str:
+        """Write a .prof file for a .prof path, collapsed stacks otherwise"""
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        if output_path.endswith('.prof'):
+            with open(output_path, 'wb') as f:
+                f.write(self.pstats_bytes())
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(self.collapsed())
+        return output_path
+
+    def summary(self, limit: int = 10) -> List[Tuple[str, float]]:
+        """Lines where the most sampled time was spent, with milliseconds"""
+        leaves = Counter()
+        for (_, stack), seconds in self.sample_seconds.items():
+            leaves[self._label(stack[-1])] += seconds * 1000
+        return leaves.most_common(limit)
@@ -36,15 +36,15 @@ async function getStats(): Promise<StatsData> {
       `SELECT COUNT(*) as total FROM employees WHERE status = 'active'`
     );
     
-    // Today's attendance stats
+    // Today's attendance stats (rollup maintained by the ML service on check-in/out)
     const [todayStats] = await pool.query<RowDataPacket[]>(
       `SELECT 
-        COUNT(*) as total,
-        SUM(CASE WHEN status = 'present' THEN 1 ELSE 0 END) as present,
-        SUM(CASE WHEN status = 'late' THEN 1 ELSE 0 END) as late,
-        SUM(CASE WHEN status = 'absent' THEN 1 ELSE 0 END) as absent
-      FROM attendance_records
-      WHERE attendance_date = ?`,
+        COALESCE(SUM(total_records), 0) as total,
+        COALESCE(SUM(present), 0) as present,
+        COALESCE(SUM(late), 0) as late,
+        COALESCE(SUM(absent), 0) as absent
+      FROM daily_attendance_summary
+      WHERE summary_date = ?`,
       [today]
     );
     
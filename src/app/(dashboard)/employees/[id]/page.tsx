@@ -205,7 +205,7 @@ export default async function EmployeeDetailPage({
                 <div key={photo.encoding_id} className="relative group">
                   <div className="aspect-square bg-muted rounded-lg overflow-hidden border-2 border-muted">
                     <img
-                      src={`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/images/${photo.image_path}`}
+                      src={`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/images/${photo.image_path}?size=320`}
                       alt="Employee face"
                       className="w-full h-full object-cover"
                     />
@@ -11,15 +11,15 @@ export async function GET() {
       `SELECT COUNT(*) as total FROM employees WHERE status = 'active'`
     );
     
-    // Today's attendance stats
+    // Today's attendance stats (rollup maintained by the ML service on check-in/out)
     const [todayStats] = await pool.query<RowDataPacket[]>(
       `SELECT 
-        COUNT(*) as total,
-        SUM(CASE WHEN status = 'present' THEN 1 ELSE 0 END) as present,
-        SUM(CASE WHEN status = 'late' THEN 1 ELSE 0 END) as late,
-        SUM(CASE WHEN status = 'absent' THEN 1 ELSE 0 END) as absent
-      FROM attendance_records
-      WHERE attendance_date = ?`,
+        COALESCE(SUM(total_records), 0) as total,
+        COALESCE(SUM(present), 0) as present,
+        COALESCE(SUM(late), 0) as late,
+        COALESCE(SUM(absent), 0) as absent
+      FROM daily_attendance_summary
+      WHERE summary_date = ?`,
       [today]
     );
     
@@ -43,14 +43,14 @@ export async function GET() {
     // Weekly attendance trend (last 7 days)
     const [weeklyTrend] = await pool.query<RowDataPacket[]>(
       `SELECT 
-        attendance_date,
-        COUNT(*) as total,
-        SUM(CASE WHEN status = 'present' THEN 1 ELSE 0 END) as present,
-        SUM(CASE WHEN status = 'late' THEN 1 ELSE 0 END) as late
-      FROM attendance_records
-      WHERE attendance_date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
-      GROUP BY attendance_date
-      ORDER BY attendance_date ASC`
+        summary_date as attendance_date,
+        SUM(total_records) as total,
+        SUM(present) as present,
+        SUM(late) as late
+      FROM daily_attendance_summary
+      WHERE summary_date >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
+      GROUP BY summary_date
+      ORDER BY summary_date ASC`
     );
     
     return NextResponse.json({